@@ -0,0 +1,216 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ING_ACCOUNT = "NL01INGB0000000001"
+RABO_ACCOUNT = "NL02RABO0000000002"
+CHUNK_ROWS = 1_000_000
+START_DATE = np.datetime64("2022-01-01")
+DAYS = 3 * 365
+INCOME_SHARE = 0.15
+OWN_TRANSFER_SHARE = 0.02
+
+MERCHANTS = [
+    "Albert Heijn",
+    "Jumbo",
+    "Lidl",
+    "Bol.com",
+    "Coolblue",
+    "NS",
+    "Shell",
+    "Eneco",
+    "Ziggo",
+    "Vattenfall",
+    "Netflix",
+    "Spotify",
+    "Belastingdienst",
+    "Zilveren Kruis",
+    "Gemeente Utrecht",
+    "Thuisbezorgd",
+    "HEMA",
+    "Kruidvat",
+    "IKEA",
+    "Werkgever BV",
+]
+
+
+# Counterparty names and IBANs. Besides the well-known merchants there is a
+# long tail of people and small shops, as in a real statement history.
+def counterparties(count=2000):
+    names = MERCHANTS + [f"Tegenpartij {i:05d}" for i in range(count - len(MERCHANTS))]
+    ibans = [f"NL{10 + i % 90:02d}BANK{i:010d}" for i in range(len(names))]
+    return names, ibans
+
+
+def _amount_strings(cents, signed):
+    magnitude = np.abs(cents)
+    text = (
+        pd.Series(magnitude // 100).astype(str)
+        + ","
+        + pd.Series(magnitude % 100).astype(str).str.zfill(2)
+    )
+    if signed:
+        text = np.where(cents < 0, "-", "+") + text
+    return text
+
+
+def _transactions(rng, rows, own_iban, other_own_iban):
+    names, ibans = counterparties()
+    # Zipf-like popularity: a few counterparties get most of the transactions
+    weights = 1.0 / np.arange(1, len(names) + 1)
+    picks = rng.choice(len(names), size=rows, p=weights / weights.sum())
+    cents = rng.lognormal(mean=8.0, sigma=1.2, size=rows).astype(np.int64) + 1
+    cents = np.where(rng.random(rows) < INCOME_SHARE, cents, -cents)
+    dates = START_DATE + rng.integers(0, DAYS, size=rows).astype("timedelta64[D]")
+
+    name_col = np.asarray(names, dtype=object)[picks]
+    iban_col = np.asarray(ibans, dtype=object)[picks]
+    # Some transfers between the own accounts, which the cleaning filters out
+    own = rng.random(rows) < OWN_TRANSFER_SHARE
+    name_col[own] = "Eigen rekening"
+    iban_col[own] = other_own_iban
+    return pd.DataFrame(
+        {"date": dates, "name": name_col, "iban": iban_col, "cents": cents},
+    ).assign(account=own_iban)
+
+
+def ing_frame(rng, rows):
+    tx = _transactions(rng, rows, ING_ACCOUNT, RABO_ACCOUNT)
+    return pd.DataFrame(
+        {
+            "Date": pd.Series(tx["date"]).dt.strftime("%Y%m%d"),
+            "Name / Description": tx["name"],
+            "Account": tx["account"],
+            "Counterparty": tx["iban"],
+            "Code": "GT",
+            "Debit/credit": np.where(tx["cents"] < 0, "Debit", "Credit"),
+            "Amount (EUR)": _amount_strings(tx["cents"].to_numpy(), signed=False),
+            "Transaction type": "Online bankieren",
+            "Notifications": "Omschrijving",
+        },
+    )
+
+
+def rabo_frame(rng, rows):
+    tx = _transactions(rng, rows, RABO_ACCOUNT, ING_ACCOUNT)
+    return pd.DataFrame(
+        {
+            "IBAN/BBAN": tx["account"],
+            "Munt": "EUR",
+            "Datum": pd.Series(tx["date"]).dt.strftime("%Y-%m-%d"),
+            "Bedrag": _amount_strings(tx["cents"].to_numpy(), signed=True),
+            "Tegenrekening IBAN/BBAN": tx["iban"],
+            "Naam tegenpartij": tx["name"],
+            "Omschrijving-1": "Omschrijving",
+        },
+    )
+
+
+# Writes rows transactions in the format of bank, in chunks so that even
+# 10M rows do not have to fit in memory at once. The same seed always gives
+# the same file.
+def write_statement(path, bank, rows, seed=0):
+    make_frame = {"ING": ing_frame, "RABO": rabo_frame}[bank]
+    rng = np.random.default_rng(seed)
+    remaining = rows
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        header = True
+        while header or remaining > 0:
+            n = min(CHUNK_ROWS, remaining)
+            make_frame(rng, n).to_csv(f, index=False, header=header)
+            header = False
+            remaining -= n
+    return path
+
+
+# Writes an ING and a Rabobank statement that together hold rows transactions
+def write_statements(directory, rows, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    ing_rows = rows // 2
+    return [
+        write_statement(os.path.join(directory, "ing.csv"), "ING", ing_rows, seed),
+        write_statement(
+            os.path.join(directory, "rabo.csv"),
+            "RABO",
+            rows - ing_rows,
+            seed + 1,
+        ),
+    ]
+
+
+# Label table in the shape of label_db.get_labels for part of the counterparties
+def label_frame(fraction=0.5):
+    names, _ = counterparties()
+    labelled = names[: int(len(names) * fraction)]
+    return pd.DataFrame(
+        {
+            "Tegenpartij": labelled,
+            "Label": [f"Label {i % 25}" for i in range(len(labelled))],
+            "Zakelijk": [i % 7 == 0 for i in range(len(labelled))],
+        },
+    )
+
+
+# Label rules in the shape of label_db.get_rules, count of each kind
+def rule_frame(count=1000):
+    names, ibans = counterparties()
+    kinds = [
+        ("begint_met", lambda i: names[i % len(names)][:6]),
+        ("bevat", lambda i: f"{i:05d}"),
+        ("regex", lambda i: rf"^tegenpartij 0*{i}$"),
+        ("iban", lambda i: ibans[i % len(ibans)]),
+    ]
+    rows = [
+        (kind, pattern(i), None, None)
+        for kind, pattern in kinds
+        for i in range(count)
+    ]
+    rows += [("bedrag", None, -(i + 1) * 1000, -i * 1000) for i in range(count)]
+    return pd.DataFrame(
+        [
+            (rule_id, *row, f"Regel {rule_id % 25}", rule_id % 7 == 0, rule_id % 5)
+            for rule_id, row in enumerate(rows)
+        ],
+        columns=[
+            "Id",
+            "Soort",
+            "Patroon",
+            "MinBedrag",
+            "MaxBedrag",
+            "Label",
+            "Zakelijk",
+            "Prioriteit",
+        ],
+    )
+
+
+# A counterparty profile (see label_rules.counterparty_profile) of count
+# counterparties, to resolve rules on more of them than the statements hold
+def profile_frame(count, seed=0):
+    names, ibans = counterparties(count)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "iban tegenpartij": ibans,
+            "Bedrag": -rng.lognormal(mean=8.0, sigma=1.2, size=len(names)),
+        },
+        index=pd.Index(names, name="Tegenpartij"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Schrijf synthetische ING- en Rabobank-afschriften.",
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in write_statements(args.directory, args.rows, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
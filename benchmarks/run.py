@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+from generate import label_frame, profile_frame, rule_frame, write_statements
+
+import analysis
+from aggregate_cube import COUNTERPARTY, LABEL, MONTH, AggregateCube
+from calendar_dim import month_names
+from constants import Zakelijkheid
+from data_loader import (
+    ImportOptions,
+    clean_transactions,
+    import_and_merge,
+    merge_and_clean_labels,
+)
+from label_rules import RuleSet, counterparty_profile
+from recurring import detect_recurring
+
+HISTORY_FILE = os.path.join(os.path.dirname(__file__), "history.json")
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+# A run is a regression when a case is this much slower than its baseline.
+# Cases faster than MIN_SECONDS are too noisy to compare.
+TOLERANCE = 0.25
+MIN_SECONDS = 0.005
+# Rules per kind and counterparties of the resolve_many_label_rules case
+MANY_RULES = 5_000
+MANY_COUNTERPARTIES = 100_000
+
+
+def best_time(fn, setup=tuple, repeat=3):
+    best = None
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Returns (name, fn, setup) for every benchmarked step, on statements with
+# rows transactions written to directory. setup returns the arguments for fn.
+def cases(directory, rows):
+    ing_path, rabo_path = paths = write_statements(directory, rows)
+    ing_raw = pd.read_csv(ing_path, dtype=str)
+    rabo_raw = pd.read_csv(rabo_path, dtype=str)
+    df, _ = import_and_merge(None, paths, copy_files=False)
+    monthly = analysis.summarize_by_counterparty_per_month(df)
+    labels = label_frame()
+    summary = merge_and_clean_labels(
+        monthly.assign(Maand_NL=month_names(monthly["Maand"])),
+        labels,
+    )
+    first_label = summary["Label"].iloc[0]
+    rules = rule_frame()
+    rule_set = RuleSet(rules)
+    profile = counterparty_profile(df)
+    many_rules = RuleSet(rule_frame(MANY_RULES))
+    many_counterparties = profile_frame(MANY_COUNTERPARTIES)
+    cube = AggregateCube(summary)
+
+    return [
+        ("clean_transactions_ing", clean_transactions, lambda: (ing_raw.copy(),)),
+        ("clean_transactions_rabo", clean_transactions, lambda: (rabo_raw.copy(),)),
+        ("import_and_merge", import_and_merge, lambda: (None, paths, False)),
+        (
+            "import_and_merge_serial",
+            lambda: import_and_merge(
+                None, paths, copy_files=False, options=ImportOptions(workers=1),
+            ),
+            tuple,
+        ),
+        (
+            "summarize_by_counterparty_per_month",
+            analysis.summarize_by_counterparty_per_month,
+            lambda: (df,),
+        ),
+        ("merge_and_clean_labels", merge_and_clean_labels, lambda: (monthly, labels)),
+        ("compile_label_rules", RuleSet, lambda: (rules,)),
+        ("resolve_label_rules", rule_set.resolve, lambda: (profile,)),
+        (
+            "resolve_many_label_rules",
+            many_rules.resolve,
+            lambda: (many_counterparties,),
+        ),
+        (
+            "summarize_monthly_totals",
+            analysis.summarize_monthly_totals,
+            lambda: (summary,),
+        ),
+        (
+            "summarize_monthly_totals_by_label",
+            analysis.summarize_monthly_totals_by_label,
+            lambda: (summary,),
+        ),
+        (
+            "filter_zakelijkheid",
+            analysis.filter_zakelijkheid,
+            lambda: (summary, Zakelijkheid.BUSINESS.value),
+        ),
+        ("aggregate_label_netto", analysis.aggregate_label_netto, lambda: (summary,)),
+        (
+            "aggregate_tegenpartij_label_zakelijk",
+            analysis.aggregate_tegenpartij_label_zakelijk,
+            lambda: (summary,),
+        ),
+        ("aggregate_month_netto", analysis.aggregate_month_netto, lambda: (summary,)),
+        (
+            "aggregate_month_netto_year_totals",
+            analysis.aggregate_month_netto,
+            lambda: (summary, True),
+        ),
+        (
+            "aggregate_tegenpartijen_for_label",
+            analysis.aggregate_tegenpartijen_for_label,
+            lambda: (summary, first_label),
+        ),
+        ("build_aggregate_cube", AggregateCube, lambda: (summary,)),
+        ("detect_recurring", detect_recurring, lambda: (df,)),
+        (
+            "cube_rollup_month_label",
+            lambda: cube.rollup([MONTH, LABEL]),
+            tuple,
+        ),
+        (
+            "cube_rollup_counterparty_one_month",
+            lambda: cube.rollup(
+                [COUNTERPARTY, LABEL], month=summary["Maand"].iloc[0],
+            ),
+            tuple,
+        ),
+    ]
+
+
+def run(rows_list, repeat):
+    results = {}
+    for rows in rows_list:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, fn, setup in cases(directory, rows):
+                key = f"{name}[{rows}]"
+                results[key] = best_time(fn, setup, repeat)
+                print(f"{key:<55} {results[key] * 1000:10.2f} ms")
+    return results
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {"baseline": {}, "runs": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def regressions(baseline, results, tolerance):
+    found = []
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base is None or seconds < MIN_SECONDS:
+            continue
+        if seconds > base * (1 + tolerance):
+            found.append((key, base, seconds))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Meet de snelheid van import en analyse.",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help="aantal transacties per meting, bijvoorbeeld 1000 10000000",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="sla deze meting op als nieuwe baseline",
+    )
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+
+    history = load_history(args.history)
+    found = regressions(history["baseline"], results, args.tolerance)
+    history["runs"].append(
+        {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "results": results,
+        },
+    )
+    # Cases without a baseline yet start with this run's timing
+    for key, seconds in results.items():
+        if args.update_baseline or key not in history["baseline"]:
+            history["baseline"][key] = seconds
+    save_history(args.history, history)
+
+    if found and not args.update_baseline:
+        print("\nTrager dan de baseline:")
+        for key, base, seconds in found:
+            print(f"  {key}: {base * 1000:.2f} ms -> {seconds * 1000:.2f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+from analysis import bincount_sum
+from constants import Zakelijkheid
+from data_loader import DataFrameColumn
+
+MONTH = DataFrameColumn.MONTH.value
+COUNTERPARTY = DataFrameColumn.COUNTERPARTY.value
+LABEL = DataFrameColumn.LABEL.value
+BUSINESS = DataFrameColumn.BUSINESS.value
+
+
+class _Dimension:
+    def __init__(self, values, uniques):
+        self.codes = np.asarray(values, dtype=np.int64)
+        self.uniques = list(uniques)
+        self.dtype = uniques.dtype
+        self.lookup = {value: code for code, value in enumerate(self.uniques)}
+
+    def code(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.uniques)
+            self.uniques.append(value)
+        return code
+
+    def codes_of(self, values):
+        return [self.lookup[v] for v in values if v in self.lookup]
+
+    def values(self, codes):
+        return pd.array(np.array(self.uniques, dtype=object)[codes], dtype=self.dtype)
+
+
+# The cells of summary_df, one per (month, counterparty, label, zakelijk),
+# kept as integer codes per dimension next to their netto. Cells are sorted by
+# month, so a month filter is a slice, and roll-ups are bincounts over the
+# codes of the selected cells; the data is grouped only once, when the cube
+# is built.
+class AggregateCube:
+    def __init__(self, summary_df):
+        df = summary_df.sort_values(MONTH, kind="stable")
+        self.netto = df[DataFrameColumn.NETTO.value].to_numpy(dtype=np.int64)
+
+        self.dimensions = {}
+        for col in (MONTH, COUNTERPARTY, LABEL):
+            codes, uniques = pd.factorize(df[col], sort=True)
+            self.dimensions[col] = _Dimension(codes, uniques)
+        business = df[BUSINESS].to_numpy(dtype=bool)
+        self.dimensions[BUSINESS] = _Dimension(business, pd.Index([False, True]))
+
+        months = self.dimensions[MONTH]
+        self._month_starts = np.searchsorted(
+            months.codes, np.arange(len(months.uniques) + 1),
+        )
+        self._month_names = dict(
+            zip(df[MONTH], df[DataFrameColumn.MONTH_NL.value], strict=True),
+        )
+        self._month_name_dtype = df[DataFrameColumn.MONTH_NL.value].dtype
+
+        # Cells per counterparty, for moving them to another label
+        counterparties = self.dimensions[COUNTERPARTY].codes
+        self._by_counterparty = np.argsort(counterparties, kind="stable")
+        self._counterparty_starts = np.searchsorted(
+            counterparties[self._by_counterparty],
+            np.arange(len(self.dimensions[COUNTERPARTY].uniques) + 1),
+        )
+
+    def __len__(self):
+        return len(self.netto)
+
+    def _month_slice(self, month):
+        if month is None:
+            return 0, len(self)
+        code = self.dimensions[MONTH].lookup.get(month)
+        if code is None:
+            return 0, 0
+        return self._month_starts[code], self._month_starts[code + 1]
+
+    # Positions of the cells that pass the filters
+    def _cells(
+        self,
+        month=None,
+        labels=None,
+        counterparties=None,
+        zakelijkheid=Zakelijkheid.ALL.value,
+    ):
+        start, end = self._month_slice(month)
+        mask = np.ones(end - start, dtype=bool)
+        for col, values in ((LABEL, labels), (COUNTERPARTY, counterparties)):
+            if values is not None:
+                dimension = self.dimensions[col]
+                mask &= np.isin(
+                    dimension.codes[start:end], dimension.codes_of(values),
+                )
+        business = self.dimensions[BUSINESS].codes[start:end].astype(bool)
+        if zakelijkheid == Zakelijkheid.BUSINESS.value:
+            mask &= business
+        elif zakelijkheid == Zakelijkheid.NON_BUSINESS.value:
+            mask &= ~business
+        return start + np.flatnonzero(mask)
+
+    # Inkomsten, Uitgaven, Netto and Aantal (cells) per group of keys, sorted
+    # by the keys like a groupby. The filters are those of _cells; a month
+    # key gets its Maand_NL name next to it.
+    def rollup(self, keys, **filters):
+        cells = self._cells(**filters)
+        combined = np.zeros(len(cells), dtype=np.int64)
+        for key in keys:
+            dimension = self.dimensions[key]
+            combined = combined * len(dimension.uniques) + dimension.codes[cells]
+        groups, codes = np.unique(combined, return_inverse=True)
+
+        result = {}
+        for key in reversed(keys):
+            size = len(self.dimensions[key].uniques)
+            result[key] = self.dimensions[key].values(groups % size)
+            groups = groups // size
+        result = pd.DataFrame({key: result[key] for key in keys})
+        if MONTH in keys:
+            result.insert(
+                keys.index(MONTH) + 1,
+                DataFrameColumn.MONTH_NL.value,
+                pd.array(
+                    [self._month_names[m] for m in result[MONTH]],
+                    dtype=self._month_name_dtype,
+                ),
+            )
+
+        netto = self.netto[cells]
+        positive = netto > 0
+        negative = netto < 0
+        count = len(result)
+        result[DataFrameColumn.INCOME.value] = bincount_sum(
+            codes[positive], netto[positive], count,
+        )
+        result[DataFrameColumn.EXPENSE.value] = bincount_sum(
+            codes[negative], netto[negative], count,
+        )
+        result[DataFrameColumn.NETTO.value] = bincount_sum(codes, netto, count)
+        result[DataFrameColumn.COUNT.value] = np.bincount(codes, minlength=count)
+        # Labels added by apply_label_changes have the highest codes
+        return result.sort_values(keys, kind="stable", ignore_index=True)
+
+    # Moves the cells of the changed counterparties (analysis.LabelChange) to
+    # their new label and zakelijk, without building the cube again
+    def apply_label_changes(self, changes):
+        counterparties = self.dimensions[COUNTERPARTY]
+        labels = self.dimensions[LABEL]
+        business = self.dimensions[BUSINESS]
+        for change in changes:
+            code = counterparties.lookup.get(change.tegenpartij)
+            if code is None:
+                continue
+            cells = self._by_counterparty[
+                self._counterparty_starts[code] : self._counterparty_starts[code + 1]
+            ]
+            labels.codes[cells] = labels.code(change.new_label)
+            business.codes[cells] = int(change.new_zakelijk)
@@ -1,8 +1,11 @@
+from typing import NamedTuple
+
+import numpy as np
 import pandas as pd
 
+from calendar_dim import YEAR, calendar_column, month_names
 from constants import Zakelijkheid
 from data_loader import DataFrameColumn
-from utils import format_month
 
 
 def summarize_by_counterparty_per_month(df):
@@ -24,52 +27,89 @@ def summarize_by_counterparty_per_month(df):
     return monthly
 
 
+INCOME_EXPENSE_COLUMNS = [
+    DataFrameColumn.INCOME.value,
+    DataFrameColumn.EXPENSE.value,
+    DataFrameColumn.NETTO.value,
+]
+
+
+# Per group code the sum of weights, as int64 cents
+def bincount_sum(codes, weights, groups):
+    return np.rint(np.bincount(codes, weights=weights, minlength=groups)).astype(
+        np.int64,
+    )
+
+
+# Per group of keys, sorted like groupby: the keys, then the positive sum
+# (Inkomsten), negative sum (Uitgaven) and sum (Netto) of value_col in cents,
+# and the number of rows, positive and negative values. Every column is one
+# bincount over the group codes instead of a Python call per group. The sums
+# go through float64, which is exact up to 2**53 cents.
+def signed_totals(df, keys, value_col=DataFrameColumn.NETTO.value):
+    grouped = df.groupby(keys, sort=True)
+    groups = grouped.ngroups
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    values = df[value_col].to_numpy(dtype=np.float64)
+    in_group = codes >= 0
+    codes, values = codes[in_group], values[in_group]
+    positive = values > 0
+    negative = values < 0
+
+    result = grouped.size().index.to_frame(index=False)
+    result[DataFrameColumn.INCOME.value] = bincount_sum(
+        codes[positive], values[positive], groups,
+    )
+    result[DataFrameColumn.EXPENSE.value] = bincount_sum(
+        codes[negative], values[negative], groups,
+    )
+    result[DataFrameColumn.NETTO.value] = bincount_sum(codes, values, groups)
+    result[DataFrameColumn.COUNT.value] = np.bincount(codes, minlength=groups)
+    result[DataFrameColumn.POSITIVE_COUNT.value] = np.bincount(
+        codes[positive], minlength=groups,
+    )
+    result[DataFrameColumn.NEGATIVE_COUNT.value] = np.bincount(
+        codes[negative], minlength=groups,
+    )
+    return result
+
+
 def summarize_monthly_totals(summary_df):
     df = summary_df.copy()
     if DataFrameColumn.MONTH_NL.value not in df.columns:
-        df[DataFrameColumn.MONTH_NL.value] = df[DataFrameColumn.MONTH.value].apply(
-            format_month,
+        df[DataFrameColumn.MONTH_NL.value] = month_names(
+            df[DataFrameColumn.MONTH.value],
         )
 
-    return (
-        df.groupby([DataFrameColumn.MONTH.value, DataFrameColumn.MONTH_NL.value])[
-            DataFrameColumn.NETTO.value
-        ]
-        .agg(
-            **{
-                DataFrameColumn.INCOME.value: lambda x: x[x > 0].sum(),
-                DataFrameColumn.EXPENSE.value: lambda x: x[x < 0].sum(),
-                DataFrameColumn.NETTO.value: "sum",
-            },
-        )
-        .reset_index()
-        .sort_values(DataFrameColumn.MONTH.value)
+    keys = [DataFrameColumn.MONTH.value, DataFrameColumn.MONTH_NL.value]
+    return finish_monthly_totals(
+        signed_totals(df, keys)[keys + INCOME_EXPENSE_COLUMNS],
     )
 
 
+# The finish_* functions are the steps after the grouping, shared with the
+# SQL backend which does the grouping itself
+def finish_monthly_totals(totals):
+    return totals.sort_values(DataFrameColumn.MONTH.value)
+
+
 def summarize_monthly_totals_by_label(summary_df):
-    return (
-        summary_df.groupby(
-            [DataFrameColumn.MONTH.value, DataFrameColumn.LABEL.value], as_index=False,
-        )[DataFrameColumn.NETTO.value]
-        .agg(
-            **{
-                DataFrameColumn.INCOME.value: lambda x: x[x > 0].sum(),
-                DataFrameColumn.EXPENSE.value: lambda x: x[x < 0].sum(),
-                DataFrameColumn.NETTO.value: "sum",
-            },
-        )
-        .assign(
-            **{
-                DataFrameColumn.MONTH_NL.value: lambda df: df[
-                    DataFrameColumn.MONTH.value
-                ].apply(format_month),
-            },
-        )
-        .sort_values(DataFrameColumn.MONTH.value)
+    keys = [DataFrameColumn.MONTH.value, DataFrameColumn.LABEL.value]
+    return finish_monthly_totals_by_label(
+        signed_totals(summary_df, keys)[keys + INCOME_EXPENSE_COLUMNS],
     )
 
 
+def finish_monthly_totals_by_label(totals):
+    return totals.assign(
+        **{
+            DataFrameColumn.MONTH_NL.value: lambda df: month_names(
+                df[DataFrameColumn.MONTH.value],
+            ),
+        },
+    ).sort_values(DataFrameColumn.MONTH.value)
+
+
 def filter_zakelijkheid(summary_df, zakelijkheid):
     if zakelijkheid == Zakelijkheid.BUSINESS.value:
         return summary_df[summary_df[DataFrameColumn.BUSINESS.value]]
@@ -127,7 +167,7 @@ def aggregate_month_netto(df, include_year_totals=False):
         JAAR_COL = "Jaar"
         IS_TOTAL_COL = "_is_total"
         gb = grouped_by_month.copy()
-        gb[JAAR_COL] = gb[DataFrameColumn.MONTH.value].str[:4].astype(int)
+        gb[JAAR_COL] = calendar_column(gb[DataFrameColumn.MONTH.value], YEAR)
         year_totals = gb.groupby(JAAR_COL, as_index=False)[
             DataFrameColumn.NETTO.value
         ].sum()
@@ -172,3 +212,29 @@ def aggregate_tegenpartijen_for_label(summary_df, label_value):
     total = tegenpartij_summary[DataFrameColumn.NETTO.value].sum()
     count = len(tegenpartij_summary)
     return tegenpartij_summary, total, count
+
+
+# A counterparty whose label or zakelijk changed in the label editor
+class LabelChange(NamedTuple):
+    tegenpartij: str
+    old_label: str
+    new_label: str
+    old_zakelijk: bool
+    new_zakelijk: bool
+
+
+# Labels whose groups the changes move rows out of or into
+def changed_labels(changes):
+    return {c.old_label for c in changes} | {c.new_label for c in changes}
+
+
+# Swaps the groups of result whose key is in keys for update, the same
+# aggregate computed for just those keys, in the order of a full rebuild.
+# The sort order is that of the full rebuild, so it is passed in as is.
+def replace_groups(result, update, key, keys, *, sort_by, ascending=True):  # noqa: PLR0913
+    kept = result[~result[key].isin(keys)]
+    if kept.empty:
+        return update
+    return pd.concat([kept, update], ignore_index=True).sort_values(
+        sort_by, ascending=ascending, kind="stable",
+    )
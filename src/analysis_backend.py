@@ -0,0 +1,364 @@
+import itertools
+
+import analysis
+import settings
+from aggregate_cube import BUSINESS, COUNTERPARTY, LABEL, MONTH, AggregateCube
+from analysis import INCOME_EXPENSE_COLUMNS
+from calendar_dim import month_names
+from constants import Label, Zakelijkheid
+from data_loader import DataFrameColumn
+from label_db import get_store
+from label_rules import get_rule_set
+from transaction_store import TransactionStore
+from utils import format_zakelijk
+
+SQL_BACKEND = "sql"
+PANDAS_BACKEND = "pandas"
+AUTO_BACKEND = "auto"
+# Filters SqliteBackend._grouped accepts
+GROUP_FILTERS = frozenset(
+    ("month", "counterparty", "counterparties", "label", "labels", "zakelijkheid"),
+)
+
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+# The SQL of SqliteBackend._grouped filters: conditions on the transactions,
+# applied before grouping so they use the indexes, the WHERE clause on the
+# labelled rows, and the parameters of both
+def _filter_sql(filters):
+    unknown = filters.keys() - GROUP_FILTERS
+    if unknown:
+        raise TypeError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    transaction_filter, params = "", []
+    if filters.get("month") is not None:
+        transaction_filter += " AND Maand = ?"
+        params.append(filters["month"])
+    if filters.get("counterparty") is not None:
+        transaction_filter += " AND Tegenpartij = ?"
+        params.append(filters["counterparty"])
+    counterparties = filters.get("counterparties")
+    if counterparties is not None:
+        transaction_filter += f" AND Tegenpartij IN ({_placeholders(counterparties)})"
+        params.extend(counterparties)
+    conditions = []
+    if filters.get("label") is not None:
+        conditions.append("Label = ?")
+        params.append(filters["label"])
+    labels = filters.get("labels")
+    if labels is not None:
+        conditions.append(f"Label IN ({_placeholders(labels)})")
+        params.extend(labels)
+    zakelijkheid = filters.get("zakelijkheid", Zakelijkheid.ALL.value)
+    if zakelijkheid == Zakelijkheid.BUSINESS.value:
+        conditions.append("Zakelijk")
+    elif zakelijkheid == Zakelijkheid.NON_BUSINESS.value:
+        conditions.append("NOT Zakelijk")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return transaction_filter, where, params
+
+
+def _with_zakelijk_nl(df):
+    df[DataFrameColumn.BUSINESS_NL.value] = (
+        df.pop(DataFrameColumn.BUSINESS.value).astype(bool).map(format_zakelijk)
+    ).astype("str")
+    return df
+
+
+# Answers from an AggregateCube of the in-memory summary_df, built on first
+# use. Filters are given as arguments: month is a Maand value such as
+# "2026-01", None for all months. The cube does the grouping and the
+# analysis functions the remaining steps, so results are those of running
+# them on summary_df.
+class PandasBackend:
+    def __init__(self, summary_df):
+        self.summary_df = summary_df
+        self._cube = None
+
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = AggregateCube(self.summary_df)
+        return self._cube
+
+    # Keeps the cube in line with labels changed in summary_df
+    def apply_label_changes(self, changes):
+        if self._cube is not None:
+            self._cube.apply_label_changes(changes)
+
+    # labels limits the result to those labels' groups, for updating part of
+    # an earlier result (see analysis.replace_groups); counterparties alike
+    def label_netto(self, month=None, labels=None):
+        return analysis.aggregate_label_netto(
+            self.cube.rollup([LABEL], month=month, labels=labels),
+        )
+
+    def tegenpartij_label_zakelijk(self, month=None, counterparties=None):
+        df = self.cube.rollup(
+            [COUNTERPARTY, LABEL, BUSINESS],
+            month=month,
+            counterparties=counterparties,
+        )
+        return analysis.aggregate_tegenpartij_label_zakelijk(_with_zakelijk_nl(df))
+
+    def month_netto(self, month=None, include_year_totals=False):
+        return analysis.aggregate_month_netto(
+            self.cube.rollup([MONTH], month=month),
+            include_year_totals=include_year_totals,
+        )
+
+    def monthly_totals(self, month=None):
+        return analysis.finish_monthly_totals(
+            self.cube.rollup([MONTH], month=month)[
+                [MONTH, DataFrameColumn.MONTH_NL.value, *INCOME_EXPENSE_COLUMNS]
+            ],
+        )
+
+    def monthly_totals_by_label(
+        self,
+        label=None,
+        counterparty=None,
+        zakelijkheid=Zakelijkheid.ALL.value,
+        labels=None,
+    ):
+        if label is not None:
+            labels = [label] if labels is None else [lb for lb in labels if lb == label]
+        df = self.cube.rollup(
+            [MONTH, LABEL],
+            labels=labels,
+            counterparties=None if counterparty is None else [counterparty],
+            zakelijkheid=zakelijkheid,
+        )
+        return analysis.finish_monthly_totals_by_label(
+            df[[MONTH, LABEL, *INCOME_EXPENSE_COLUMNS]],
+        )
+
+    def tegenpartijen_for_label(self, label, month=None):
+        return analysis.aggregate_tegenpartijen_for_label(
+            self.cube.rollup([COUNTERPARTY, LABEL], month=month, labels=[label]),
+            label,
+        )
+
+
+# The same aggregations as GROUP BY queries on the transactions and labels
+# tables, so only the grouped result is loaded into pandas. Each query returns
+# what the pandas grouping would, and the remaining steps are the analysis
+# functions themselves, so results are identical to PandasBackend.
+class SqliteBackend:
+    # Per (month, counterparty) netto with its label, like summary_df
+    SUMMARY_SQL = f"""
+        WITH summary AS (
+            SELECT Maand, Tegenpartij, SUM(Bedrag) AS Netto
+            FROM transactions
+            WHERE Tegenpartij IS NOT NULL {{transaction_filter}}
+            GROUP BY Maand, Tegenpartij
+        ), labelled AS (
+            SELECT
+                s.Maand, s.Tegenpartij, s.Netto,
+                COALESCE(
+                    NULLIF(
+                        TRIM(
+                            CASE WHEN l.Tegenpartij IS NULL THEN r.Label
+                            ELSE l.Label END,
+                            ' \t\r\n'
+                        ),
+                        ''
+                    ),
+                    '{Label.GEEN.value}'
+                ) AS Label,
+                COALESCE(
+                    CASE WHEN l.Tegenpartij IS NULL THEN r.Zakelijk
+                    ELSE l.Zakelijk END,
+                    0
+                ) AS Zakelijk
+            FROM summary s
+            LEFT JOIN labels l ON l.Tegenpartij = s.Tegenpartij
+            LEFT JOIN temp.rule_labels r ON r.Tegenpartij = s.Tegenpartij
+        )
+    """
+    INCOME_EXPENSE_SQL = """
+        SUM(CASE WHEN Netto > 0 THEN Netto ELSE 0 END) AS Inkomsten,
+        SUM(CASE WHEN Netto < 0 THEN Netto ELSE 0 END) AS Uitgaven,
+        SUM(Netto) AS Netto
+    """
+
+    def __init__(self, db_path=None):
+        self.store = get_store(db_path)
+        self._resolve_rule_labels(db_path)
+
+    # The queries read the labels table itself, so label changes need no work
+    def apply_label_changes(self, changes):
+        pass
+
+    # The rules are resolved once, into a temporary table the queries join
+    # like labels; a new backend is made after every import
+    def _resolve_rule_labels(self, db_path):
+        self.store.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS rule_labels "
+            "(Tegenpartij TEXT PRIMARY KEY, Label TEXT, Zakelijk BOOLEAN)",
+        )
+        self.store.execute("DELETE FROM temp.rule_labels")
+        rules = get_rule_set(db_path)
+        if rules:
+            rule_labels = rules.resolve(TransactionStore(db_path).counterparty_profile())
+            self.store.executemany(
+                "INSERT INTO temp.rule_labels VALUES (?, ?, ?)",
+                zip(
+                    rule_labels[DataFrameColumn.COUNTERPARTY.value],
+                    rule_labels[DataFrameColumn.LABEL.value],
+                    rule_labels[DataFrameColumn.BUSINESS.value].astype(int),
+                    strict=True,
+                ),
+            )
+
+    # filters are any of GROUP_FILTERS; one left out does not filter
+    def _grouped(self, keys, aggregates="SUM(Netto) AS Netto", **filters):
+        transaction_filter, where, params = _filter_sql(filters)
+        columns = ", ".join(keys)
+        query = (
+            self.SUMMARY_SQL.format(transaction_filter=transaction_filter)
+            + f"SELECT {columns}, {aggregates} FROM labelled {where} "
+            + f"GROUP BY {columns} ORDER BY {columns}"
+        )
+        df = self.store.read_frame(query, params)
+        # Empty results come back without column types
+        for col in df.columns:
+            if col in keys and col != "Zakelijk":
+                df[col] = df[col].astype("str")
+            else:
+                df[col] = df[col].astype("int64")
+        return df
+
+    @staticmethod
+    def _with_month_names(df):
+        df.insert(
+            df.columns.get_loc(DataFrameColumn.MONTH.value) + 1,
+            DataFrameColumn.MONTH_NL.value,
+            month_names(df[DataFrameColumn.MONTH.value]),
+        )
+        return df
+
+    def label_netto(self, month=None, labels=None):
+        return analysis.aggregate_label_netto(
+            self._grouped(["Label"], month=month, labels=labels),
+        )
+
+    def tegenpartij_label_zakelijk(self, month=None, counterparties=None):
+        df = self._grouped(
+            ["Tegenpartij", "Label", "Zakelijk"],
+            month=month,
+            counterparties=counterparties,
+        )
+        return analysis.aggregate_tegenpartij_label_zakelijk(_with_zakelijk_nl(df))
+
+    def month_netto(self, month=None, include_year_totals=False):
+        return analysis.aggregate_month_netto(
+            self._with_month_names(self._grouped(["Maand"], month=month)),
+            include_year_totals=include_year_totals,
+        )
+
+    def monthly_totals(self, month=None):
+        return analysis.finish_monthly_totals(
+            self._with_month_names(
+                self._grouped(["Maand"], self.INCOME_EXPENSE_SQL, month=month),
+            ),
+        )
+
+    def monthly_totals_by_label(
+        self,
+        label=None,
+        counterparty=None,
+        zakelijkheid=Zakelijkheid.ALL.value,
+        labels=None,
+    ):
+        return analysis.finish_monthly_totals_by_label(
+            self._grouped(
+                ["Maand", "Label"],
+                self.INCOME_EXPENSE_SQL,
+                label=label,
+                counterparty=counterparty,
+                zakelijkheid=zakelijkheid,
+                labels=labels,
+            ),
+        )
+
+    def tegenpartijen_for_label(self, label, month=None):
+        df = self._grouped(["Tegenpartij", "Label"], month=month, label=label)
+        return analysis.aggregate_tegenpartijen_for_label(df, label)
+
+
+# Every backend gets a new data version, as one is made for each import
+_data_versions = itertools.count(1)
+
+
+# Answers from an AnalysisCache where it can and from backend otherwise. The
+# cache key holds the data version of backend and the labels version of its
+# label database, so both imports and label edits leave old results unused.
+# Other attributes are those of backend.
+class CachedBackend:
+    def __init__(self, backend, cache, db_path=None):
+        self.backend = backend
+        self.cache = cache
+        self.data_version = next(_data_versions)
+        self._store = get_store(db_path)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def _cached(self, function, *args):
+        versions = (self.data_version, self._store.current_version())
+        return self.cache.get(
+            versions,
+            function,
+            args,
+            lambda: getattr(self.backend, function)(*args),
+        )
+
+    def apply_label_changes(self, changes):
+        self.backend.apply_label_changes(changes)
+
+    def label_netto(self, month=None, labels=None):
+        return self._cached("label_netto", month, labels)
+
+    def tegenpartij_label_zakelijk(self, month=None, counterparties=None):
+        return self._cached("tegenpartij_label_zakelijk", month, counterparties)
+
+    def month_netto(self, month=None, include_year_totals=False):
+        return self._cached("month_netto", month, include_year_totals)
+
+    def monthly_totals(self, month=None):
+        return self._cached("monthly_totals", month)
+
+    def monthly_totals_by_label(
+        self,
+        label=None,
+        counterparty=None,
+        zakelijkheid=Zakelijkheid.ALL.value,
+        labels=None,
+    ):
+        return self._cached(
+            "monthly_totals_by_label", label, counterparty, zakelijkheid, labels,
+        )
+
+    def tegenpartijen_for_label(self, label, month=None):
+        return self._cached("tegenpartijen_for_label", label, month)
+
+
+# Picks the backend for a history of transaction_count rows: pandas for small
+# histories, SQL from ANALYSIS_SQL_MIN_ROWS on. With a cache its results are
+# memoized there. The app still holds summary_df either way (importing and
+# the label editor need it), so SQL speeds up the views but saves no memory.
+def select_backend(summary_df, transaction_count, cache=None):
+    backend = settings.ANALYSIS_BACKEND
+    if backend == AUTO_BACKEND:
+        backend = (
+            SQL_BACKEND
+            if transaction_count >= settings.ANALYSIS_SQL_MIN_ROWS
+            else PANDAS_BACKEND
+        )
+    backend = (
+        SqliteBackend() if backend == SQL_BACKEND else PandasBackend(summary_df)
+    )
+    return backend if cache is None else CachedBackend(backend, cache)
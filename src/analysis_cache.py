@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+import pandas as pd
+
+import settings
+
+
+# Hashable form of an argument: label and counterparty filters come in as
+# lists or sets
+def _freeze(value):
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+# A copy of the cached frame, so callers that change it in place leave the
+# cached result alone, with or without copy-on-write
+def _copy(result):
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    if isinstance(result, tuple):
+        return tuple(_copy(value) for value in result)
+    return result
+
+
+# Analysis results keyed by (data version, label version, function,
+# arguments), the arguments holding the month and zakelijkheid filters. At
+# most max_entries are kept, the least recently used is dropped first. A new
+# data or label version makes every entry stale, so they are all dropped
+# when one comes in. hits and misses count lookups, for tuning the size.
+class AnalysisCache:
+    def __init__(self, max_entries=None):
+        self.max_entries = (
+            settings.ANALYSIS_CACHE_SIZE if max_entries is None else max_entries
+        )
+        self._entries = OrderedDict()
+        self._versions = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Returns the cached result of function for these arguments, calling
+    # compute() for it on a miss
+    def get(self, versions, function, args, compute):
+        if versions != self._versions:
+            self._entries.clear()
+            self._versions = versions
+        key = (*versions, function, tuple(_freeze(arg) for arg in args))
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return _copy(self._entries[key])
+
+        self.misses += 1
+        result = compute()
+        if self.max_entries > 0:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _copy(result)
+
+    def clear(self):
+        self._entries.clear()
+        self._versions = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
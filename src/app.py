@@ -3,10 +3,9 @@ import io
 import os
 import sys
 
-import pandas as pd
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
 from PyQt6 import QtGui
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtWidgets import (
     QApplication,
@@ -16,6 +15,7 @@ from PyQt6.QtWidgets import (
     QLabel,
     QMenu,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSizePolicy,
     QSplitter,
@@ -26,10 +26,14 @@ from PyQt6.QtWidgets import (
 
 import constants
 import settings
-from analysis import summarize_monthly_totals_by_label
-from data_loader import DataFrameColumn
-from importer import import_files, load_initial_data
-from label_db import init_db
+from analysis import changed_labels
+from analysis_backend import select_backend
+from analysis_cache import AnalysisCache
+from calendar_dim import build_calendar
+from data_loader import DataFrameColumn, fingerprint_index
+from import_worker import ImportWorker
+from importer import load_initial_data, rebuild_summary, summary_after_import
+from label_db import close_stores, init_db
 from plot_window import PopoutPlotWindow
 from tabs.label_chart import LabelChartTab
 from tabs.label_details import LabelDetailsViewer
@@ -40,8 +44,17 @@ from tabs.maand_netto import MaandNettoTab
 from tabs.maand_overzicht import MaandoverzichtTab
 from tabs.tegenpartij_chart import TegenpartijChartTab
 from tabs.tegenpartij_netto import TegenpartijNettoTab
+from tabs.terugkerend import TerugkerendTab
 from tabs.tijdlijn_chart import TijdlijnChartTab
+from transaction_index import TransactionIndex
+from transactions_window import TransactionsWindow
+from utils import cents_to_euros
 from visualization import plot_time_line
+from watcher import DataDirWatcher
+
+# Above this many changed counterparties (e.g. a bulk label) rebuilding the
+# views is cheaper than updating their rows one by one
+MAX_TARGETED_LABEL_CHANGES = 500
 
 
 class FinanceApp(QWidget):
@@ -53,13 +66,31 @@ class FinanceApp(QWidget):
         self.setAcceptDrops(True)
 
         init_db()
-        self.df, self.summary_df = load_initial_data()
+        self.df, self.summary_df, self.fingerprints = load_initial_data()
+        self.analysis_cache = AnalysisCache()
+        self.analysis = select_backend(
+            self.summary_df, len(self.df), self.analysis_cache,
+        )
 
         self.top_tabs_map = []
         self.main_tabs_map = []
 
+        self._transaction_index = None
+        self._import_thread = None
+        self._import_worker = None
+        self._import_interactive = False
+        self._pending_watch_paths = set()
+        self._queued_imports = []
+
         self._setup_ui()
 
+        self.data_watcher = None
+        if settings.WATCH_DATA_DIR:
+            self.data_watcher = DataDirWatcher(
+                settings.DATA_DIR, settings.WATCH_DEBOUNCE_MS, parent=self,
+            )
+            self.data_watcher.filesChanged.connect(self._on_data_files_changed)
+
         if not self.summary_df.empty:
             self.no_data_label.hide()
             self.update_all_views()
@@ -89,26 +120,7 @@ class FinanceApp(QWidget):
         layout.addWidget(QLabel("Filter op maand:"))
 
         self.month_combo = QComboBox()
-        if not self.summary_df.empty and {
-            DataFrameColumn.MONTH.value,
-            DataFrameColumn.MONTH_NL.value,
-        }.issubset(set(self.summary_df.columns)):
-            months = (
-                self.summary_df.drop_duplicates(DataFrameColumn.MONTH.value)[
-                    [DataFrameColumn.MONTH.value, DataFrameColumn.MONTH_NL.value]
-                ]
-                .sort_values(DataFrameColumn.MONTH.value)
-                .reset_index(drop=True)
-            )
-        else:
-            months = pd.DataFrame(
-                columns=[DataFrameColumn.MONTH.value, DataFrameColumn.MONTH_NL.value],
-            )
-
-        self.months_df = months
-        self.month_combo.addItem(constants.MonthFilter.ALL.value)
-        for m in months[DataFrameColumn.MONTH_NL.value]:
-            self.month_combo.addItem(m)
+        self._refresh_month_filter()
         self.month_combo.currentTextChanged.connect(self.on_month_changed)
         layout.addWidget(self.month_combo)
 
@@ -122,9 +134,44 @@ class FinanceApp(QWidget):
         self.import_button.clicked.connect(self.on_import_button_clicked)
         layout.addWidget(self.import_button)
 
+        self.import_progress = QProgressBar()
+        self.import_progress.setMaximumWidth(200)
+        self.import_status = QLabel()
+        self.cancel_import_button = QPushButton("Annuleer import")
+        self.cancel_import_button.clicked.connect(self.on_cancel_import_clicked)
+        for widget in self._import_widgets():
+            widget.hide()
+            layout.addWidget(widget)
+
         layout.addStretch()
         return layout
 
+    def _import_widgets(self):
+        return (self.import_progress, self.import_status, self.cancel_import_button)
+
+    # The months of the calendar dimension that have data
+    def _refresh_month_filter(self):
+        if DataFrameColumn.MONTH.value in self.summary_df.columns:
+            present = self.summary_df[DataFrameColumn.MONTH.value].unique()
+        else:
+            present = []
+        calendar = build_calendar(present)
+        months = calendar.loc[
+            calendar[DataFrameColumn.MONTH.value].isin(present),
+            [DataFrameColumn.MONTH.value, DataFrameColumn.MONTH_NL.value],
+        ].reset_index(drop=True)
+
+        self.months_df = months
+        selected = self.month_combo.currentText()
+        self.month_combo.blockSignals(True)
+        self.month_combo.clear()
+        self.month_combo.addItem(constants.MonthFilter.ALL.value)
+        for m in months[DataFrameColumn.MONTH_NL.value]:
+            self.month_combo.addItem(m)
+        if selected:
+            self.month_combo.setCurrentText(selected)
+        self.month_combo.blockSignals(False)
+
     def _init_tabs(self):
         self.top_tabs = QTabWidget()
         self.tegenpartij_netto_tab = TegenpartijNettoTab(app=self)
@@ -148,6 +195,7 @@ class FinanceApp(QWidget):
         self.tijdlijn_tab = TijdlijnChartTab(app=self)
         self.label_tegenpartij_tab = LabelTegenpartijTab(app=self)
         self.labels_editor_tab = LabelsEditorTab(app=self)
+        self.recurring_tab = TerugkerendTab(app=self)
         self.label_details_viewer = LabelDetailsViewer(app=self)
 
         self.main_tabs_map = [
@@ -157,6 +205,7 @@ class FinanceApp(QWidget):
             self.tijdlijn_tab,
             self.label_tegenpartij_tab,
             self.labels_editor_tab,
+            self.recurring_tab,
         ]
 
         self.main_tabs.addTab(self.tegenpartij_chart_tab, "Per Tegenpartij")
@@ -165,6 +214,7 @@ class FinanceApp(QWidget):
         self.main_tabs.addTab(self.tijdlijn_tab, "Tijdlijn")
         self.main_tabs.addTab(self.label_tegenpartij_tab, "Tegenpartijen per Label")
         self.main_tabs.addTab(self.labels_editor_tab, "Label Editor")
+        self.main_tabs.addTab(self.recurring_tab, "Terugkerend")
 
         self.top_tabs.currentChanged.connect(self._on_top_tab_changed)
         self.main_tabs.currentChanged.connect(self._on_main_tab_changed)
@@ -172,6 +222,16 @@ class FinanceApp(QWidget):
         for tab in self.top_tabs_map + self.main_tabs_map:
             tab.dirty = False
 
+    # Maand value of the month filter, None when all months are selected
+    def selected_month(self):
+        selected = self.month_combo.currentText()
+        if selected == constants.MonthFilter.ALL.value:
+            return None
+        return self.months_df.loc[
+            self.months_df[DataFrameColumn.MONTH_NL.value] == selected,
+            DataFrameColumn.MONTH.value,
+        ].iloc[0]
+
     def get_filtered_by_selected_month(self):
         selected = self.month_combo.currentText()
         if selected == constants.MonthFilter.ALL.value:
@@ -190,16 +250,11 @@ class FinanceApp(QWidget):
 
     def update_all_views(self):
         filtered_df, selected_month = self.get_filtered_by_selected_month()
-        isAlleSelected = selected_month == constants.MonthFilter.ALL.value
 
         for i, tab in enumerate(self.top_tabs_map):
             if i == self.top_tabs.currentIndex():
                 tab.dirty = False
-                (
-                    tab.update(filtered_df, isAlleSelected)
-                    if tab is self.maand_netto_tab
-                    else tab.update(filtered_df)
-                )
+                tab.update(self.selected_month())
             else:
                 tab.dirty = True
 
@@ -214,23 +269,63 @@ class FinanceApp(QWidget):
                     tab, "current_label", None,
                 ):
                     tab.update_for_label(tab.current_label)
-                elif tab is self.labels_editor_tab:
+                elif tab is self.labels_editor_tab or tab is self.recurring_tab:
                     tab.populate()
             else:
                 tab.dirty = True
 
+    # A rule labels every counterparty without a label of its own that it
+    # matches, so after a rule change the summary and backend are rebuilt
+    def apply_rule_changes(self):
+        summary_df = rebuild_summary(self.df)
+        self.summary_df, self.analysis = (
+            summary_df,
+            select_backend(summary_df, len(self.df), self.analysis_cache),
+        )
+        self.update_all_views()
+
+    # Brings the views up to date after label changes (analysis.LabelChange).
+    # Tables recompute only the groups of the changed labels and
+    # counterparties; views the changes do not touch are left alone.
+    def apply_label_changes(self, changes):
+        if not changes:
+            return
+        self.analysis.apply_label_changes(changes)
+        if len(changes) > MAX_TARGETED_LABEL_CHANGES:
+            self.update_all_views()
+            return
+        month = self.selected_month()
+        for tab in (self.label_netto_tab, self.tegenpartij_netto_tab):
+            if tab.dirty:
+                continue
+            if tab.model.getDataFrame().empty:
+                tab.update(month)
+            else:
+                tab.apply_label_changes(changes, month)
+
+        self._apply_label_changes_to_charts(changes)
+
+    def _apply_label_changes_to_charts(self, changes):
+        labels = changed_labels(changes)
+        current = self.main_tabs.currentWidget()
+        affected = [self.label_tab, self.monthly_tab]
+        if self.label_tegenpartij_tab.current_label in labels:
+            affected.append(self.label_tegenpartij_tab)
+        for tab in affected:
+            if tab is not current:
+                tab.dirty = True
+            elif tab is self.label_tab:
+                tab.update_plot(*self.get_filtered_by_selected_month())
+            elif tab is self.monthly_tab:
+                tab.apply_label_changes(changes)
+            else:
+                tab.update_for_label(tab.current_label)
+
     def _on_top_tab_changed(self, index):
-        filtered_df, selected_month = self.get_filtered_by_selected_month()
         if 0 <= index < len(self.top_tabs_map):
             tab = self.top_tabs_map[index]
             if getattr(tab, "dirty", False):
-                (
-                    tab.update(
-                        filtered_df, selected_month == constants.MonthFilter.ALL.value,
-                    )
-                    if tab is self.maand_netto_tab
-                    else tab.update(filtered_df)
-                )
+                tab.update(self.selected_month())
                 tab.dirty = False
 
     def _on_main_tab_changed(self, index):
@@ -246,7 +341,7 @@ class FinanceApp(QWidget):
                     tab, "current_label", None,
                 ):
                     tab.update_for_label(tab.current_label)
-                elif tab is self.labels_editor_tab:
+                elif tab is self.labels_editor_tab or tab is self.recurring_tab:
                     tab.populate()
                 tab.dirty = False
 
@@ -308,9 +403,13 @@ class FinanceApp(QWidget):
             source_index = index
             source_model = view_model
         value = source_model._df.iloc[source_index.row()][index_name]
-        filtered_df = self.summary_df[self.summary_df[index_name] == value].copy()
-        monthly = summarize_monthly_totals_by_label(filtered_df)
-        avg = filtered_df[DataFrameColumn.NETTO.value].mean()
+        filtered_df = self.summary_df[self.summary_df[index_name] == value]
+        monthly = (
+            self.analysis.monthly_totals_by_label(counterparty=value)
+            if index_name == DataFrameColumn.COUNTERPARTY.value
+            else self.analysis.monthly_totals_by_label(label=value)
+        )
+        avg = cents_to_euros(filtered_df[DataFrameColumn.NETTO.value].mean())
         fig = plot_time_line(
             monthly, title=f"Tijdlijn voor: {value} - Gemiddeld: {avg:.2f} per maand",
         )
@@ -319,6 +418,30 @@ class FinanceApp(QWidget):
         self.tijdlijn_tab.info_label.setText("")
         self.tijdlijn_tab.info_label.hide()
 
+    # Built on the first drilldown after each import
+    @property
+    def transaction_index(self):
+        index = self._transaction_index
+        if index is None or index.df is not self.df:
+            index = self._transaction_index = TransactionIndex(self.df)
+        return index
+
+    # Opens the transactions of the counterparties in the selected month
+    def show_transactions(self, title, counterparties):
+        month = self.selected_month()
+        if month is not None:
+            title += f" ({self.month_combo.currentText()})"
+        transactions = self.transaction_index.rows(counterparties, month)
+        win = TransactionsWindow(title, transactions, parent=self)
+        win.show()
+
+    def show_transactions_for_label(self, label):
+        labelled = self.summary_df[self.summary_df[DataFrameColumn.LABEL.value] == label]
+        self.show_transactions(
+            f"Label '{label}'",
+            labelled[DataFrameColumn.COUNTERPARTY.value].unique(),
+        )
+
     def on_import_button_clicked(self):
         start_dir = (
             settings.DATA_DIR
@@ -350,17 +473,114 @@ class FinanceApp(QWidget):
             self._handle_import_files(csvs)
 
     def _handle_import_files(self, file_paths: list[str]):
-        try:
-            self.df, self.summary_df, import_messages = import_files(
-                self.df if not self.df.empty else None, file_paths, copy_files=True,
+        if self._import_thread is not None:
+            self._queued_imports.append(list(file_paths))
+            return
+        self._start_import(file_paths, copy_files=True, interactive=True)
+
+    def _refresh_after_import(self):
+        self._refresh_month_filter()
+        if self.summary_df.empty:
+            self.no_data_label.show()
+        else:
+            self.no_data_label.hide()
+        self.update_all_views()
+
+    def _on_data_files_changed(self, file_paths):
+        if self._import_thread is not None:
+            self._pending_watch_paths.update(file_paths)
+            return
+        self._start_import(file_paths, copy_files=False, interactive=False)
+
+    # Imports run on a worker thread. Interactive imports (button or drop)
+    # report their result in a dialog; imports started by the data dir
+    # watcher only update the views.
+    def _start_import(self, file_paths, copy_files, interactive):
+        existing_df = self.df if not self.df.empty else None
+        worker = ImportWorker(
+            existing_df,
+            file_paths,
+            copy_files=copy_files,
+            fingerprints=self.fingerprints,
+        )
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self._on_import_progress)
+        worker.finished.connect(self._on_import_finished)
+        worker.failed.connect(self._on_import_failed)
+        worker.cancelled.connect(self._on_import_cancelled)
+        for signal in (worker.finished, worker.failed, worker.cancelled):
+            signal.connect(thread.quit)
+        thread.finished.connect(self._on_import_thread_finished)
+        self._import_thread = thread
+        self._import_worker = worker
+        self._import_interactive = interactive
+
+        self.import_progress.setRange(0, len(worker.file_paths))
+        self.import_progress.setValue(0)
+        self.import_status.setText("Importeren...")
+        self.cancel_import_button.setEnabled(True)
+        for widget in self._import_widgets():
+            widget.show()
+        thread.start()
+
+    def on_cancel_import_clicked(self):
+        if self._import_worker is not None:
+            self._import_worker.cancel()
+            self.cancel_import_button.setEnabled(False)
+            self.import_status.setText("Annuleren...")
+
+    def _on_import_progress(self, done, total, name, rows):
+        self.import_progress.setValue(done)
+        self.import_status.setText(f"{name}: {rows} regels ({done}/{total})")
+
+    def _on_import_finished(self, df, messages):
+        existing_df = self._import_worker.existing_df
+        if len(df) != (0 if existing_df is None else len(existing_df)):
+            summary_df = summary_after_import(existing_df, self.summary_df, df)
+            # Swapped together, so no view ever sees a df without its summary
+            self.df, self.summary_df, self.analysis = (
+                df,
+                summary_df,
+                select_backend(summary_df, len(df), self.analysis_cache),
             )
-            self.update_all_views()
-            if import_messages:
-                QMessageBox.information(
-                    self, "Import resultaat", "\n".join(import_messages),
-                )
-        except Exception as e:
-            QMessageBox.critical(self, "Import fout", str(e))
+            self._refresh_after_import()
+        if self._import_interactive and messages:
+            QMessageBox.information(self, "Import resultaat", "\n".join(messages))
+
+    def _on_import_failed(self, message):
+        self.fingerprints = fingerprint_index(self.df)
+        if self._import_interactive:
+            QMessageBox.critical(self, "Import fout", message)
+
+    def _on_import_cancelled(self):
+        if self._import_interactive:
+            QMessageBox.information(
+                self, "Import resultaat", "Import geannuleerd, er is niets gewijzigd.",
+            )
+
+    def _on_import_thread_finished(self):
+        self._import_thread.deleteLater()
+        self._import_worker.deleteLater()
+        self._import_thread = None
+        self._import_worker = None
+        for widget in self._import_widgets():
+            widget.hide()
+
+        if self._queued_imports:
+            self._handle_import_files(self._queued_imports.pop(0))
+        if self._pending_watch_paths and self._import_thread is None:
+            paths = sorted(self._pending_watch_paths)
+            self._pending_watch_paths.clear()
+            self._start_import(paths, copy_files=False, interactive=False)
+
+    def closeEvent(self, event):
+        if self._import_thread is not None:
+            self._import_worker.cancel()
+            self._import_thread.wait()
+        close_stores()
+        super().closeEvent(event)
 
     def toggle_theme(self):
         new_theme = "dark" if settings.UI_THEME == "light" else "light"
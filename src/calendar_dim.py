@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DataFrameColumn
+from utils import format_month
+
+MONTH = DataFrameColumn.MONTH.value
+MONTH_NL = DataFrameColumn.MONTH_NL.value
+YEAR = "Jaar"
+QUARTER = "Kwartaal"
+# Months since year 0, so consecutive months have consecutive keys
+SORT_KEY = "Volgorde"
+
+CALENDAR_COLUMNS = [MONTH, MONTH_NL, YEAR, QUARTER, SORT_KEY]
+
+
+@lru_cache(maxsize=16)
+def _calendar(first, last):
+    periods = pd.period_range(first, last, freq="M")
+    return pd.DataFrame(
+        {
+            MONTH: pd.array(periods.strftime("%Y-%m"), dtype="str"),
+            MONTH_NL: pd.array(
+                [format_month(p) for p in periods.strftime("%Y-%m")], dtype="str",
+            ),
+            YEAR: periods.year.to_numpy(dtype=np.int64),
+            QUARTER: periods.quarter.to_numpy(dtype=np.int64),
+            SORT_KEY: (periods.year * 12 + periods.month - 1).to_numpy(dtype=np.int64),
+        },
+    )
+
+
+# The calendar dimension: one row per month from the first to the last of
+# months (Maand values such as "2026-01"), in order. Tables for the same
+# range are built once and shared, so they must not be modified.
+def build_calendar(months):
+    months = pd.Series(months, dtype="str").dropna()
+    if months.empty:
+        return pd.DataFrame(
+            {
+                MONTH: pd.array([], dtype="str"),
+                MONTH_NL: pd.array([], dtype="str"),
+                YEAR: np.array([], dtype=np.int64),
+                QUARTER: np.array([], dtype=np.int64),
+                SORT_KEY: np.array([], dtype=np.int64),
+            },
+        )
+    return _calendar(months.min(), months.max())
+
+
+# Row of each month in calendar; -1 for a missing month or one outside it
+def month_codes(months, calendar):
+    return pd.Index(calendar[MONTH]).get_indexer(months)
+
+
+# The calendar column for every value of the months Series, looked up by
+# code instead of computed per row. Missing months and months outside
+# calendar get NA.
+def calendar_column(months, column, calendar=None):
+    if calendar is None:
+        calendar = build_calendar(months.dropna().unique())
+    values = pd.Series(calendar[column].to_numpy(), dtype=calendar[column].dtype)
+    codes = month_codes(months, calendar)
+    return values.reindex(codes).set_axis(months.index)
+
+
+def month_names(months, calendar=None):
+    return calendar_column(months, MONTH_NL, calendar)
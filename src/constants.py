@@ -1,5 +1,23 @@
 from enum import Enum
 
+# Amounts are stored as integer cents and only converted to euros for display
+CENTS_PER_EURO = 100
+
+DUTCH_MONTHS = (
+    "januari",
+    "februari",
+    "maart",
+    "april",
+    "mei",
+    "juni",
+    "juli",
+    "augustus",
+    "september",
+    "oktober",
+    "november",
+    "december",
+)
+
 
 class MonthFilter(Enum):
     ALL = "Alle maanden"
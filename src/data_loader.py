@@ -1,18 +1,31 @@
+import codecs
+import csv
+import hashlib
+import json
 import os
-import re
 import shutil
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from enum import Enum
+from functools import lru_cache
 from glob import glob
 from pathlib import Path
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
 import settings
-from constants import Label
-from settings import IGNORED_ACCOUNT_NAMES
-from utils import format_zakelijk
+from constants import CENTS_PER_EURO, Label
+from fingerprint import FingerprintIndex
+from utils import file_hash, format_zakelijk
 
 CSV_GLOB = "*.csv"
+# Bytes read from the start of a file to determine its encoding and format
+SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = (",", ";", "\t")
+# Below this many bytes in total, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+CANCEL_POLL_SECONDS = 0.2
 
 
 class DataFrameColumn(str, Enum):
@@ -30,6 +43,12 @@ class DataFrameColumn(str, Enum):
     INCOME = "Inkomsten"
     EXPENSE = "Uitgaven"
     NETTO = "Netto"
+    COUNT = "Aantal"
+    POSITIVE_COUNT = "Positief"
+    NEGATIVE_COUNT = "Negatief"
+    PREVIOUS_AMOUNT = "Vorig bedrag"
+    YEARLY_AMOUNT = "Per jaar"
+    FINGERPRINT = "fingerprint"
 
 
 BANK_CONFIGS = {
@@ -83,18 +102,144 @@ def load_csvs(directory):
     return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
 
 
-def _read_single_file(path):
-    encodings = ("utf-8", "latin1")
-    last_exc = None
-    for enc in encodings:
+class CsvFormat(NamedTuple):
+    encoding: str
+    delimiter: str
+    bank: str
+
+
+def _decode_head(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", head[len(codecs.BOM_UTF8) :].decode("utf-8", "ignore")
+    try:
+        # Incremental decoding tolerates a multi-byte character cut off at the end
+        return "utf-8", codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return "latin1", head.decode("latin1")
+
+
+def sniff_csv(path):
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    encoding, text = _decode_head(head)
+    header_line = text.splitlines()[0] if text else ""
+    delimiter = max(CSV_DELIMITERS, key=header_line.count)
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    bank = _bank_for_header(frozenset(col.strip() for col in header))
+    return CsvFormat(encoding, delimiter, bank)
+
+
+def _read_csv_kwargs(fmt):
+    kwargs = {"sep": fmt.delimiter, "dtype": str, "encoding": fmt.encoding}
+    if fmt.bank != "UNKNOWN":
+        wanted = set(BANK_CONFIGS[fmt.bank]["rename_map"])
+        kwargs["usecols"] = lambda col: col.strip() in wanted
+    return kwargs
+
+
+def _read_single_file(path, fmt=None):
+    if fmt is None:
+        fmt = sniff_csv(path)
+    try:
+        df = pd.read_csv(path, **_read_csv_kwargs(fmt))
+    except UnicodeDecodeError:
+        # Non-UTF-8 bytes past the sniffed part of the file
+        df = pd.read_csv(path, **_read_csv_kwargs(fmt._replace(encoding="latin1")))
+    return df.rename(columns=str.strip)
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def _check_cancelled(cancelled):
+    if cancelled is not None and cancelled():
+        raise ImportCancelled("Import geannuleerd")
+
+
+def _report_progress(progress, path, result):
+    if progress is not None:
+        progress(path, len(result) if isinstance(result, pd.DataFrame) else 0)
+
+
+def read_and_clean_file(path, cancelled=None):
+    fmt = sniff_csv(path)
+    if fmt.bank == "UNKNOWN":
+        raise ValueError("Unsupported bank format detected.")
+    if os.path.getsize(path) >= settings.STREAM_THRESHOLD_BYTES:
+        return stream_clean_file(path, fmt=fmt, cancelled=cancelled)
+    return clean_transactions(_read_single_file(path, fmt))
+
+
+def _read_and_clean_or_error(path, cancelled=None):
+    try:
+        return read_and_clean_file(path, cancelled)
+    except ImportCancelled:
+        raise
+    except Exception as e:
+        return e
+
+
+def _total_size(paths):
+    total = 0
+    for p in paths:
         try:
-            return pd.read_csv(path, sep=",", dtype=str, encoding=enc).rename(
-                columns=str.strip,
-            )
-        except Exception as e:
-            last_exc = e
+            total += os.path.getsize(p)
+        except OSError:
             continue
-    raise last_exc
+    return total
+
+
+def _read_serial(paths, progress, cancelled):
+    results = []
+    for p in paths:
+        _check_cancelled(cancelled)
+        results.append(_read_and_clean_or_error(p, cancelled))
+        _report_progress(progress, p, results[-1])
+    return results
+
+
+def _read_parallel(paths, workers, progress, cancelled):
+    results = [None] * len(paths)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {
+            pool.submit(_read_and_clean_or_error, p): i for i, p in enumerate(paths)
+        }
+        while pending:
+            # Wake up regularly so a cancel does not wait for the slowest file
+            done, _ = wait(
+                pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                i = pending.pop(future)
+                results[i] = future.result()
+                _report_progress(progress, paths[i], results[i])
+            _check_cancelled(cancelled)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+# Returns one cleaned frame or the raised exception per path, in input order.
+# progress(path, rows) is called as each file finishes; ImportCancelled is
+# raised once cancelled() returns True.
+def read_and_clean_files(paths, workers=None, progress=None, cancelled=None):
+    paths = list(paths)
+    if workers is None:
+        workers = settings.IMPORT_WORKERS
+    workers = min(workers, len(paths))
+    if workers <= 1 or _total_size(paths) < PARALLEL_MIN_BYTES:
+        return _read_serial(paths, progress, cancelled)
+    return _read_parallel(paths, workers, progress, cancelled)
+
+
+def combine_transactions(frames):
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return df[~df[DataFrameColumn.FINGERPRINT.value].duplicated()]
 
 
 def _copy_into_data_dir(src_paths, dest_dir=None):
@@ -121,102 +266,187 @@ def _copy_into_data_dir(src_paths, dest_dir=None):
     return out_paths
 
 
-def import_and_merge(existing_df, file_paths, copy_files=True):
+# Splits off files whose content is already in the manifest, or that appear
+# twice in the same batch. Returns the remaining paths and their hashes.
+def _skip_known_files(file_paths, manifest, import_messages):
+    remaining = []
+    digests = {}
+    for path in file_paths:
+        try:
+            digest = file_hash(path)
+        except OSError:
+            remaining.append(path)
+            continue
+        if digest in manifest or digest in digests.values():
+            import_messages.append(
+                f"overgeslagen {os.path.basename(path)}: bestand is al eerder geïmporteerd",
+            )
+            continue
+        remaining.append(path)
+        digests[path] = digest
+    return remaining, digests
+
+
+def _remove_copies(file_paths, read_paths):
+    for orig_path, p in zip(file_paths, read_paths, strict=True):
+        if p != orig_path and os.path.exists(p):
+            os.remove(p)
+
+
+# Where an import reads through and writes to besides the returned frame.
+# workers, progress and cancelled are passed on to read_and_clean_files;
+# cache, manifest and store are skipped when None.
+class ImportOptions(NamedTuple):
+    workers: int | None = None
+    cache: object = None
+    manifest: object = None
+    store: object = None
+    progress: object = None
+    cancelled: object = None
+
+
+def _paths_to_read(file_paths, copy_files):
+    if not copy_files:
+        return list(file_paths)
+    try:
+        return _copy_into_data_dir(file_paths, settings.DATA_DIR)
+    except Exception:
+        return list(file_paths)
+
+
+def _read_for_import(file_paths, read_paths, options):
+    load = options.cache.load if options.cache is not None else read_and_clean_files
+    try:
+        return load(
+            read_paths,
+            workers=options.workers,
+            progress=options.progress,
+            cancelled=options.cancelled,
+        )
+    except ImportCancelled:
+        _remove_copies(file_paths, read_paths)
+        raise
+
+
+# Rows of cleaned not yet in fingerprints, which are added to fingerprints
+# and written to store
+def _add_new_rows(cleaned, fingerprints, store):
+    keys = cleaned[DataFrameColumn.FINGERPRINT.value].to_numpy()
+    is_new = ~fingerprints.contains(keys)
+    new_rows = cleaned[is_new]
+    fingerprints.add(keys[is_new])
+    if store is not None:
+        store.add(new_rows)
+    return new_rows
+
+
+def _merged(existing_df, frames):
+    if not frames:
+        return existing_df if existing_df is not None else pd.DataFrame()
+    cleaned = pd.concat(frames, ignore_index=True)
+    if existing_df is None or existing_df.empty:
+        return cleaned
+    return pd.concat([existing_df, cleaned], ignore_index=True)
+
+
+# Returns tuple of (transactions_df, import_messages). A cancelled import
+# leaves existing_df, fingerprints and the manifest untouched and removes
+# the files it copied into the data dir.
+def import_and_merge(
+    existing_df, file_paths, copy_files=True, fingerprints=None, options=None,
+):
+    if options is None:
+        options = ImportOptions()
+    import_messages = []
+    digests = {}
+    if options.manifest is not None:
+        file_paths, digests = _skip_known_files(
+            file_paths, options.manifest, import_messages,
+        )
     if not file_paths:
-        return (existing_df if existing_df is not None else pd.DataFrame(), [])
+        return _merged(existing_df, []), import_messages
 
-    read_paths = list(file_paths)
-    if copy_files:
-        try:
-            read_paths = _copy_into_data_dir(file_paths, settings.DATA_DIR)
-        except Exception:
-            read_paths = list(file_paths)
+    read_paths = _paths_to_read(file_paths, copy_files)
+    if fingerprints is None:
+        fingerprints = fingerprint_index(existing_df)
+    results = _read_for_import(file_paths, read_paths, options)
 
     cleaned_frames: list[pd.DataFrame] = []
-    import_messages = []
-    for orig_path, p in zip(file_paths, read_paths):
-        try:
-            df_raw = _read_single_file(p)
-            cleaned = clean_transactions(df_raw)
-            if not cleaned.empty:
-                if existing_df is not None and not existing_df.empty:
-                    cleaned = cleaned.merge(
-                        existing_df[
-                            [
-                                DataFrameColumn.DATE.value,
-                                DataFrameColumn.AMOUNT.value,
-                                DataFrameColumn.COUNTERPARTY.value,
-                            ]
-                        ],
-                        on=[
-                            DataFrameColumn.DATE.value,
-                            DataFrameColumn.AMOUNT.value,
-                            DataFrameColumn.COUNTERPARTY.value,
-                        ],
-                        how="left",
-                        indicator=True,
-                    )
-                    cleaned = cleaned[cleaned["_merge"] == "left_only"]
-                    cleaned = cleaned.drop(columns=["_merge"])
-                    added = len(cleaned)
-                else:
-                    added = len(cleaned)
-                cleaned_frames.append(cleaned)
-                import_messages.append(
-                    f"geïmporteerd {os.path.basename(orig_path)}: {added} nieuwe regels toegevoegd",
-                )
-            else:
-                import_messages.append(
-                    f"geïmporteerd {os.path.basename(orig_path)}: 0 regels toegevoegd (geen geldige data)",
-                )
-        except Exception as e:
+    manifest_entries = []
+    for orig_path, p, cleaned in zip(file_paths, read_paths, results, strict=True):
+        name = os.path.basename(orig_path)
+        if isinstance(cleaned, Exception):
+            import_messages.append(f"geïmporteerd {name} mislukt: {str(cleaned)}")
+            continue
+        if orig_path in digests:
+            manifest_entries.append(
+                (
+                    digests[orig_path],
+                    os.path.basename(p),
+                    sniff_csv(p).bank,
+                    len(cleaned),
+                ),
+            )
+        if cleaned.empty:
             import_messages.append(
-                f"geïmporteerd {os.path.basename(orig_path)} mislukt: {str(e)}",
+                f"geïmporteerd {name}: 0 regels toegevoegd (geen geldige data)",
             )
             continue
-
-    if not cleaned_frames:
-        return (
-            existing_df if existing_df is not None else pd.DataFrame(),
-            import_messages,
+        new_rows = _add_new_rows(cleaned, fingerprints, options.store)
+        cleaned_frames.append(new_rows)
+        import_messages.append(
+            f"geïmporteerd {name}: {len(new_rows)} nieuwe regels toegevoegd",
         )
 
-    cleaned = pd.concat(cleaned_frames, ignore_index=True)
-    cleaned = cleaned.drop_duplicates(
-        subset=[
-            DataFrameColumn.DATE.value,
-            DataFrameColumn.AMOUNT.value,
-            DataFrameColumn.COUNTERPARTY.value,
-        ],
-    )
+    if manifest_entries:
+        options.manifest.record_many(manifest_entries)
+    return _merged(existing_df, cleaned_frames), import_messages
 
-    if existing_df is None or existing_df.empty:
-        return (cleaned, import_messages)
-
-    merged = pd.concat([existing_df, cleaned], ignore_index=True)
-    merged = merged.drop_duplicates(
-        subset=[
-            DataFrameColumn.DATE.value,
-            DataFrameColumn.AMOUNT.value,
-            DataFrameColumn.COUNTERPARTY.value,
-        ],
-    )
-    return (merged, import_messages)
 
+HEADER_SIGNATURES = [
+    (bank_name, frozenset(cfg["required_columns"]))
+    for bank_name, cfg in BANK_CONFIGS.items()
+]
 
-def detect_bank_format(df):
-    df_cols = set(df.columns)
-    for bank_name, cfg in BANK_CONFIGS.items():
-        if cfg["required_columns"].issubset(df_cols):
+
+@lru_cache(maxsize=64)
+def _bank_for_header(columns):
+    for bank_name, required in HEADER_SIGNATURES:
+        if required <= columns:
             return bank_name
     return "UNKNOWN"
 
 
+def detect_bank_format(df):
+    return _bank_for_header(frozenset(df.columns))
+
+
+# Sign, whole euros and an optional fraction after either decimal separator
+AMOUNT_PATTERN = r"^\s*([+-]?)\s*(\d*)(?:[.,](\d*))?\s*$"
+# A third decimal from this digit up rounds the cents up
+ROUND_HALF_DIGIT = 5
+
+
+# Parses amounts like "1234,56", "-12.5" or "+7" into nullable int64 cents,
+# rounding half up on the third decimal. Unparseable values become <NA>.
+def parse_amount_cents(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return (values * CENTS_PER_EURO).round().astype("Int64")
+
+    parts = values.str.extract(AMOUNT_PATTERN)
+    sign, whole, frac = parts[0], parts[1], parts[2].fillna("")
+    valid = (whole.str.len() > 0) | (frac.str.len() > 0)
+
+    whole_cents = pd.to_numeric(whole.where(whole.str.len() > 0, "0")) * 100
+    frac_milli = pd.to_numeric((frac + "000").str[:3])
+    cents = whole_cents + frac_milli // 10 + (frac_milli % 10 >= ROUND_HALF_DIGIT)
+    cents = cents.where(sign != "-", -cents)
+    return cents.where(valid).astype("Int64")
+
+
 def ing_amount_processor(df):
-    df[DataFrameColumn.AMOUNT.value] = (
-        df[DataFrameColumn.AMOUNT.value]
-        .str.replace(",", ".")
-        .astype(float, errors="ignore")
+    df[DataFrameColumn.AMOUNT.value] = parse_amount_cents(
+        df[DataFrameColumn.AMOUNT.value],
     )
     debit = df["debit_credit"].str.strip().str.lower() == "debit"
     df.loc[debit, DataFrameColumn.AMOUNT.value] *= -1
@@ -225,40 +455,47 @@ def ing_amount_processor(df):
 
 
 def default_amount_processor(df):
-    df[DataFrameColumn.AMOUNT.value] = (
-        df[DataFrameColumn.AMOUNT.value]
-        .str.replace(",", ".")
-        .astype(float, errors="ignore")
+    df[DataFrameColumn.AMOUNT.value] = parse_amount_cents(
+        df[DataFrameColumn.AMOUNT.value],
     )
     return df
 
 
-def filter_own_ibans(df):
+def filter_own_ibans(df, own_ibans=None):
     if (
         DataFrameColumn.IBAN.value in df.columns
         and DataFrameColumn.COUNTERPARTY_IBAN.value in df.columns
     ):
-        own_ibans = df[DataFrameColumn.IBAN.value].dropna().unique()
-        df = df[~df[DataFrameColumn.COUNTERPARTY_IBAN.value].isin(own_ibans)]
+        if own_ibans is None:
+            own_ibans = df[DataFrameColumn.IBAN.value].dropna().unique()
+        df = df[~df[DataFrameColumn.COUNTERPARTY_IBAN.value].isin(list(own_ibans))]
     return df
 
 
+# Digest of the settings that change what cleaning keeps, so frames cleaned
+# under other settings can be told apart
+def cleaning_digest():
+    names = json.dumps(sorted(settings.IGNORED_ACCOUNT_NAMES))
+    return hashlib.blake2b(names.encode("utf-8"), digest_size=8).hexdigest()
+
+
 def shared_cleaning(df, counterparty_col):
-    if IGNORED_ACCOUNT_NAMES:
-        pattern = "|".join(map(re.escape, IGNORED_ACCOUNT_NAMES))
-        df = df[~df[counterparty_col].str.contains(pattern, case=False, na=False)]
+    matcher = settings.IGNORED_ACCOUNT_MATCHER
+    if len(matcher):
+        df = df[~matcher.matches(df[counterparty_col])]
     return df
 
 
-def clean_transactions(df):
-    if df.empty:
-        return df
-
+def _bank_config(df):
     bank_type = detect_bank_format(df)
     if bank_type == "UNKNOWN":
         raise ValueError("Unsupported bank format detected.")
-    cfg = BANK_CONFIGS[bank_type]
+    return BANK_CONFIGS[bank_type]
+
 
+# Row-local cleaning steps, safe to run on any slice of a file. The account
+# IBANs seen are added to own_ibans so the caller can filter once at the end.
+def _clean_rows(df, cfg, own_ibans):
     df = df.rename(columns=cfg["rename_map"])
 
     if cfg["date_format"]:
@@ -280,28 +517,119 @@ def clean_transactions(df):
     ].fillna("Onbekend")
 
     df = df.dropna(subset=[DataFrameColumn.DATE.value, DataFrameColumn.AMOUNT.value])
-    df = filter_own_ibans(df)
+    df[DataFrameColumn.AMOUNT.value] = df[DataFrameColumn.AMOUNT.value].astype("int64")
+    if DataFrameColumn.IBAN.value in df.columns:
+        own_ibans.update(df[DataFrameColumn.IBAN.value].dropna().unique())
     df = shared_cleaning(df, DataFrameColumn.COUNTERPARTY.value)
 
     df[DataFrameColumn.MONTH.value] = df[DataFrameColumn.DATE.value].dt.to_period("M")
+    return df
 
-    return df.drop_duplicates(
-        subset=[
-            DataFrameColumn.DATE.value,
-            DataFrameColumn.AMOUNT.value,
-            DataFrameColumn.COUNTERPARTY.value,
-        ],
+
+def _finish_cleaning(df, own_ibans):
+    df = filter_own_ibans(df, own_ibans)
+    df[DataFrameColumn.FINGERPRINT.value] = transaction_fingerprints(df)
+    return df[~df[DataFrameColumn.FINGERPRINT.value].duplicated()]
+
+
+# Stable 64-bit key per transaction: date, amount and counterparty, plus the
+# counterparty IBAN where the export has one
+def transaction_fingerprints(df):
+    key = pd.DataFrame(
+        {
+            DataFrameColumn.DATE.value: df[DataFrameColumn.DATE.value].astype(
+                "datetime64[ns]",
+            ),
+            DataFrameColumn.AMOUNT.value: df[DataFrameColumn.AMOUNT.value],
+            DataFrameColumn.COUNTERPARTY.value: df[DataFrameColumn.COUNTERPARTY.value],
+            DataFrameColumn.COUNTERPARTY_IBAN.value: (
+                df[DataFrameColumn.COUNTERPARTY_IBAN.value].fillna("")
+                if DataFrameColumn.COUNTERPARTY_IBAN.value in df.columns
+                else ""
+            ),
+        },
+        index=df.index,
     )
+    return pd.util.hash_pandas_object(key, index=False).to_numpy(dtype=np.uint64)
 
 
-def merge_and_clean_labels(summary_df, label_df):
+def fingerprint_index(df):
+    if df is None or df.empty:
+        return FingerprintIndex()
+    if DataFrameColumn.FINGERPRINT.value in df.columns:
+        return FingerprintIndex(df[DataFrameColumn.FINGERPRINT.value].to_numpy())
+    return FingerprintIndex(transaction_fingerprints(df))
+
+
+def clean_transactions(df):
+    if df.empty:
+        return df
+
+    own_ibans = set()
+    df = _clean_rows(df, _bank_config(df), own_ibans)
+    return _finish_cleaning(df, own_ibans)
+
+
+def _stream_clean(path, fmt, chunk_rows, cancelled=None):
+    reader = pd.read_csv(path, chunksize=chunk_rows, **_read_csv_kwargs(fmt))
+    cfg = None
+    own_ibans = set()
+    frames = []
+    with reader:
+        for raw in reader:
+            _check_cancelled(cancelled)
+            chunk = raw.rename(columns=str.strip)
+            if cfg is None:
+                if chunk.empty:
+                    return chunk
+                cfg = _bank_config(chunk)
+            cleaned = _clean_rows(chunk, cfg, own_ibans)
+            if not cleaned.empty or not frames:
+                frames.append(cleaned)
+    if not frames:
+        return pd.DataFrame()
+    # Chunks keep their row numbers from the file, so the result is indexed
+    # exactly like clean_transactions on the fully loaded file
+    df = pd.concat(frames) if len(frames) > 1 else frames[0]
+    return _finish_cleaning(df, own_ibans)
+
+
+# Cleans a file chunk by chunk, so memory use is bounded by chunk_rows
+# instead of by the size of the export
+def stream_clean_file(path, chunk_rows=None, fmt=None, cancelled=None):
+    if chunk_rows is None:
+        chunk_rows = settings.IMPORT_CHUNK_ROWS
+    if fmt is None:
+        fmt = sniff_csv(path)
+    try:
+        return _stream_clean(path, fmt, chunk_rows, cancelled)
+    except UnicodeDecodeError:
+        return _stream_clean(
+            path, fmt._replace(encoding="latin1"), chunk_rows, cancelled,
+        )
+
+
+def _without_labels(rule_labels, label_df):
+    return rule_labels[
+        ~rule_labels[DataFrameColumn.COUNTERPARTY.value].isin(
+            label_df[DataFrameColumn.COUNTERPARTY.value],
+        )
+    ]
+
+
+def _clean_label(labels):
+    return labels.fillna("").str.strip().replace("", Label.GEEN.value)
+
+
+# rule_labels (see label_rules.RuleSet.resolve) label the counterparties that
+# have no row in label_df
+def merge_and_clean_labels(summary_df, label_df, rule_labels=None):
+    if rule_labels is not None and not rule_labels.empty:
+        label_df = pd.concat(
+            [label_df, _without_labels(rule_labels, label_df)], ignore_index=True,
+        )
     df = summary_df.merge(label_df, on=DataFrameColumn.COUNTERPARTY.value, how="left")
-    df[DataFrameColumn.LABEL.value] = (
-        df[DataFrameColumn.LABEL.value]
-        .fillna("")
-        .str.strip()
-        .replace("", Label.GEEN.value)
-    )
+    df[DataFrameColumn.LABEL.value] = _clean_label(df[DataFrameColumn.LABEL.value])
     df[DataFrameColumn.BUSINESS.value] = (
         df[DataFrameColumn.BUSINESS.value].fillna(False).astype(bool)
     )
@@ -309,3 +637,25 @@ def merge_and_clean_labels(summary_df, label_df):
         format_zakelijk,
     )
     return df
+
+
+# Sets the label and zakelijk columns of summary_df in place for the
+# counterparties in label_df, with one lookup per column instead of a mask
+# per counterparty. Other rows keep their labels.
+def apply_labels(summary_df, label_df):
+    labels = label_df.drop_duplicates(
+        DataFrameColumn.COUNTERPARTY.value, keep="last",
+    ).set_index(DataFrameColumn.COUNTERPARTY.value)
+    counterparties = summary_df[DataFrameColumn.COUNTERPARTY.value]
+    mask = counterparties.isin(labels.index)
+    if not mask.any():
+        return
+    matched = labels.reindex(counterparties[mask])
+    zakelijk = matched[DataFrameColumn.BUSINESS.value].astype(bool).to_numpy()
+    summary_df.loc[mask, DataFrameColumn.LABEL.value] = _clean_label(
+        matched[DataFrameColumn.LABEL.value],
+    ).to_numpy()
+    summary_df.loc[mask, DataFrameColumn.BUSINESS.value] = zakelijk
+    summary_df.loc[mask, DataFrameColumn.BUSINESS_NL.value] = [
+        format_zakelijk(z) for z in zakelijk
+    ]
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from PyQt6.QtCore import (
     QAbstractTableModel,
@@ -7,18 +8,65 @@ from PyQt6.QtCore import (
     QVariant,
 )
 
+from data_loader import DataFrameColumn
+from utils import cents_to_euros
+
+# Columns holding integer cents, shown as euros
+MONEY_COLUMNS = {
+    DataFrameColumn.AMOUNT.value,
+    DataFrameColumn.NETTO.value,
+    DataFrameColumn.INCOME.value,
+    DataFrameColumn.EXPENSE.value,
+    DataFrameColumn.PREVIOUS_AMOUNT.value,
+    DataFrameColumn.YEARLY_AMOUNT.value,
+}
+
 
 class DataFrameModel(QAbstractTableModel):
     def __init__(self, df=pd.DataFrame(), parent=None, editable: bool = False):
         super().__init__(parent)
         self._df = df.reset_index(drop=True)
         self._editable = editable
+        self._money_columns = self._find_money_columns()
+
+    def _find_money_columns(self):
+        return {
+            i for i, col in enumerate(self._df.columns) if col in MONEY_COLUMNS
+        }
 
     def setDataFrame(self, df):
         self.beginResetModel()
         self._df = df.reset_index(drop=True)
+        self._money_columns = self._find_money_columns()
         self.endResetModel()
 
+    # Replaces the rows whose key column value is in keys with the rows of
+    # update (one per key). Rows still present are changed in place, the
+    # others removed or appended, so views keep their selection and scroll.
+    def replaceRows(self, key, keys, update):
+        update = update[self._df.columns].set_index(key, drop=False)
+        positions = np.flatnonzero(self._df[key].isin(keys).to_numpy())
+        last_col = len(self._df.columns) - 1
+
+        for pos in positions[::-1]:
+            value = self._df.iat[pos, self._df.columns.get_loc(key)]
+            if value in update.index:
+                self._df.iloc[pos] = update.loc[value].to_numpy()
+                self.dataChanged.emit(self.index(pos, 0), self.index(pos, last_col))
+            else:
+                self.beginRemoveRows(QModelIndex(), pos, pos)
+                self._df = self._df.drop(index=pos).reset_index(drop=True)
+                self.endRemoveRows()
+
+        added = update[~update.index.isin(self._df[key])]
+        if not added.empty:
+            start = len(self._df)
+            self.beginInsertRows(QModelIndex(), start, start + len(added) - 1)
+            self._df = pd.concat(
+                [self._df, added.reset_index(drop=True)], ignore_index=True,
+            )
+            self.endInsertRows()
+
     def rowCount(self, parent=QModelIndex()):
         return len(self._df)
 
@@ -34,6 +82,10 @@ class DataFrameModel(QAbstractTableModel):
             return val
         if role == Qt.ItemDataRole.DisplayRole:
             val = self._df.iloc[index.row(), index.column()]
+            if index.column() in self._money_columns and isinstance(
+                val, (int, np.integer),
+            ):
+                return f"{cents_to_euros(val):,.2f}"
             if isinstance(val, float):
                 return f"{val:,.2f}"
             return str(val)
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+# Set of 64-bit transaction fingerprints, checked with one hash lookup per row
+# and grown as files are imported, so de-duplicating a new statement does not
+# depend on the size of the existing history.
+class FingerprintIndex:
+    def __init__(self, fingerprints=()):
+        self._keys = set(np.asarray(fingerprints, dtype=np.uint64).tolist())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, fingerprint):
+        return int(fingerprint) in self._keys
+
+    def contains(self, fingerprints):
+        keys = self._keys
+        values = np.asarray(fingerprints, dtype=np.uint64).tolist()
+        return np.fromiter((v in keys for v in values), dtype=bool, count=len(values))
+
+    def add(self, fingerprints):
+        self._keys.update(np.asarray(fingerprints, dtype=np.uint64).tolist())
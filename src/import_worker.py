@@ -0,0 +1,55 @@
+import os
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from data_loader import ImportCancelled, ImportOptions
+from importer import merge_files
+
+
+# Parses and merges files off the GUI thread. The summary is updated by the
+# receiver when the result arrives, against the summary it has at that time.
+class ImportWorker(QObject):
+    finished = pyqtSignal(object, list)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    # files done, files in total, file name, rows in that file
+    progress = pyqtSignal(int, int, str, int)
+
+    def __init__(self, existing_df, file_paths, copy_files, fingerprints):
+        super().__init__()
+        self.existing_df = existing_df
+        self.file_paths = list(file_paths)
+        self.copy_files = copy_files
+        self.fingerprints = fingerprints
+        self._cancel = threading.Event()
+        self._done = 0
+
+    # Safe to call from the GUI thread while run() is busy
+    def cancel(self):
+        self._cancel.set()
+
+    def _on_file_done(self, path, rows):
+        self._done += 1
+        self.progress.emit(
+            self._done, len(self.file_paths), os.path.basename(path), rows,
+        )
+
+    def run(self):
+        try:
+            df, messages = merge_files(
+                self.existing_df,
+                self.file_paths,
+                copy_files=self.copy_files,
+                fingerprints=self.fingerprints,
+                options=ImportOptions(
+                    progress=self._on_file_done, cancelled=self._cancel.is_set,
+                ),
+            )
+        except ImportCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(df, messages)
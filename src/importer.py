@@ -5,65 +5,227 @@ import pandas as pd
 
 import settings
 from analysis import summarize_by_counterparty_per_month
+from calendar_dim import month_names
+from constants import Label
 from data_loader import (
     DataFrameColumn,
-    clean_transactions,
+    ImportOptions,
+    apply_labels,
+    cleaning_digest,
+    fingerprint_index,
     import_and_merge,
-    load_csvs,
     merge_and_clean_labels,
+    sniff_csv,
 )
-from label_db import get_labels
-from utils import format_month
+from fingerprint import FingerprintIndex
+from label_db import ImportManifest, get_labels
+from label_rules import counterparty_profile, get_rule_set
+from transaction_cache import TransactionCache
+from transaction_store import TransactionStore
 
 
-# Returns tuple of (transactions_df, summary_df)
-def load_initial_data() -> tuple[pd.DataFrame, pd.DataFrame]:
+# Returns tuple of (transactions_df, summary_df, fingerprint_index). The
+# transactions come from the transaction store; only files in the data dir
+# that it does not hold yet are parsed.
+def load_initial_data() -> tuple[pd.DataFrame, pd.DataFrame, FingerprintIndex]:
     data_dir = settings.DATA_DIR
-    files = glob(os.path.join(data_dir, "*.csv")) if os.path.exists(data_dir) else []
-
-    if files:
-        try:
-            raw = load_csvs(data_dir)
-            df = clean_transactions(raw) if not raw.empty else pd.DataFrame()
-        except Exception:
-            try:
-                df = import_and_merge(None, files, copy_files=False)
-            except Exception:
-                df = pd.DataFrame()
+    files = (
+        sorted(glob(os.path.join(data_dir, "*.csv")))
+        if os.path.exists(data_dir)
+        else []
+    )
+
+    cache = TransactionCache(settings.CACHE_DIR)
+    store = TransactionStore()
+    _sync_store(files, cache, ImportManifest(), store)
+    cache.prune(files)
+    df = store.load()
+    return df, rebuild_summary(df), fingerprint_index(df)
+
+
+# The summary of df under the current labels and rules, built from scratch
+def rebuild_summary(df):
+    if df.empty:
+        return pd.DataFrame()
+    return build_summary(df, get_labels(), get_rule_set()).sort_values(
+        by=[DataFrameColumn.MONTH.value, DataFrameColumn.NETTO.value],
+        ascending=[True, False],
+    )
+
+
+# Brings the store and the import manifest in line with the data dir. Files
+# not in the manifest (e.g. copied there while the app was closed) are added.
+# When a file was removed or changed, or the files were cleaned under other
+# settings, the store is rebuilt from the files that are left, most of which
+# come from the parquet cache.
+def _sync_store(files, cache, manifest, store):
+    digests = {path: cache.digest(path) for path in files}
+    current = set(digests.values())
+    settings_digest = cleaning_digest()
+    stale = (
+        any(digest not in current for digest in manifest)
+        or manifest.cleaning_digest != settings_digest
+    )
+    manifest.retain(current)
+
+    if stale or (files and not len(store)):
+        store.clear()
+        to_parse = files
     else:
-        df = pd.DataFrame()
-
-    summary_df = pd.DataFrame()
-    if not df.empty:
-        summary_df = summarize_by_counterparty_per_month(df)
-        summary_df[DataFrameColumn.MONTH_NL.value] = summary_df[
-            DataFrameColumn.MONTH.value
-        ].apply(format_month)
-        summary_df = summary_df.sort_values(
-            by=[DataFrameColumn.MONTH.value, DataFrameColumn.NETTO.value],
-            ascending=[True, False],
-        )
-        summary_df = merge_and_clean_labels(summary_df, get_labels())
+        to_parse = [path for path in files if digests[path] not in manifest]
 
-    return df, summary_df
+    entries = []
+    for path, result in zip(to_parse, cache.load(to_parse), strict=True):
+        if not isinstance(result, pd.DataFrame):
+            continue
+        store.add(result)
+        if digests[path] not in manifest:
+            entries.append(
+                (
+                    digests[path],
+                    os.path.basename(path),
+                    sniff_csv(path).bank,
+                    len(result),
+                ),
+            )
+    if entries:
+        manifest.record_many(entries)
+    manifest.cleaning_digest = settings_digest
 
 
-# Returns tuple of (transactions_df, summary_df)
-def import_files(
-    existing_df, file_paths, copy_files=True,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    df, import_messages = import_and_merge(
-        existing_df if existing_df is not None and not existing_df.empty else None,
+# Counterparties without a label get the label of the first matching rule
+# in rules, a label_rules.RuleSet
+def build_summary(df, label_df, rules=None):
+    summary_df = summarize_by_counterparty_per_month(df)
+    summary_df[DataFrameColumn.MONTH_NL.value] = month_names(
+        summary_df[DataFrameColumn.MONTH.value],
+    )
+    rule_labels = rules.resolve(counterparty_profile(df)) if rules else None
+    return merge_and_clean_labels(summary_df, label_df, rule_labels)
+
+
+# The rule labels of the counterparties in new_rows without a label of
+# their own, with Geen label for those that no rule matches
+def _rule_label_updates(new_rows, label_df, rule_labels):
+    own = label_df[DataFrameColumn.COUNTERPARTY.value]
+    matched = rule_labels[
+        ~rule_labels[DataFrameColumn.COUNTERPARTY.value].isin(own)
+    ]
+    unmatched = (
+        pd.Index(new_rows[DataFrameColumn.COUNTERPARTY.value].dropna().unique())
+        .difference(own)
+        .difference(rule_labels[DataFrameColumn.COUNTERPARTY.value])
+    )
+    if unmatched.empty:
+        return matched
+    reset = pd.DataFrame(
+        {
+            DataFrameColumn.COUNTERPARTY.value: unmatched,
+            DataFrameColumn.LABEL.value: Label.GEEN.value,
+            DataFrameColumn.BUSINESS.value: False,
+        },
+    )
+    return pd.concat([matched, reset], ignore_index=True)
+
+
+# Adds newly imported transactions to an existing summary. Netto is a plain
+# sum, so (month, counterparty) groups that already exist only need the new
+# rows' total added; just the new groups get a month name and labels.
+# rule_labels are the rule labels of the counterparties in new_rows, over
+# their whole history; they replace those of the existing groups too, and
+# such counterparties without a label that no rule matches any more get
+# Geen label.
+def update_summary(summary_df, new_rows, label_df, rule_labels=None):
+    if new_rows.empty:
+        return summary_df
+    if summary_df.empty:
+        return build_summary(new_rows, label_df)
+
+    keys = [DataFrameColumn.MONTH.value, DataFrameColumn.COUNTERPARTY.value]
+    delta = summarize_by_counterparty_per_month(new_rows)
+    positions = pd.MultiIndex.from_frame(summary_df[keys]).get_indexer(
+        pd.MultiIndex.from_frame(delta[keys]),
+    )
+    touched = positions >= 0
+
+    summary_df = summary_df.copy()
+    if rule_labels is not None:
+        apply_labels(summary_df, _rule_label_updates(new_rows, label_df, rule_labels))
+    netto_col = summary_df.columns.get_loc(DataFrameColumn.NETTO.value)
+    summary_df.iloc[positions[touched], netto_col] = (
+        summary_df.iloc[positions[touched], netto_col].to_numpy()
+        + delta.loc[touched, DataFrameColumn.NETTO.value].to_numpy()
+    )
+
+    added = delta[~touched]
+    if added.empty:
+        return summary_df
+    added = added.assign(
+        **{
+            DataFrameColumn.MONTH_NL.value: month_names(
+                added[DataFrameColumn.MONTH.value],
+            ),
+        },
+    )
+    added = merge_and_clean_labels(added, label_df, rule_labels)
+    return pd.concat([summary_df, added[summary_df.columns]], ignore_index=True)
+
+
+# Returns tuple of (transactions_df, import_messages). Parsed files are kept in
+# the transaction cache, so files seen again (e.g. by the data dir watcher
+# after being copied there) are not parsed twice. Files whose content is in
+# the import manifest are skipped before parsing and not copied again. New
+# rows are written to the transaction store. Of options, only workers,
+# progress and cancelled are used; the cache, manifest and store are the
+# app's own.
+def merge_files(
+    existing_df, file_paths, copy_files=True, fingerprints=None, options=None,
+) -> tuple[pd.DataFrame, list[str]]:
+    if options is None:
+        options = ImportOptions()
+    return import_and_merge(
+        existing_df,
         file_paths,
         copy_files=copy_files,
+        fingerprints=fingerprints,
+        options=options._replace(
+            cache=TransactionCache(settings.CACHE_DIR),
+            manifest=ImportManifest(),
+            store=TransactionStore(),
+        ),
     )
 
-    summary_df = pd.DataFrame()
-    if not df.empty:
-        summary_df = summarize_by_counterparty_per_month(df)
-        summary_df[DataFrameColumn.MONTH_NL.value] = summary_df[
-            DataFrameColumn.MONTH.value
-        ].apply(format_month)
-        summary_df = merge_and_clean_labels(summary_df, get_labels())
 
-    return df, summary_df, import_messages
+# Returns the summary for df, the result of importing into existing_df
+def summary_after_import(existing_df, summary_df, df) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame()
+    rules = get_rule_set()
+    if summary_df is None or summary_df.empty or existing_df is None:
+        return build_summary(df, get_labels(), rules)
+    new_rows = df.iloc[len(existing_df) :]
+    if new_rows.empty:
+        return summary_df
+    rule_labels = None
+    if rules:
+        counterparties = new_rows[DataFrameColumn.COUNTERPARTY.value].unique()
+        rule_labels = rules.resolve(
+            counterparty_profile(
+                df[df[DataFrameColumn.COUNTERPARTY.value].isin(counterparties)],
+            ),
+        )
+    return update_summary(summary_df, new_rows, get_labels(), rule_labels)
+
+
+# Returns tuple of (transactions_df, summary_df, import_messages). A given
+# fingerprint index is updated in place with the imported rows, and a given
+# summary_df is updated incrementally instead of being rebuilt.
+def import_files(
+    existing_df, file_paths, copy_files=True, fingerprints=None, summary_df=None,
+) -> tuple[pd.DataFrame, pd.DataFrame, list[str]]:
+    if existing_df is not None and existing_df.empty:
+        existing_df = None
+    df, import_messages = merge_files(
+        existing_df, file_paths, copy_files=copy_files, fingerprints=fingerprints,
+    )
+    return df, summary_after_import(existing_df, summary_df, df), import_messages
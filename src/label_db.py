@@ -1,37 +1,373 @@
 import os
 import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
 
 import pandas as pd
 
 from settings import LABEL_DB
 
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL: a crash can lose the last commits, never corrupt the file
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-32000",
+    "PRAGMA busy_timeout=5000",
+)
+# sqlite3 keeps this many compiled statements per connection, keyed by their
+# SQL text, so the fixed queries below are only prepared once
+STATEMENT_CACHE_SIZE = 256
 
-def init_db():
-    os.makedirs("data", exist_ok=True)
-    with sqlite3.connect(LABEL_DB) as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS labels (
-                Tegenpartij TEXT PRIMARY KEY,
-                Label TEXT,
-                Zakelijk BOOLEAN
+SAVE_LABEL_SQL = """
+    INSERT INTO labels (Tegenpartij, Label, Zakelijk)
+    VALUES (?, ?, ?)
+    ON CONFLICT(Tegenpartij) DO UPDATE SET
+        Label=excluded.Label,
+        Zakelijk=excluded.Zakelijk
+"""
+GET_LABELS_SQL = "SELECT * FROM labels"
+RULE_COLUMNS = (
+    "Soort",
+    "Patroon",
+    "MinBedrag",
+    "MaxBedrag",
+    "Label",
+    "Zakelijk",
+    "Prioriteit",
+)
+ADD_RULE_SQL = f"""
+    INSERT INTO label_rules ({", ".join(RULE_COLUMNS)})
+    VALUES ({", ".join("?" * len(RULE_COLUMNS))})
+"""
+GET_RULES_SQL = "SELECT * FROM label_rules ORDER BY Id"
+GET_LABEL_CHANGES_SQL = "SELECT Aantal FROM label_changes"
+# Tables whose writes change labels; triggers count every write to them in
+# label_changes
+LABEL_TABLES = ("labels", "label_rules")
+
+
+# Connection of one thread other than the one that opened the LabelStore,
+# closed when that thread ends
+class _ThreadConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        weakref.finalize(self, conn.close)
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(
+        db_path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Long-lived connections to the label database. The thread that opens the
+# store (the GUI) shares one connection behind the lock, so its statements
+# never interleave; other threads, such as the import worker, each get a
+# connection of their own, so a long write there does not hold the lock and
+# WAL lets the GUI keep reading meanwhile.
+class LabelStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or LABEL_DB
+        self._lock = threading.RLock()
+        self._owner = threading.get_ident()
+        self._conn = _connect(self.db_path)
+        self._local = threading.local()
+        self._thread_connections = weakref.WeakSet()
+        # Bumped on every label or rule write, so readers can tell their copy
+        # is stale
+        self.version = 0
+        self._labels = None
+        self._label_map = None
+        self._rules = None
+        self._label_changes = None
+
+    @contextmanager
+    def _connection(self):
+        if threading.get_ident() == self._owner:
+            with self._lock:
+                yield self._conn
+            return
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _ThreadConnection(
+                _connect(self.db_path),
             )
-        """)
+            with self._lock:
+                self._thread_connections.add(connection)
+        yield connection.conn
+
+    def execute(self, sql, params=()):
+        with self._connection() as conn, conn:
+            return conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql, rows):
+        with self._connection() as conn, conn:
+            conn.executemany(sql, rows)
+
+    def read_frame(self, sql, params=()):
+        with self._connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def _invalidate_labels(self):
+        self.version += 1
+        self._labels = None
+        self._label_map = None
+        self._rules = None
+
+    def save_label(self, tegenpartij, label, zakelijk):
+        self.save_labels([(tegenpartij, label, zakelijk)])
+
+    # Runs a write to LABEL_TABLES and invalidates the cached labels. The
+    # change count is read in the same transaction, so the write is not
+    # taken for an external change afterwards.
+    def _write_labels(self, sql, rows):
+        with self._connection() as conn, conn:
+            conn.executemany(sql, rows)
+            label_changes = conn.execute(GET_LABEL_CHANGES_SQL).fetchone()[0]
+        with self._lock:
+            self._invalidate_labels()
+            self._label_changes = label_changes
+
+    # Writes (tegenpartij, label, zakelijk) rows in one transaction
+    def save_labels(self, rows):
+        self._write_labels(SAVE_LABEL_SQL, rows)
+
+    # Labels or rules written by another connection, e.g. a second instance
+    # of the app, show up as a new change count. Writes to other tables,
+    # such as imports into transactions, leave it alone.
+    def _check_external_changes(self):
+        label_changes = self._conn.execute(GET_LABEL_CHANGES_SQL).fetchone()[0]
+        if label_changes != self._label_changes:
+            if self._label_changes is not None:
+                self._invalidate_labels()
+            self._label_changes = label_changes
+
+    # The version after any writes by other connections
+    def current_version(self):
+        with self._lock:
+            self._check_external_changes()
+            return self.version
+
+    # The labels table, read once per version. The frame is shared between
+    # callers and must not be modified.
+    def get_labels(self):
+        with self._lock:
+            self._check_external_changes()
+            if self._labels is None:
+                self._labels = self.read_frame(GET_LABELS_SQL)
+            return self._labels
+
+    # Tegenpartij -> (label, zakelijk) of the cached labels
+    def get_label_map(self):
+        with self._lock:
+            labels = self.get_labels()
+            if self._label_map is None:
+                self._label_map = dict(
+                    zip(
+                        labels["Tegenpartij"],
+                        zip(labels["Label"], labels["Zakelijk"], strict=True),
+                        strict=True,
+                    ),
+                )
+            return self._label_map
+
+    # Adds label rules, rows in the order of RULE_COLUMNS, in one transaction
+    def add_rules(self, rows):
+        self._write_labels(ADD_RULE_SQL, rows)
+
+    def delete_rule(self, rule_id):
+        self._write_labels("DELETE FROM label_rules WHERE Id = ?", [(rule_id,)])
+
+    # The label_rules table, read once per version like get_labels
+    def get_rules(self):
+        with self._lock:
+            self._check_external_changes()
+            if self._rules is None:
+                self._rules = self.read_frame(GET_RULES_SQL)
+            return self._rules
+
+    def close(self):
+        with self._lock:
+            for connection in list(self._thread_connections):
+                connection.conn.close()
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+# Returns the shared LabelStore for db_path, opening it on first use
+def get_store(db_path=None):
+    db_path = db_path or LABEL_DB
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = LabelStore(db_path)
+        return store
+
+
+def close_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+def init_db(db_path=None):
+    os.makedirs("data", exist_ok=True)
+    store = get_store(db_path)
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS labels (
+            Tegenpartij TEXT PRIMARY KEY,
+            Label TEXT,
+            Zakelijk BOOLEAN
+        )
+    """)
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            Fingerprint INTEGER PRIMARY KEY,
+            Datum TEXT,
+            Maand TEXT,
+            Tegenpartij TEXT,
+            Iban TEXT,
+            IbanTegenpartij TEXT,
+            Bedrag INTEGER
+        )
+    """)
+    store.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_maand ON transactions (Maand)",
+    )
+    store.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_tegenpartij "
+        "ON transactions (Tegenpartij, Maand)",
+    )
+    store.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_iban ON transactions (Iban)",
+    )
+    # Labels for counterparties without a label of their own, see label_rules
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS label_rules (
+            Id INTEGER PRIMARY KEY,
+            Soort TEXT NOT NULL,
+            Patroon TEXT,
+            MinBedrag INTEGER,
+            MaxBedrag INTEGER,
+            Label TEXT,
+            Zakelijk BOOLEAN,
+            Prioriteit INTEGER DEFAULT 0
+        )
+    """)
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS imports (
+            Hash TEXT PRIMARY KEY,
+            Bestand TEXT,
+            Bank TEXT,
+            Regels INTEGER,
+            Geimporteerd TEXT
+        )
+    """)
+    # Number of writes to LABEL_TABLES, see LabelStore._check_external_changes
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS label_changes (
+            Id INTEGER PRIMARY KEY CHECK (Id = 1),
+            Aantal INTEGER NOT NULL
+        )
+    """)
+    store.execute("INSERT OR IGNORE INTO label_changes (Id, Aantal) VALUES (1, 0)")
+    for table in LABEL_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            store.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_count
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE label_changes SET Aantal = Aantal + 1;
+                END
+            """)
+    # Settings the imported transactions were cleaned with, see ImportManifest
+    store.execute("""
+        CREATE TABLE IF NOT EXISTS import_settings (
+            Naam TEXT PRIMARY KEY,
+            Waarde TEXT
+        )
+    """)
 
 
 def save_label(tegenpartij, label, zakelijk):
-    with sqlite3.connect(LABEL_DB) as conn:
-        conn.execute(
+    get_store().save_label(tegenpartij, label, zakelijk)
+
+
+def save_labels(rows):
+    get_store().save_labels(rows)
+
+
+def get_labels():
+    return get_store().get_labels()
+
+
+def get_label_map():
+    return get_store().get_label_map()
+
+
+# Content hashes of every statement file that was imported, with its bank
+# format, number of cleaned rows and import time
+class ImportManifest:
+    def __init__(self, db_path=None):
+        self.store = get_store(db_path)
+        self._hashes = {row[0] for row in self.store.execute("SELECT Hash FROM imports")}
+
+    def __contains__(self, file_hash):
+        return file_hash in self._hashes
+
+    # Digest of the cleaning settings of the imported files (see
+    # data_loader.cleaning_digest), None before the first import
+    @property
+    def cleaning_digest(self):
+        rows = self.store.execute(
+            "SELECT Waarde FROM import_settings WHERE Naam = 'cleaning'",
+        )
+        return rows[0][0] if rows else None
+
+    @cleaning_digest.setter
+    def cleaning_digest(self, digest):
+        self.store.execute(
+            "INSERT OR REPLACE INTO import_settings (Naam, Waarde) "
+            "VALUES ('cleaning', ?)",
+            (digest,),
+        )
+
+    def __iter__(self):
+        return iter(self._hashes)
+
+    def record(self, file_hash, filename, bank, rows):
+        self.record_many([(file_hash, filename, bank, rows)])
+
+    def record_many(self, entries):
+        now = datetime.now().isoformat(timespec="seconds")
+        self.store.executemany(
             """
-            INSERT INTO labels (Tegenpartij, Label, Zakelijk)
-            VALUES (?, ?, ?)
-            ON CONFLICT(Tegenpartij) DO UPDATE SET
-                Label=excluded.Label,
-                Zakelijk=excluded.Zakelijk
+            INSERT OR IGNORE INTO imports (Hash, Bestand, Bank, Regels, Geimporteerd)
+            VALUES (?, ?, ?, ?, ?)
         """,
-            (tegenpartij, label, zakelijk),
+            [(*entry, now) for entry in entries],
         )
+        self._hashes.update(entry[0] for entry in entries)
 
-
-def get_labels():
-    with sqlite3.connect(LABEL_DB) as conn:
-        return pd.read_sql_query("SELECT * FROM labels", conn)
+    # Forgets files that are no longer in the data dir, so they can be
+    # imported again
+    def retain(self, file_hashes):
+        stale = self._hashes - set(file_hashes)
+        if not stale:
+            return
+        self.store.executemany(
+            "DELETE FROM imports WHERE Hash = ?", [(h,) for h in stale],
+        )
+        self._hashes -= stale
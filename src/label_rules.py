@@ -0,0 +1,248 @@
+import re
+from enum import Enum
+from re import _parser
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DataFrameColumn
+from label_db import get_store
+from matcher import MultiPatternMatcher
+
+
+class RuleKind(str, Enum):
+    PREFIX = "begint_met"
+    CONTAINS = "bevat"
+    REGEX = "regex"
+    IBAN = "iban"
+    AMOUNT = "bedrag"
+
+
+def _normalize_iban(ibans):
+    return ibans.str.upper().str.replace(" ", "", regex=False)
+
+
+# Per counterparty the values that IBAN and amount rules match on: its
+# counterparty IBAN (the highest when it used several) and its average
+# transaction amount in cents
+def counterparty_profile(df):
+    return df.groupby(DataFrameColumn.COUNTERPARTY.value).agg(
+        **{
+            DataFrameColumn.COUNTERPARTY_IBAN.value: (
+                DataFrameColumn.COUNTERPARTY_IBAN.value,
+                "max",
+            ),
+            DataFrameColumn.AMOUNT.value: (DataFrameColumn.AMOUNT.value, "mean"),
+        },
+    )
+
+
+# The parsed items of a regex with its plain groups, (...) and (?:...)
+# without flags, opened up
+def _plain_items(parsed):
+    for op, arg in parsed:
+        if op is _parser.SUBPATTERN and not arg[1] and not arg[2]:
+            yield from _plain_items(arg[3])
+        else:
+            yield op, arg
+
+
+# The runs of plain characters, lowercased, that every match of pattern
+# contains. Empty when there are none, e.g. for a top-level alternation.
+def _required_literals(pattern):
+    runs, run = set(), ""
+    for op, arg in _plain_items(_parser.parse(pattern)):
+        if op is _parser.LITERAL:
+            run += chr(arg)
+        else:
+            runs.add(run.lower())
+            run = ""
+    runs.add(run.lower())
+    runs.discard("")
+    return runs
+
+
+# The rules of the label_rules table, compiled once. Text rules match the
+# counterparty name case-insensitively, IBAN and amount rules its profile.
+# When several rules match, the highest Prioriteit wins, then the oldest rule.
+class RuleSet:
+    def __init__(self, rules):
+        rules = rules.sort_values(["Prioriteit", "Id"], ascending=[False, True])
+        # A rule's rank is its position in that order; lower ranks win
+        self.labels = np.array(rules["Label"].fillna("").tolist(), dtype=object)
+        self.zakelijk = rules["Zakelijk"].fillna(False).astype(bool).to_numpy()
+        self.no_match = len(rules)
+
+        self._prefixes = {}
+        contains, contains_ranks = [], []
+        self._regexes = []
+        self._ibans = {}
+        amount_ranks, lows, highs = [], [], []
+        for rank, (kind, pattern, low, high) in enumerate(
+            zip(
+                rules["Soort"],
+                rules["Patroon"].fillna(""),
+                rules["MinBedrag"],
+                rules["MaxBedrag"],
+                strict=True,
+            ),
+        ):
+            if kind == RuleKind.PREFIX.value and pattern:
+                # Sorted by rank, so the first rule for a pattern is the winner
+                self._prefixes.setdefault(len(pattern), {}).setdefault(
+                    pattern.lower(), rank,
+                )
+            elif kind == RuleKind.CONTAINS.value and pattern:
+                contains.append(pattern)
+                contains_ranks.append(rank)
+            elif kind == RuleKind.REGEX.value and pattern:
+                regex = re.compile(pattern, re.IGNORECASE)
+                self._regexes.append((regex, rank, _required_literals(pattern)))
+            elif kind == RuleKind.IBAN.value and pattern:
+                self._ibans.setdefault(pattern.upper().replace(" ", ""), rank)
+            elif kind == RuleKind.AMOUNT.value:
+                amount_ranks.append(rank)
+                lows.append(-np.inf if pd.isna(low) else low)
+                highs.append(np.inf if pd.isna(high) else high)
+        self._contains = MultiPatternMatcher(contains)
+        self._contains_ranks = contains_ranks
+        # Every regex rule only runs on the names with its required literals
+        literals = sorted({run for *_, runs in self._regexes for run in runs})
+        self._literals = MultiPatternMatcher(literals)
+        ids = {run: i for i, run in enumerate(literals)}
+        self._regexes = [
+            (regex, rank, [ids[run] for run in runs])
+            for regex, rank, runs in self._regexes
+        ]
+        self._amount_ranks = np.array(amount_ranks, dtype=np.int64)
+        self._amount_lows = np.array(lows, dtype=float)
+        self._amount_highs = np.array(highs, dtype=float)
+
+    def __len__(self):
+        return self.no_match
+
+    # The rank of the best regex rule matching each name. One automaton pass
+    # finds the required literals of all rules in the names, and each rule
+    # then only runs on the names with the rarest of its literals that no
+    # better rule matched yet.
+    def _best_regex(self, names):
+        best = np.full(len(names), self.no_match, dtype=np.int64)
+        rows, literal_ids = self._literals.find_pairs(names)
+        bounds = np.searchsorted(literal_ids, np.arange(len(self._literals) + 1))
+        everyone = np.arange(len(names))
+        for regex, rank, literals in self._regexes:
+            candidates = everyone
+            if literals:
+                rarest = min(literals, key=lambda i: bounds[i + 1] - bounds[i])
+                candidates = rows[bounds[rarest] : bounds[rarest + 1]]
+            candidates = candidates[best[candidates] > rank]
+            if len(candidates):
+                hits = names.iloc[candidates].str.contains(regex, na=False)
+                best[candidates[hits.to_numpy(dtype=bool)]] = rank
+        return best
+
+    def _lookup(self, values, table):
+        return values.map(table).fillna(self.no_match).to_numpy(dtype=np.int64)
+
+    # Returns the label and zakelijk of the winning rule for every
+    # counterparty in profile (see counterparty_profile) that a rule matches.
+    # Each rule kind is one pass over the distinct counterparties.
+    def resolve(self, profile):
+        columns = [
+            DataFrameColumn.COUNTERPARTY.value,
+            DataFrameColumn.LABEL.value,
+            DataFrameColumn.BUSINESS.value,
+        ]
+        if not self.no_match or profile.empty:
+            return pd.DataFrame(columns=columns)
+
+        names = pd.Series(profile.index.astype(str), dtype="str")
+        lowered = names.str.lower()
+        best = np.full(len(names), self.no_match, dtype=np.int64)
+
+        for length, table in self._prefixes.items():
+            np.minimum(best, self._lookup(lowered.str[:length], table), out=best)
+        if len(self._contains):
+            np.minimum(
+                best,
+                self._contains.min_rank(names, self._contains_ranks, self.no_match),
+                out=best,
+            )
+        if self._regexes:
+            np.minimum(best, self._best_regex(names), out=best)
+        if self._ibans:
+            ibans = _normalize_iban(
+                profile[DataFrameColumn.COUNTERPARTY_IBAN.value].astype("str"),
+            ).reset_index(drop=True)
+            np.minimum(best, self._lookup(ibans, self._ibans), out=best)
+        if len(self._amount_ranks):
+            amounts = profile[DataFrameColumn.AMOUNT.value].to_numpy(dtype=float)
+            for rank, low, high in zip(
+                self._amount_ranks,
+                self._amount_lows,
+                self._amount_highs,
+                strict=True,
+            ):
+                best[(amounts >= low) & (amounts <= high) & (best > rank)] = rank
+
+        matched = best < self.no_match
+        return pd.DataFrame(
+            {
+                columns[0]: names[matched].to_numpy(),
+                columns[1]: self.labels[best[matched]],
+                columns[2]: self.zakelijk[best[matched]],
+            },
+        )
+
+
+_rule_sets = {}
+
+
+# The compiled RuleSet of the label_rules table; compiled again only after
+# the rules change
+def get_rule_set(db_path=None):
+    store = get_store(db_path)
+    rules = store.get_rules()
+    cached = _rule_sets.get(store.db_path)
+    if cached is None or cached[0] is not rules:
+        cached = _rule_sets[store.db_path] = (rules, RuleSet(rules))
+    return cached[1]
+
+
+# Validates and stores one rule. Amounts are in cents and both bounds are
+# inclusive; leave one out for an open range. Every column of label_rules
+# is its own argument, all but the pattern and label keyword-only.
+def add_rule(  # noqa: PLR0913
+    kind,
+    pattern=None,
+    label="",
+    *,
+    zakelijk=False,
+    priority=0,
+    min_amount=None,
+    max_amount=None,
+    db_path=None,
+):
+    kind = RuleKind(kind)
+    if kind == RuleKind.AMOUNT:
+        if min_amount is None and max_amount is None:
+            raise ValueError("Een bedragregel heeft een minimum of maximum nodig")
+    elif not pattern:
+        raise ValueError(f"Een {kind.value}-regel heeft een patroon nodig")
+    if kind == RuleKind.REGEX:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Ongeldige regex {pattern!r}: {e}") from e
+    get_store(db_path).add_rules(
+        [(kind.value, pattern, min_amount, max_amount, label, zakelijk, priority)],
+    )
+
+
+# The rules as stored, one row per rule in the order they were added
+def get_rules(db_path=None):
+    return get_store(db_path).get_rules()
+
+
+def delete_rule(rule_id, db_path=None):
+    get_store(db_path).delete_rule(rule_id)
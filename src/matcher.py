@@ -0,0 +1,173 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Values stepped through the transition table at once by min_rank; bounds
+# the memory of their character codes
+RANK_CHUNK = 50_000
+
+
+# Aho-Corasick automaton over a fixed set of substrings. Building it is linear
+# in the total pattern length, and one pass over a text finds every pattern
+# in it, however many patterns there are.
+class MultiPatternMatcher:
+    def __init__(self, patterns, case_sensitive=False):
+        self.patterns = [p for p in patterns if p]
+        self.case_sensitive = case_sensitive
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self._table = None
+        for i, pattern in enumerate(self.patterns):
+            self._insert(self._normalize(pattern), i)
+        self._link()
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _normalize(self, text):
+        return text if self.case_sensitive else text.lower()
+
+    def _insert(self, pattern, pattern_id):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = (*self._out[state], pattern_id)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        # States in breadth-first order, so a state's fail state comes first
+        self._order = []
+        while queue:
+            state = queue.popleft()
+            self._order.append(state)
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _states(self, text):
+        goto, fail = self._goto, self._fail
+        state = 0
+        for ch in self._normalize(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            yield state
+
+    def search(self, text):
+        out = self._out
+        return any(out[state] for state in self._states(text))
+
+    # Returns the ids (positions in self.patterns) of all patterns in text
+    def find_all(self, text):
+        found = set()
+        out = self._out
+        for state in self._states(text):
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    # Vectorized search over a Series: every distinct value is matched once
+    # and the result is broadcast back to the rows. Missing values never match.
+    def matches(self, values):
+        codes, uniques = pd.factorize(values)
+        hits = np.fromiter(
+            (self.search(str(v)) for v in uniques), dtype=bool, count=len(uniques),
+        )
+        return np.append(hits, False)[codes]
+
+    # The automaton as a table of next states per (state, symbol), with the
+    # fail links followed in advance. Symbol 0 stands for every character
+    # that is in no pattern, the others for the characters in codepoints.
+    # Built on first use.
+    def _transitions(self):
+        if self._table is None:
+            codepoints = np.array(
+                sorted({ord(ch) for state in self._goto for ch in state}),
+                dtype=np.uint32,
+            )
+            symbols = {chr(c): i + 1 for i, c in enumerate(codepoints)}
+            table = np.zeros((len(self._goto), len(codepoints) + 1), dtype=np.int32)
+            for state in (0, *self._order):
+                if state:
+                    table[state] = table[self._fail[state]]
+                for ch, nxt in self._goto[state].items():
+                    table[state, symbols[ch]] = nxt
+            self._table = codepoints, table
+        return self._table
+
+    # The automaton state of every value of values (a Series of str) after
+    # each character position, as (start, states) for the chunk of values
+    # from start on. All values step through the transition table together,
+    # one character position at a time, instead of one value at a time.
+    def _steps(self, values):
+        if not self.case_sensitive:
+            values = values.str.lower()
+        codepoints, table = self._transitions()
+        strings = values.to_numpy(dtype=str)
+        for start in range(0, len(strings), RANK_CHUNK):
+            chunk = strings[start : start + RANK_CHUNK]
+            width = chunk.dtype.itemsize // 4
+            if not width:
+                continue
+            # Fixed-width UCS-4, padded with code 0, which is in no pattern
+            codes = chunk.view(np.uint32).reshape(len(chunk), width)
+            positions = np.searchsorted(codepoints, codes)
+            positions[positions == len(codepoints)] = 0
+            symbols = np.where(codepoints[positions] == codes, positions + 1, 0)
+            state = np.zeros(len(chunk), dtype=np.int32)
+            for column in symbols.T:
+                state = table[state, column]
+                yield start, state
+
+    # Per value of values (a Series of str), the lowest of ranks (one per
+    # pattern) over the patterns the value contains, default when it
+    # contains none
+    def min_rank(self, values, ranks, default):
+        best = np.full(len(values), default, dtype=np.int64)
+        if not self.patterns:
+            return best
+        state_ranks = np.array(
+            [min((ranks[i] for i in out), default=default) for out in self._out],
+            dtype=np.int64,
+        )
+        for start, state in self._steps(values):
+            chunk_best = best[start : start + len(state)]
+            np.minimum(chunk_best, state_ranks[state], out=chunk_best)
+        return best
+
+    # Every (position in values, pattern id) with the pattern in the value,
+    # once, as two arrays sorted by pattern id
+    def find_pairs(self, values):
+        lengths = np.array([len(out) for out in self._out], dtype=np.int64)
+        rows, states = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        if self.patterns:
+            for start, state in self._steps(values):
+                hit = np.flatnonzero(lengths[state])
+                if len(hit):
+                    rows.append(hit + start)
+                    states.append(state[hit].astype(np.int64))
+        rows, states = np.concatenate(rows), np.concatenate(states)
+        # The pattern ids of a state are the run of out_ids from its first
+        out_ids = np.array([i for out in self._out for i in out], dtype=np.int64)
+        firsts = np.cumsum(lengths) - lengths
+        counts = lengths[states]
+        offsets = np.arange(counts.sum()) - (np.cumsum(counts) - counts).repeat(counts)
+        ids = out_ids[firsts[states].repeat(counts) + offsets]
+        # One key per pair, so duplicates go and the order is by pattern id
+        size = len(values) + 1
+        keys = np.sort(ids * size + rows.repeat(counts))
+        keys = keys[np.append(True, keys[1:] != keys[:-1])]
+        return keys % size, keys // size
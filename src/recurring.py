@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import DataFrameColumn
+
+# A series needs this many payments before it counts as recurring
+MIN_OCCURRENCES = 3
+# More frequent payments are everyday spending, not subscriptions
+MIN_INTERVAL_DAYS = 6
+# An interval is regular when it is this close to the series' typical
+# interval, in days or as a share of it, whichever is larger
+INTERVAL_TOLERANCE_DAYS = 3
+INTERVAL_TOLERANCE_RATIO = 0.15
+# Consecutive amounts this close count as the same price
+AMOUNT_TOLERANCE_RATIO = 0.2
+# Share of intervals and of amounts that must be regular
+MIN_REGULAR_SHARE = 0.75
+# A series that started within this many intervals of the end is new, if
+# the data goes back at least one interval before it
+NEW_INTERVALS = 3
+# The last payment changing price by more than this is a price change
+PRICE_CHANGE_RATIO = 0.01
+DAYS_PER_YEAR = 365.25
+
+FREQUENCIES = (
+    (7, "wekelijks"),
+    (14, "tweewekelijks"),
+    (DAYS_PER_YEAR / 12, "maandelijks"),
+    (DAYS_PER_YEAR / 4, "per kwartaal"),
+    (DAYS_PER_YEAR / 2, "halfjaarlijks"),
+    (DAYS_PER_YEAR, "jaarlijks"),
+)
+
+FREQUENCY = "Frequentie"
+INTERVAL = "Interval"
+FIRST = "Eerste"
+LAST = "Laatste"
+EXPECTED = "Verwacht"
+STATUS = "Status"
+
+NEW = "nieuw"
+MISSED = "gemist"
+PRICE_CHANGED = "prijswijziging"
+
+
+# Days since the epoch; 0 for a missing date, as with no debits there are
+# no series to compare it with
+def _day_number(date):
+    if pd.isna(date):
+        return 0
+    return np.datetime64(pd.Timestamp(date), "D").astype(np.int64)
+
+
+def _frequency_names(intervals):
+    periods = np.array([days for days, _ in FREQUENCIES])
+    names = np.array([name for _, name in FREQUENCIES], dtype=object)
+    nearest = np.abs(intervals[:, None] / periods[None, :] - 1).argmin(axis=1)
+    close = (
+        np.abs(intervals - periods[nearest])
+        <= INTERVAL_TOLERANCE_RATIO * periods[nearest]
+    )
+    other = np.array([f"elke {days:.0f} dagen" for days in intervals], dtype=object)
+    return np.where(close, names[nearest], other)
+
+
+def _status(new, missed, price_changed):
+    return [
+        ", ".join(
+            name
+            for name, flag in zip((NEW, MISSED, PRICE_CHANGED), flags, strict=True)
+            if flag
+        )
+        for flags in zip(new, missed, price_changed, strict=True)
+    ]
+
+
+# Finds subscriptions and other recurring debits in the transactions of df:
+# per counterparty at least MIN_OCCURRENCES payments at a regular interval
+# and a steady amount. Each series is flagged as new (it started recently,
+# after the data began), missed (its next payment is overdue) and/or
+# price-changed (its last amount differs from the one before).
+# reference_date is "now" for those flags, by default the date of the last
+# transaction in df. Without debits the result is empty, with the same
+# column types.
+#
+# The debits are sorted by (counterparty, date) once, so the intervals and
+# amount changes of every series are one diff over the whole array, and the
+# per-series statistics are bincounts and a grouped median over those.
+def detect_recurring(df, reference_date=None):
+    if reference_date is None:
+        reference_date = df[DataFrameColumn.DATE.value].max()
+    debits = df[
+        (df[DataFrameColumn.AMOUNT.value] < 0)
+        & df[DataFrameColumn.COUNTERPARTY.value].notna()
+    ]
+    codes, names = pd.factorize(debits[DataFrameColumn.COUNTERPARTY.value])
+    days = (
+        debits[DataFrameColumn.DATE.value]
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+    amounts = debits[DataFrameColumn.AMOUNT.value].to_numpy(dtype=np.int64)
+    order = np.lexsort((days, codes))
+    codes, days, amounts = codes[order], days[order], amounts[order]
+    groups = len(names)
+
+    # Pairs of consecutive payments of the same counterparty
+    in_series = codes[1:] == codes[:-1]
+    pair_codes = codes[1:][in_series]
+    gaps = np.diff(days)[in_series]
+    previous = amounts[:-1][in_series]
+    current = amounts[1:][in_series]
+
+    counts = np.bincount(codes, minlength=groups)
+    pairs = np.bincount(pair_codes, minlength=groups)
+    interval = (
+        pd.Series(gaps).groupby(pair_codes).median().reindex(range(groups)).to_numpy()
+    )
+    tolerance = np.maximum(
+        INTERVAL_TOLERANCE_DAYS, INTERVAL_TOLERANCE_RATIO * interval,
+    )
+    regular_gaps = np.abs(gaps - interval[pair_codes]) <= tolerance[pair_codes]
+    steady_amounts = np.abs(current - previous) <= AMOUNT_TOLERANCE_RATIO * np.abs(
+        previous,
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap_share = np.bincount(pair_codes, regular_gaps, groups) / pairs
+        amount_share = np.bincount(pair_codes, steady_amounts, groups) / pairs
+
+    recurring = np.flatnonzero(
+        (counts >= MIN_OCCURRENCES)
+        & (interval >= MIN_INTERVAL_DAYS)
+        & (gap_share >= MIN_REGULAR_SHARE)
+        & (amount_share >= MIN_REGULAR_SHARE),
+    )
+    starts = np.searchsorted(codes, recurring)
+    lasts = np.searchsorted(codes, recurring, side="right") - 1
+    interval = interval[recurring]
+    tolerance = tolerance[recurring]
+    first_day, last_day = days[starts], days[lasts]
+    last_amount, previous_amount = amounts[lasts], amounts[lasts - 1]
+    reference_day = _day_number(reference_date)
+    data_start = _day_number(df[DataFrameColumn.DATE.value].min())
+    new = (first_day > reference_day - NEW_INTERVALS * interval) & (
+        first_day - data_start >= interval
+    )
+    missed = reference_day - last_day > interval + tolerance
+    price_changed = np.abs(last_amount - previous_amount) > (
+        PRICE_CHANGE_RATIO * np.abs(previous_amount)
+    )
+
+    result = pd.DataFrame(
+        {
+            DataFrameColumn.COUNTERPARTY.value: pd.array(
+                np.asarray(names, dtype=object)[recurring], dtype="str",
+            ),
+            FREQUENCY: pd.array(_frequency_names(interval), dtype="str"),
+            INTERVAL: interval.astype(float),
+            DataFrameColumn.AMOUNT.value: last_amount,
+            DataFrameColumn.PREVIOUS_AMOUNT.value: previous_amount,
+            DataFrameColumn.YEARLY_AMOUNT.value: np.rint(
+                last_amount * DAYS_PER_YEAR / interval,
+            ).astype(np.int64),
+            DataFrameColumn.COUNT.value: counts[recurring].astype(np.int64),
+            FIRST: first_day.astype("datetime64[D]"),
+            LAST: last_day.astype("datetime64[D]"),
+            EXPECTED: np.rint(last_day + interval).astype(np.int64).astype(
+                "datetime64[D]",
+            ),
+            STATUS: pd.array(_status(new, missed, price_changed), dtype="str"),
+        },
+    )
+    return result.sort_values(
+        DataFrameColumn.YEARLY_AMOUNT.value, kind="stable", ignore_index=True,
+    )
+
+
+# The result as text for display: dates as YYYY-MM-DD, the interval in
+# whole days
+def format_for_display(result):
+    result = result.copy()
+    for col in (FIRST, LAST, EXPECTED):
+        result[col] = result[col].dt.strftime("%Y-%m-%d")
+    result[INTERVAL] = result[INTERVAL].round().astype("int64")
+    return result
@@ -3,9 +3,23 @@ import os
 import toml
 import tomllib
 
+from matcher import MultiPatternMatcher
+
 DEFAULT_CONFIG = {
     "bank": {"ignored_account_names": []},
-    "data": {"data_dir": "data", "label_db": "data/labels.db"},
+    "data": {
+        "data_dir": "data",
+        "label_db": "data/labels.db",
+        "cache_dir": "data/cache",
+        "watch": True,
+    },
+    "import": {
+        "workers": 0,
+        "stream_threshold_mb": 64,
+        "chunk_rows": 100000,
+        "watch_debounce_ms": 2000,
+    },
+    "analysis": {"backend": "auto", "sql_min_rows": 1000000, "cache_size": 128},
     "ui": {"theme": "light"},
 }
 
@@ -19,14 +33,35 @@ def load_settings(filepath="settings.toml"):
 
 
 def reload_globals():
-    global IGNORED_ACCOUNT_NAMES, DATA_DIR, LABEL_DB, UI_THEME
+    global IGNORED_ACCOUNT_NAMES, IGNORED_ACCOUNT_MATCHER, DATA_DIR, LABEL_DB, CACHE_DIR, UI_THEME
+    global IMPORT_WORKERS, STREAM_THRESHOLD_BYTES, IMPORT_CHUNK_ROWS
+    global WATCH_DATA_DIR, WATCH_DEBOUNCE_MS, ANALYSIS_BACKEND, ANALYSIS_SQL_MIN_ROWS
+    global ANALYSIS_CACHE_SIZE
     IGNORED_ACCOUNT_NAMES = settings.get("bank", {}).get("ignored_account_names", [])
+    IGNORED_ACCOUNT_MATCHER = MultiPatternMatcher(IGNORED_ACCOUNT_NAMES)
     DATA_DIR = settings.get("data", {}).get("data_dir")
     if DATA_DIR is None:
         raise ValueError("Missing 'data_dir' in [data] section of settings.toml")
     LABEL_DB = settings.get("data", {}).get("label_db")
     if LABEL_DB is None:
         raise ValueError("Missing 'label_db' in [data] section of settings.toml")
+    CACHE_DIR = settings.get("data", {}).get(
+        "cache_dir", os.path.join(DATA_DIR, "cache"),
+    )
+    WATCH_DATA_DIR = settings.get("data", {}).get("watch", True)
+    import_cfg = settings.get("import", {})
+    # 0 means one worker process per CPU core
+    IMPORT_WORKERS = import_cfg.get("workers", 0) or os.cpu_count() or 1
+    # Files from this size on are cleaned in chunks of IMPORT_CHUNK_ROWS rows
+    STREAM_THRESHOLD_BYTES = import_cfg.get("stream_threshold_mb", 64) * 1024 * 1024
+    IMPORT_CHUNK_ROWS = import_cfg.get("chunk_rows", 100000)
+    WATCH_DEBOUNCE_MS = import_cfg.get("watch_debounce_ms", 2000)
+    analysis_cfg = settings.get("analysis", {})
+    # "pandas", "sql", or "auto" to use SQL from sql_min_rows transactions on
+    ANALYSIS_BACKEND = analysis_cfg.get("backend", "auto")
+    ANALYSIS_SQL_MIN_ROWS = analysis_cfg.get("sql_min_rows", 1000000)
+    # Analysis results kept for reuse, 0 turns the cache off
+    ANALYSIS_CACHE_SIZE = analysis_cfg.get("cache_size", 128)
     UI_THEME = settings.get("ui", {}).get("theme", "light")
 
 
@@ -1,5 +1,5 @@
-from analysis import summarize_monthly_totals_by_label
 from data_loader import DataFrameColumn
+from utils import cents_to_euros
 from visualization import plot_time_line
 
 
@@ -10,9 +10,9 @@ class LabelDetailsViewer:
     def show_tijdlijn_for_label(self, label_value):
         filtered_df = self.app.summary_df[
             self.app.summary_df[DataFrameColumn.LABEL.value] == label_value
-        ].copy()
-        monthly = summarize_monthly_totals_by_label(filtered_df)
-        avg = filtered_df[DataFrameColumn.NETTO.value].mean()
+        ]
+        monthly = self.app.analysis.monthly_totals_by_label(label=label_value)
+        avg = cents_to_euros(filtered_df[DataFrameColumn.NETTO.value].mean())
         fig = plot_time_line(
             monthly,
             title=f"Tijdlijn voor: {label_value} - Gemiddeld: {avg:.2f} per maand",
@@ -6,6 +6,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QHeaderView,
     QLineEdit,
+    QPushButton,
     QStackedLayout,
     QStyledItemDelegate,
     QTableView,
@@ -13,10 +14,12 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from analysis import LabelChange
 from constants import Label, Zakelijkheid
-from data_loader import DataFrameColumn
+from data_loader import DataFrameColumn, apply_labels
 from dataframe import DataFrameModel
-from label_db import get_labels, save_label
+from label_db import get_label_map, save_labels
+from tabs.label_rules_box import LabelRulesBox
 
 
 class ComboBoxDelegate(QStyledItemDelegate):
@@ -57,6 +60,18 @@ class LabelsEditorTab(QWidget):
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Zoek")
         top_hbox.addWidget(self.search_box)
+        self.bulk_label_box = QLineEdit()
+        self.bulk_label_box.setPlaceholderText("Label voor zoekresultaten")
+        top_hbox.addWidget(self.bulk_label_box)
+        self.bulk_zakelijk_box = QComboBox()
+        self.bulk_zakelijk_box.addItems(
+            [Zakelijkheid.NON_BUSINESS.value, Zakelijkheid.BUSINESS.value],
+        )
+        top_hbox.addWidget(self.bulk_zakelijk_box)
+        self.bulk_label_button = QPushButton("Label zoekresultaten")
+        self.bulk_label_button.setEnabled(False)
+        self.bulk_label_button.clicked.connect(self.on_bulk_label_clicked)
+        top_hbox.addWidget(self.bulk_label_button)
         layout.addLayout(top_hbox)
 
         self.table = QTableView()
@@ -71,6 +86,9 @@ class LabelsEditorTab(QWidget):
         self.stacked_layout.setCurrentWidget(self.table)
         layout.addLayout(self.stacked_layout)
 
+        self.rules_box = LabelRulesBox(app)
+        layout.addWidget(self.rules_box)
+
         empty_df = pd.DataFrame(
             columns=[
                 DataFrameColumn.COUNTERPARTY.value,
@@ -103,6 +121,8 @@ class LabelsEditorTab(QWidget):
     def _on_search_text_changed(self, t):
         if self.proxy:
             self.proxy.setFilterWildcard(f"*{t}*")
+        # Without a search every counterparty would get the label
+        self.bulk_label_button.setEnabled(bool(t.strip()))
 
     def populate(self):
         current_search = self.search_box.text()
@@ -117,6 +137,7 @@ class LabelsEditorTab(QWidget):
         h_scroll = self.table.horizontalScrollBar().value() if self.table.model() else 0
 
         self.update_labels_in_place()
+        self.rules_box.populate()
 
         if current_search:
             self.search_box.setText(current_search)
@@ -131,27 +152,33 @@ class LabelsEditorTab(QWidget):
         self.stacked_layout.setCurrentWidget(self.table)
 
     def update_labels_in_place(self):
-        labels_df = get_labels()
+        labels_lookup = get_label_map()
         parties = sorted(
             self.app.summary_df[DataFrameColumn.COUNTERPARTY.value].str.strip().unique(),
         )
-        labels_lookup = {
-            row[DataFrameColumn.COUNTERPARTY.value]: row
-            for _, row in labels_df.iterrows()
-        }
+        # Counterparties without a label of their own show their rule label
+        firsts = self.app.summary_df.drop_duplicates(DataFrameColumn.COUNTERPARTY.value)
+        rule_lookup = dict(
+            zip(
+                firsts[DataFrameColumn.COUNTERPARTY.value],
+                zip(
+                    firsts[DataFrameColumn.LABEL.value].replace(Label.GEEN.value, ""),
+                    firsts[DataFrameColumn.BUSINESS.value],
+                    strict=True,
+                ),
+                strict=True,
+            ),
+        )
         rows = []
         for tp in parties:
-            if tp in labels_lookup:
-                label_row = labels_lookup[tp]
-                label = label_row[DataFrameColumn.LABEL.value]
-                zakelijk = (
-                    Zakelijkheid.BUSINESS.value
-                    if label_row[DataFrameColumn.BUSINESS.value]
-                    else Zakelijkheid.NON_BUSINESS.value
-                )
-            else:
-                label = ""
-                zakelijk = Zakelijkheid.NON_BUSINESS.value
+            label, is_zakelijk = labels_lookup.get(tp) or rule_lookup.get(
+                tp, ("", False),
+            )
+            zakelijk = (
+                Zakelijkheid.BUSINESS.value
+                if is_zakelijk
+                else Zakelijkheid.NON_BUSINESS.value
+            )
             rows.append(
                 {
                     DataFrameColumn.COUNTERPARTY.value: tp,
@@ -173,52 +200,65 @@ class LabelsEditorTab(QWidget):
             self.model.setDataFrame(new_df)
 
     def on_model_changed(self, topLeft, bottomRight, roles=None):
+        df = self.model.getDataFrame().iloc[topLeft.row() : bottomRight.row() + 1]
+        self.label_counterparties(
+            zip(
+                df[DataFrameColumn.COUNTERPARTY.value],
+                df[DataFrameColumn.LABEL.value],
+                df[DataFrameColumn.BUSINESS.value] == Zakelijkheid.BUSINESS.value,
+                strict=True,
+            ),
+        )
+
+    def on_bulk_label_clicked(self):
         df = self.model.getDataFrame()
+        rows = [
+            self.proxy.mapToSource(self.proxy.index(r, 0)).row()
+            for r in range(self.proxy.rowCount())
+        ]
+        label = self.bulk_label_box.text()
+        zakelijk = self.bulk_zakelijk_box.currentText() == Zakelijkheid.BUSINESS.value
+        self.label_counterparties(
+            (tp, label, zakelijk)
+            for tp in df.iloc[rows][DataFrameColumn.COUNTERPARTY.value]
+        )
+        self.populate()
 
-        start = topLeft.row()
-        end = bottomRight.row()
-        changed_any = False
-        for r in range(start, end + 1):
-            tp = df.iloc[r][DataFrameColumn.COUNTERPARTY.value]
-            label = df.iloc[r][DataFrameColumn.LABEL.value]
-            zak_text = df.iloc[r][DataFrameColumn.BUSINESS.value]
-            zakelijk = True if zak_text == Zakelijkheid.BUSINESS.value else False
-
-            mask = self.app.summary_df[DataFrameColumn.COUNTERPARTY.value] == tp
-            if mask.any():
-                current_label = self.app.summary_df.loc[
-                    mask, DataFrameColumn.LABEL.value,
-                ].iloc[0]
-                current_zak = bool(
-                    self.app.summary_df.loc[mask, DataFrameColumn.BUSINESS.value].iloc[
-                        0
-                    ],
+    # Saves the (tegenpartij, label, zakelijk) rows that differ from
+    # summary_df in one transaction, then updates the views for just the
+    # changed counterparties
+    def label_counterparties(self, rows):
+        current = self.app.summary_df.drop_duplicates(
+            DataFrameColumn.COUNTERPARTY.value,
+        ).set_index(DataFrameColumn.COUNTERPARTY.value)
+        changes = []
+        label_changes = []
+        for tp, label, zakelijk in rows:
+            normalized_label = (label or "").strip() or Label.GEEN.value
+            if tp in current.index:
+                old_label = current.at[tp, DataFrameColumn.LABEL.value]
+                old_zakelijk = bool(current.at[tp, DataFrameColumn.BUSINESS.value])
+                if old_label == normalized_label and old_zakelijk == bool(zakelijk):
+                    continue
+                label_changes.append(
+                    LabelChange(
+                        tp, old_label, normalized_label, old_zakelijk, bool(zakelijk),
+                    ),
                 )
-            else:
-                current_label = None
-                current_zak = None
+            changes.append((tp, label, bool(zakelijk)))
 
-            normalized_label = label.strip() if label else ""
-            normalized_label = (
-                normalized_label if normalized_label else Label.GEEN.value
-            )
-
-            if current_label == normalized_label and current_zak == bool(zakelijk):
-                continue
-
-            save_label(tp, label, zakelijk)
-            self.app.summary_df.loc[mask, DataFrameColumn.LABEL.value] = (
-                normalized_label
-            )
-            self.app.summary_df.loc[mask, DataFrameColumn.BUSINESS.value] = bool(
-                zakelijk,
-            )
-            self.app.summary_df.loc[mask, DataFrameColumn.BUSINESS_NL.value] = (
-                Zakelijkheid.BUSINESS.value
-                if zakelijk
-                else Zakelijkheid.NON_BUSINESS.value
-            )
-            changed_any = True
-
-        if changed_any:
-            self.app.update_all_views()
+        if not changes:
+            return
+        save_labels(changes)
+        apply_labels(
+            self.app.summary_df,
+            pd.DataFrame(
+                changes,
+                columns=[
+                    DataFrameColumn.COUNTERPARTY.value,
+                    DataFrameColumn.LABEL.value,
+                    DataFrameColumn.BUSINESS.value,
+                ],
+            ),
+        )
+        self.app.apply_label_changes(label_changes)
@@ -1,7 +1,7 @@
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QMenu
 
-from analysis import aggregate_label_netto
+from analysis import changed_labels
 from data_loader import DataFrameColumn
 from tabs.table_base import TableTabBase
 
@@ -17,10 +17,20 @@ class LabelNettoTab(TableTabBase):
     def setDataFrame(self, df):
         self.model.setDataFrame(df)
 
-    def update(self, df):
-        grouped_by_label = aggregate_label_netto(df)
+    def update(self, month):
+        grouped_by_label = self.app.analysis.label_netto(month)
         self.setDataFrame(grouped_by_label)
 
+    # Only the totals of the labels the changes move counterparties between
+    # are recomputed
+    def apply_label_changes(self, changes, month):
+        labels = changed_labels(changes)
+        self.model.replaceRows(
+            DataFrameColumn.LABEL.value,
+            labels,
+            self.app.analysis.label_netto(month, labels=labels),
+        )
+
     def label_detail_context_menu(self, position):
         index = self.table_view.indexAt(position)
         if not index.isValid():
@@ -32,6 +42,7 @@ class LabelNettoTab(TableTabBase):
         menu = QMenu()
         action_tijdlijn = menu.addAction(f"Tijdlijn voor '{label_value}'")
         action_tegenpartijen = menu.addAction(f"Tegenpartijen voor '{label_value}'")
+        action_transacties = menu.addAction(f"Transacties voor '{label_value}'")
 
         action = menu.exec(self.table_view.viewport().mapToGlobal(position))
 
@@ -39,3 +50,5 @@ class LabelNettoTab(TableTabBase):
             self.app.label_details_viewer.show_tijdlijn_for_label(label_value)
         elif action == action_tegenpartijen:
             self.app.label_details_viewer.show_tegenpartijen_for_label(label_value)
+        elif action == action_transacties:
+            self.app.show_transactions_for_label(label_value)
@@ -0,0 +1,148 @@
+import pandas as pd
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QGroupBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QSpinBox,
+    QTableView,
+    QVBoxLayout,
+)
+
+from constants import Zakelijkheid
+from data_loader import parse_amount_cents
+from dataframe import DataFrameModel
+from label_rules import RuleKind, add_rule, delete_rule, get_rules
+from utils import cents_to_euros, format_zakelijk
+
+AMOUNT_COLUMNS = ("MinBedrag", "MaxBedrag")
+
+
+# Cents of an amount typed in euros, None when left empty
+def _amount_cents(text):
+    if not text.strip():
+        return None
+    cents = parse_amount_cents(pd.Series([text], dtype="str")).iloc[0]
+    if pd.isna(cents):
+        raise ValueError(f"Ongeldig bedrag {text!r}")
+    return int(cents)
+
+
+# The label rules (see label_rules), with fields to add one and a button to
+# delete the selected ones. Rule changes are passed on to
+# app.apply_rule_changes, which rebuilds the summary with the new rules.
+class LabelRulesBox(QGroupBox):
+    def __init__(self, app):
+        super().__init__("Regels voor tegenpartijen zonder eigen label")
+        self.app = app
+        layout = QVBoxLayout(self)
+        self.setLayout(layout)
+
+        form = QHBoxLayout()
+        self.kind_box = QComboBox()
+        self.kind_box.addItems([kind.value for kind in RuleKind])
+        self.kind_box.currentTextChanged.connect(self._on_kind_changed)
+        form.addWidget(self.kind_box)
+        self.pattern_box = QLineEdit()
+        self.pattern_box.setPlaceholderText("Patroon")
+        form.addWidget(self.pattern_box)
+        self.min_amount_box = QLineEdit()
+        self.min_amount_box.setPlaceholderText("Min bedrag")
+        form.addWidget(self.min_amount_box)
+        self.max_amount_box = QLineEdit()
+        self.max_amount_box.setPlaceholderText("Max bedrag")
+        form.addWidget(self.max_amount_box)
+        self.label_box = QLineEdit()
+        self.label_box.setPlaceholderText("Label")
+        form.addWidget(self.label_box)
+        self.zakelijk_box = QComboBox()
+        self.zakelijk_box.addItems(
+            [Zakelijkheid.NON_BUSINESS.value, Zakelijkheid.BUSINESS.value],
+        )
+        form.addWidget(self.zakelijk_box)
+        self.priority_box = QSpinBox()
+        self.priority_box.setRange(-100, 100)
+        self.priority_box.setToolTip("Prioriteit")
+        form.addWidget(self.priority_box)
+        self.add_button = QPushButton("Regel toevoegen")
+        self.add_button.clicked.connect(self.on_add_clicked)
+        form.addWidget(self.add_button)
+        self.delete_button = QPushButton("Verwijder regel")
+        self.delete_button.clicked.connect(self.on_delete_clicked)
+        form.addWidget(self.delete_button)
+        layout.addLayout(form)
+
+        self.table = QTableView()
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Stretch,
+        )
+        self.model = DataFrameModel(parent=self)
+        self.table.setModel(self.model)
+        layout.addWidget(self.table)
+        self._on_kind_changed(self.kind_box.currentText())
+
+    def _on_kind_changed(self, kind):
+        is_amount = kind == RuleKind.AMOUNT.value
+        self.pattern_box.setEnabled(not is_amount)
+        self.min_amount_box.setEnabled(is_amount)
+        self.max_amount_box.setEnabled(is_amount)
+
+    def populate(self):
+        rules = get_rules().copy()
+        rules["Patroon"] = rules["Patroon"].fillna("")
+        for col in AMOUNT_COLUMNS:
+            rules[col] = [
+                "" if pd.isna(cents) else f"{cents_to_euros(cents):,.2f}"
+                for cents in rules[col]
+            ]
+        rules["Zakelijk"] = [
+            format_zakelijk(z) for z in rules["Zakelijk"].fillna(False).astype(bool)
+        ]
+        self.model.setDataFrame(rules)
+
+    def on_add_clicked(self):
+        is_amount = self.kind_box.currentText() == RuleKind.AMOUNT.value
+        zakelijk = self.zakelijk_box.currentText() == Zakelijkheid.BUSINESS.value
+        try:
+            if is_amount:
+                add_rule(
+                    RuleKind.AMOUNT,
+                    label=self.label_box.text().strip(),
+                    zakelijk=zakelijk,
+                    priority=self.priority_box.value(),
+                    min_amount=_amount_cents(self.min_amount_box.text()),
+                    max_amount=_amount_cents(self.max_amount_box.text()),
+                )
+            else:
+                add_rule(
+                    self.kind_box.currentText(),
+                    self.pattern_box.text().strip(),
+                    self.label_box.text().strip(),
+                    zakelijk=zakelijk,
+                    priority=self.priority_box.value(),
+                )
+        except ValueError as e:
+            QMessageBox.warning(self, "Ongeldige regel", str(e))
+            return
+        for box in (
+            self.pattern_box,
+            self.min_amount_box,
+            self.max_amount_box,
+            self.label_box,
+        ):
+            box.clear()
+        self.app.apply_rule_changes()
+
+    def on_delete_clicked(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        if not rows:
+            return
+        ids = self.model.getDataFrame()["Id"]
+        for row in sorted(rows):
+            delete_rule(int(ids.iloc[row]))
+        self.app.apply_rule_changes()
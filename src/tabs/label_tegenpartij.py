@@ -1,8 +1,7 @@
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
 
-import constants
-from analysis import aggregate_tegenpartijen_for_label
 from data_loader import DataFrameColumn
+from utils import cents_to_euros
 from visualization import plot_horizontal_bar
 
 
@@ -22,21 +21,15 @@ class LabelTegenpartijTab(QWidget):
         self.current_label = None
 
     def update_for_label(self, label_value, focus=False):
-        filtered_summary_df, selected_month = self.app.get_filtered_by_selected_month()
-        target_df = (
-            self.app.summary_df
-            if selected_month == constants.MonthFilter.ALL.value
-            else filtered_summary_df
-        )
-
-        tegenpartij_summary, total, count = aggregate_tegenpartijen_for_label(
-            target_df, label_value,
+        month = self.app.selected_month()
+        tegenpartij_summary, total, count = self.app.analysis.tegenpartijen_for_label(
+            label_value, month,
         )
 
         title = f"Tegenpartijen voor label: {label_value}"
-        if selected_month != constants.MonthFilter.ALL.value:
-            title += f" ({selected_month})"
-        title += f"\nTotaal: {total:.2f}€ - Aantal: {count}"
+        if month is not None:
+            title += f" ({self.app.month_combo.currentText()})"
+        title += f"\nTotaal: {cents_to_euros(total):.2f}€ - Aantal: {count}"
 
         fig = plot_horizontal_bar(
             tegenpartij_summary,
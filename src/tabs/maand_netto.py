@@ -1,4 +1,3 @@
-from analysis import aggregate_month_netto
 from tabs.table_base import TableTabBase
 
 
@@ -9,6 +8,8 @@ class MaandNettoTab(TableTabBase):
     def setDataFrame(self, df):
         self.model.setDataFrame(df)
 
-    def update(self, df, isAlleSelected):
-        display_df = aggregate_month_netto(df, include_year_totals=isAlleSelected)
+    def update(self, month):
+        display_df = self.app.analysis.month_netto(
+            month, include_year_totals=month is None,
+        )
         self.setDataFrame(display_df)
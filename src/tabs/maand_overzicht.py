@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import QComboBox, QHBoxLayout, QLabel, QVBoxLayout, QWidget
 
-from analysis import filter_zakelijkheid, summarize_monthly_totals_by_label
+from analysis import changed_labels, replace_groups
 from constants import MonthFilter, Zakelijkheid
 from data_loader import DataFrameColumn
 from visualization import plot_monthly_overview
@@ -36,11 +36,35 @@ class MaandoverzichtTab(QWidget):
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
 
+        self.monthly = None
+
     def update_plot(self):
         zakelijkheid = self.zakelijkheid_combo.currentText()
-        filtered_label_df = filter_zakelijkheid(self.app.summary_df, zakelijkheid)
-        monthly = summarize_monthly_totals_by_label(filtered_label_df)
+        self.monthly = self.app.analysis.monthly_totals_by_label(
+            zakelijkheid=zakelijkheid,
+        )
+        self._plot()
+
+    # Recomputes only the months of the labels the changes move
+    # counterparties between
+    def apply_label_changes(self, changes):
+        if self.monthly is None:
+            self.update_plot()
+            return
+        labels = changed_labels(changes)
+        self.monthly = replace_groups(
+            self.monthly,
+            self.app.analysis.monthly_totals_by_label(
+                zakelijkheid=self.zakelijkheid_combo.currentText(), labels=labels,
+            ),
+            DataFrameColumn.LABEL.value,
+            labels,
+            sort_by=DataFrameColumn.MONTH.value,
+        )
+        self._plot()
 
+    def _plot(self):
+        monthly = self.monthly
         for maand in monthly[DataFrameColumn.MONTH.value].unique():
             if maand not in [
                 self.maand_combo.itemText(i) for i in range(self.maand_combo.count())
@@ -1,7 +1,6 @@
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QMenu
 
-from analysis import aggregate_tegenpartij_label_zakelijk
 from data_loader import DataFrameColumn
 from tabs.table_base import TableTabBase
 
@@ -17,11 +16,21 @@ class TegenpartijNettoTab(TableTabBase):
     def setDataFrame(self, df):
         self.model.setDataFrame(df)
 
-    def update(self, df):
-        result = aggregate_tegenpartij_label_zakelijk(df)
+    def update(self, month):
+        result = self.app.analysis.tegenpartij_label_zakelijk(month)
         self.setDataFrame(result)
         return result
 
+    def apply_label_changes(self, changes, month):
+        counterparties = [c.tegenpartij for c in changes]
+        self.model.replaceRows(
+            DataFrameColumn.COUNTERPARTY.value,
+            counterparties,
+            self.app.analysis.tegenpartij_label_zakelijk(
+                month, counterparties=counterparties,
+            ),
+        )
+
     def tegenpartij_detail_context_menu(self, position):
         index = self.table_view.indexAt(position)
         if not index.isValid():
@@ -32,6 +41,7 @@ class TegenpartijNettoTab(TableTabBase):
 
         menu = QMenu()
         action_tijdlijn = menu.addAction(f"Tijdlijn voor '{tegenpartij}'")
+        action_transacties = menu.addAction(f"Transacties voor '{tegenpartij}'")
 
         action = menu.exec(self.table_view.viewport().mapToGlobal(position))
 
@@ -39,3 +49,5 @@ class TegenpartijNettoTab(TableTabBase):
             self.app.detail_context_menu(
                 position, "Tegenpartij", self.table_view, self.model,
             )
+        elif action == action_transacties:
+            self.app.show_transactions(f"Tegenpartij '{tegenpartij}'", [tegenpartij])
@@ -0,0 +1,26 @@
+from PyQt6.QtWidgets import QLabel
+
+from recurring import detect_recurring, format_for_display
+from tabs.table_base import TableTabBase
+
+
+# Subscriptions and other recurring debits over all transactions, so the
+# month filter does not apply; detected again only after an import
+class TerugkerendTab(TableTabBase):
+    def __init__(self, app):
+        super().__init__(app, show_search=True, editable=False)
+        self.info_label = QLabel()
+        self.info_label.setWordWrap(True)
+        self.layout().insertWidget(0, self.info_label)
+        self._df = None
+
+    def populate(self):
+        if self._df is self.app.df:
+            return
+        self._df = self.app.df
+        result = detect_recurring(self.app.df)
+        self.setDataFrame(format_for_display(result))
+        self.info_label.setText(
+            f"{len(result)} terugkerende betalingen gevonden. Status: nieuw, "
+            "gemist (volgende betaling is te laat) of prijswijziging.",
+        )
@@ -0,0 +1,134 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import cleaning_digest, read_and_clean_files
+from utils import file_hash
+
+# Bump when the layout of the cleaned transactions frame changes, so stale
+# cache files are parsed again instead of being loaded with the old schema.
+CACHE_VERSION = 4
+INDEX_FILE = "index.json"
+
+
+class TransactionCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self._settings = cleaning_digest()
+        self._entries = self._load_index()
+        self._changed = False
+
+    def _load_index(self):
+        try:
+            with open(self.cache_dir / INDEX_FILE, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Frames cleaned under other ignored_account_names are parsed again
+        if (data.get("version"), data.get("settings")) != (
+            CACHE_VERSION,
+            self._settings,
+        ):
+            return {}
+        return data.get("files", {})
+
+    def save(self):
+        if not self._changed:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_dir / f"{INDEX_FILE}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": CACHE_VERSION,
+                    "settings": self._settings,
+                    "files": self._entries,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.cache_dir / INDEX_FILE)
+        self._changed = False
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    def _frame_path(self, digest):
+        return self.cache_dir / f"{digest}.parquet"
+
+    # Content hash of path, taken from the index while the file is unchanged
+    def digest(self, path):
+        entry = self._entries.get(self._key(path))
+        stat = os.stat(path)
+        if entry is not None and (entry["size"], entry["mtime"]) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            return entry["hash"]
+        return file_hash(path)
+
+    def lookup(self, path):
+        key = self._key(path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stat = os.stat(path)
+        if entry["size"] != stat.st_size:
+            return None
+        if entry["mtime"] != stat.st_mtime_ns:
+            # Touched but possibly unchanged, e.g. copied back into the data dir.
+            if file_hash(path) != entry["hash"]:
+                return None
+            entry["mtime"] = stat.st_mtime_ns
+            self._changed = True
+        try:
+            return pd.read_parquet(self._frame_path(entry["hash"]))
+        except Exception:
+            return None
+
+    def store(self, path, df, digest=None):
+        stat = os.stat(path)
+        if digest is None:
+            digest = file_hash(path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(self._frame_path(digest))
+        self._entries[self._key(path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": digest,
+        }
+        self._changed = True
+
+    # Returns one cleaned frame or the raised exception per path, in order
+    def load(self, paths, workers=None, progress=None, cancelled=None):
+        results = [self.lookup(path) for path in paths]
+        misses = [i for i, cached in enumerate(results) if cached is None]
+        if progress is not None:
+            for path, cached in zip(paths, results, strict=True):
+                if cached is not None:
+                    progress(path, len(cached))
+        parsed = read_and_clean_files(
+            [paths[i] for i in misses],
+            workers=workers,
+            progress=progress,
+            cancelled=cancelled,
+        )
+        for i, df in zip(misses, parsed, strict=True):
+            results[i] = df
+            if isinstance(df, pd.DataFrame):
+                self.store(paths[i], df)
+        self.save()
+        return results
+
+    def prune(self, keep_paths):
+        keep = {self._key(p) for p in keep_paths}
+        for key in [k for k in self._entries if k not in keep]:
+            del self._entries[key]
+            self._changed = True
+        referenced = {entry["hash"] for entry in self._entries.values()}
+        for frame_path in self.cache_dir.glob("*.parquet"):
+            if frame_path.stem not in referenced:
+                frame_path.unlink(missing_ok=True)
+        self.save()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import DataFrameColumn
+
+MONTH = DataFrameColumn.MONTH.value
+COUNTERPARTY = DataFrameColumn.COUNTERPARTY.value
+
+
+# Row positions of df sorted by (counterparty, month, date), next to their
+# (counterparty, month) key. The transactions of a counterparty, or of one of
+# its months, are one slice of that order found by binary search, so a lookup
+# costs the size of its result and not a scan of df. Built once per df; rows
+# without a counterparty or month are left out.
+class TransactionIndex:
+    def __init__(self, df):
+        self.df = df
+        counterparties, counterparty_values = pd.factorize(
+            df[COUNTERPARTY], sort=True,
+        )
+        months, month_values = pd.factorize(df[MONTH], sort=True)
+        self._months = {str(month): code for code, month in enumerate(month_values)}
+        self._month_count = len(month_values)
+        self._counterparty_codes = {
+            counterparty: code for code, counterparty in enumerate(counterparty_values)
+        }
+
+        known = np.flatnonzero((counterparties >= 0) & (months >= 0))
+        keys = counterparties[known] * self._month_count + months[known]
+        dates = df[DataFrameColumn.DATE.value].to_numpy()[known]
+        order = np.lexsort((dates, keys))
+        self.positions = known[order]
+        self._keys = keys[order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _slice(self, first_key, end_key):
+        start, end = np.searchsorted(self._keys, [first_key, end_key])
+        return self.positions[start:end]
+
+    # Positions in df of the transactions of counterparty, in month (a Maand
+    # value such as "2026-01") or in all months
+    def lookup(self, counterparty, month=None):
+        code = self._counterparty_codes.get(counterparty)
+        if code is None:
+            return self.positions[:0]
+        first = code * self._month_count
+        if month is None:
+            return self._slice(first, first + self._month_count)
+        month_code = self._months.get(month)
+        if month_code is None:
+            return self.positions[:0]
+        return self._slice(first + month_code, first + month_code + 1)
+
+    # The transactions of the counterparties, per counterparty by date
+    def rows(self, counterparties, month=None):
+        positions = [self.lookup(c, month) for c in counterparties]
+        return self.df.iloc[np.concatenate([self.positions[:0], *positions])]
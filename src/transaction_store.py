@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import DataFrameColumn
+from label_db import get_store
+
+# Frame column -> column of the transactions table
+STORE_COLUMNS = {
+    DataFrameColumn.DATE.value: "Datum",
+    DataFrameColumn.COUNTERPARTY.value: "Tegenpartij",
+    DataFrameColumn.IBAN.value: "Iban",
+    DataFrameColumn.COUNTERPARTY_IBAN.value: "IbanTegenpartij",
+    DataFrameColumn.AMOUNT.value: "Bedrag",
+    DataFrameColumn.MONTH.value: "Maand",
+    DataFrameColumn.FINGERPRINT.value: "Fingerprint",
+}
+SELECT_COLUMNS = ", ".join(STORE_COLUMNS.values())
+
+
+def _nullable(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _to_rows(df):
+    # SQLite integers are signed, so the uint64 fingerprint is stored with
+    # the same 64 bits read as int64
+    fingerprints = (
+        df[DataFrameColumn.FINGERPRINT.value]
+        .to_numpy(dtype=np.uint64)
+        .view(np.int64)
+        .tolist()
+    )
+    # In the order of STORE_COLUMNS
+    return zip(
+        df[DataFrameColumn.DATE.value].dt.strftime("%Y-%m-%d").tolist(),
+        _nullable(df[DataFrameColumn.COUNTERPARTY.value]),
+        _nullable(df[DataFrameColumn.IBAN.value]),
+        _nullable(df[DataFrameColumn.COUNTERPARTY_IBAN.value]),
+        df[DataFrameColumn.AMOUNT.value].astype("int64").tolist(),
+        df[DataFrameColumn.MONTH.value].astype(str).tolist(),
+        fingerprints,
+        strict=True,
+    )
+
+
+# Turns a query result back into the frame layout of clean_transactions
+def _to_frame(rows):
+    df = rows.rename(columns={v: k for k, v in STORE_COLUMNS.items()})
+    df[DataFrameColumn.DATE.value] = pd.to_datetime(
+        df[DataFrameColumn.DATE.value], format="%Y-%m-%d",
+    ).astype("datetime64[us]")
+    df[DataFrameColumn.MONTH.value] = pd.PeriodIndex(
+        df[DataFrameColumn.MONTH.value], freq="M",
+    )
+    # NULL stays missing; before pandas 3, astype("str") turns None into "None"
+    for col in (
+        DataFrameColumn.COUNTERPARTY.value,
+        DataFrameColumn.IBAN.value,
+        DataFrameColumn.COUNTERPARTY_IBAN.value,
+    ):
+        df[col] = df[col].astype("str").where(df[col].notna())
+    df[DataFrameColumn.AMOUNT.value] = df[DataFrameColumn.AMOUNT.value].astype("int64")
+    df[DataFrameColumn.FINGERPRINT.value] = (
+        df[DataFrameColumn.FINGERPRINT.value].to_numpy(dtype=np.int64).view(np.uint64)
+    )
+    return df
+
+
+# Cleaned transactions in the transactions table of the label database, keyed
+# by fingerprint. Month, counterparty and IBAN lookups use the indexes that
+# init_db creates, instead of scanning every row.
+class TransactionStore:
+    def __init__(self, db_path=None):
+        self.store = get_store(db_path)
+        self.db_path = self.store.db_path
+
+    def _query(self, where="", params=()):
+        return _to_frame(
+            self.store.read_frame(
+                f"SELECT {SELECT_COLUMNS} FROM transactions {where}", params,
+            ),
+        )
+
+    def __len__(self):
+        return self.store.execute("SELECT COUNT(*) FROM transactions")[0][0]
+
+    # Adds the rows of a cleaned frame; fingerprints already stored are skipped
+    def add(self, df):
+        if df.empty:
+            return
+        placeholders = ", ".join("?" * len(STORE_COLUMNS))
+        self.store.executemany(
+            f"INSERT OR IGNORE INTO transactions ({SELECT_COLUMNS}) "
+            f"VALUES ({placeholders})",
+            _to_rows(df),
+        )
+
+    def clear(self):
+        self.store.execute("DELETE FROM transactions")
+
+    def load(self):
+        return self._query()
+
+    def month(self, month):
+        return self._query("WHERE Maand = ?", (str(month),))
+
+    def counterparty(self, counterparty, month=None):
+        if month is None:
+            return self._query("WHERE Tegenpartij = ?", (counterparty,))
+        return self._query(
+            "WHERE Tegenpartij = ? AND Maand = ?", (counterparty, str(month)),
+        )
+
+    def iban(self, iban):
+        return self._query("WHERE Iban = ?", (iban,))
+
+    # label_rules.counterparty_profile, computed by SQLite
+    def counterparty_profile(self):
+        return self.store.read_frame(
+            f"""
+            SELECT
+                Tegenpartij AS "{DataFrameColumn.COUNTERPARTY.value}",
+                MAX(IbanTegenpartij) AS "{DataFrameColumn.COUNTERPARTY_IBAN.value}",
+                AVG(Bedrag) AS "{DataFrameColumn.AMOUNT.value}"
+            FROM transactions
+            WHERE Tegenpartij IS NOT NULL
+            GROUP BY Tegenpartij
+            """,
+        ).set_index(DataFrameColumn.COUNTERPARTY.value)
@@ -0,0 +1,67 @@
+from PyQt6.QtWidgets import (
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QMainWindow,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from data_loader import DataFrameColumn
+from dataframe import DataFrameModel
+from utils import cents_to_euros
+
+TRANSACTION_COLUMNS = [
+    DataFrameColumn.DATE.value,
+    DataFrameColumn.COUNTERPARTY.value,
+    DataFrameColumn.AMOUNT.value,
+    DataFrameColumn.COUNTERPARTY_IBAN.value,
+    DataFrameColumn.IBAN.value,
+]
+
+
+# Drilldown from a total to the transactions behind it
+class TransactionsWindow(QMainWindow):
+    def __init__(self, title, transactions, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Transacties — {title}")
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        layout = QVBoxLayout(central)
+
+        top_hbox = QHBoxLayout()
+        total = cents_to_euros(transactions[DataFrameColumn.AMOUNT.value].sum())
+        self.info_label = QLabel(
+            f"{title}\nTotaal: {total:.2f}€ - Aantal: {len(transactions)}",
+        )
+        top_hbox.addWidget(self.info_label)
+        top_hbox.addStretch()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Zoek")
+        top_hbox.addWidget(self.search_box)
+        layout.addLayout(top_hbox)
+
+        df = transactions[
+            [c for c in TRANSACTION_COLUMNS if c in transactions.columns]
+        ].copy()
+        df[DataFrameColumn.DATE.value] = df[DataFrameColumn.DATE.value].dt.strftime(
+            "%Y-%m-%d",
+        )
+        self.model = DataFrameModel(df, parent=self)
+        self.proxy = self.model.createProxy(parent=self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.proxy)
+        self.table_view.setSortingEnabled(True)
+        self.table_view.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Stretch,
+        )
+        layout.addWidget(self.table_view)
+
+        self.search_box.textChanged.connect(
+            lambda t: self.proxy.setFilterWildcard(f"*{t}*"),
+        )
+
+        self.resize(900, 600)
@@ -1,24 +1,25 @@
-from constants import Zakelijkheid
+import hashlib
+
+from constants import CENTS_PER_EURO, DUTCH_MONTHS, Zakelijkheid
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cents_to_euros(cents):
+    return cents / CENTS_PER_EURO
 
 
 def format_month(period_str):
     year, month = period_str.split("-")
-    dutch_months = [
-        "Alle maanden",
-        "januari",
-        "februari",
-        "maart",
-        "april",
-        "mei",
-        "juni",
-        "juli",
-        "augustus",
-        "september",
-        "oktober",
-        "november",
-        "december",
-    ]
-    return f"{dutch_months[int(month)]} {year}"
+    return f"{DUTCH_MONTHS[int(month) - 1]} {year}"
 
 
 def format_zakelijk(zakelijk):
@@ -3,13 +3,16 @@ import numpy as np
 from matplotlib import cm
 from matplotlib.colors import to_hex
 
+from analysis import signed_totals
 from constants import Label
 from data_loader import DataFrameColumn
+from utils import cents_to_euros
 
 
 def plot_horizontal_bar(df, value_col, category_col, title="", highlight=None):
     df = df.copy()
     df[category_col] = df[category_col].replace("", f"geen {category_col.lower()}")
+    df[value_col] = cents_to_euros(df[value_col])
 
     df = df.sort_values(by=value_col, ascending=False)
     n_rows = len(df)
@@ -72,16 +75,15 @@ def plot_label_netto(filtered_df, selected_month, highlight=None):
         "", Label.GEEN.value,
     )
 
-    grouped = (
-        df.groupby(DataFrameColumn.LABEL.value)
-        .agg(
-            Netto=(DataFrameColumn.NETTO.value, "sum"),
-            Positief=(DataFrameColumn.NETTO.value, lambda x: (x > 0).sum()),
-            Negatief=(DataFrameColumn.NETTO.value, lambda x: (x < 0).sum()),
-            Aantal=(DataFrameColumn.COUNTERPARTY.value, "count"),
-        )
-        .reset_index()
-    )
+    grouped = signed_totals(df, DataFrameColumn.LABEL.value)[
+        [
+            DataFrameColumn.LABEL.value,
+            DataFrameColumn.NETTO.value,
+            DataFrameColumn.POSITIVE_COUNT.value,
+            DataFrameColumn.NEGATIVE_COUNT.value,
+            DataFrameColumn.COUNT.value,
+        ]
+    ]
 
     return plot_horizontal_bar(
         grouped,
@@ -93,6 +95,16 @@ def plot_label_netto(filtered_df, selected_month, highlight=None):
 
 
 def plot_time_line(df, title):
+    df = df.assign(
+        **{
+            DataFrameColumn.INCOME.value: cents_to_euros(
+                df[DataFrameColumn.INCOME.value],
+            ),
+            DataFrameColumn.EXPENSE.value: cents_to_euros(
+                df[DataFrameColumn.EXPENSE.value],
+            ),
+        },
+    )
     fig, ax = plt.subplots()
     if (df[DataFrameColumn.INCOME.value] != 0).any():
         _ = ax.plot(
@@ -179,8 +191,8 @@ def plot_monthly_overview(df):
             DataFrameColumn.LABEL.value
         ].fillna(Label.GEEN.value)
 
-        inkomsten = subset[DataFrameColumn.INCOME.value].values
-        uitgaven = subset[DataFrameColumn.EXPENSE.value].abs().values
+        inkomsten = cents_to_euros(subset[DataFrameColumn.INCOME.value].values)
+        uitgaven = cents_to_euros(subset[DataFrameColumn.EXPENSE.value].abs().values)
 
         ax.bar(
             x,
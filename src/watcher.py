@@ -0,0 +1,66 @@
+import os
+from glob import glob
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from data_loader import CSV_GLOB
+
+
+class DataDirWatcher(QObject):
+    filesChanged = pyqtSignal(list)
+
+    def __init__(self, directory, debounce_ms, parent=None):
+        super().__init__(parent)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._scan)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_scan)
+        self._watcher.fileChanged.connect(self._schedule_scan)
+        self._watcher.addPath(directory)
+
+        self._known = self._csv_stats()
+        self._pending = {}
+        self._watch_files(self._known)
+
+    def _csv_stats(self):
+        stats = {}
+        for path in glob(os.path.join(self.directory, CSV_GLOB)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+        return stats
+
+    def _watch_files(self, paths):
+        watched = set(self._watcher.files())
+        new_paths = [p for p in paths if p not in watched]
+        if new_paths:
+            self._watcher.addPaths(new_paths)
+
+    def _schedule_scan(self, _path=None):
+        self._timer.start()
+
+    def _scan(self):
+        stats = self._csv_stats()
+        self._watch_files(stats)
+        self._known = {p: st for p, st in self._known.items() if p in stats}
+
+        changed = {p: st for p, st in stats.items() if self._known.get(p) != st}
+        # A file is only reported once its size and mtime are the same on two
+        # scans in a row, so exports that are still being written are skipped
+        settled = sorted(p for p, st in changed.items() if self._pending.get(p) == st)
+        self._pending = {p: st for p, st in changed.items() if p not in settled}
+        if self._pending:
+            self._timer.start()
+
+        if settled:
+            for path in settled:
+                self._known[path] = stats[path]
+            self.filesChanged.emit(settled)
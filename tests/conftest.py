@@ -3,6 +3,14 @@ import pandas.testing as pdt
 import pytest
 
 from constants import Zakelijkheid
+from label_db import close_stores
+
+
+# Every test gets fresh connections, so no database stays open across tmp dirs
+@pytest.fixture(autouse=True)
+def _close_label_stores():
+    yield
+    close_stores()
 
 
 @pytest.fixture
@@ -20,7 +28,7 @@ def summary_df():
                 Zakelijkheid.NON_BUSINESS.value,
                 Zakelijkheid.NON_BUSINESS.value,
             ],
-            "Netto": [100.0, -30.0, 50.0, -20.0],
+            "Netto": [10000, -3000, 5000, -2000],
         },
     )
 
@@ -31,7 +39,7 @@ def transactions_df():
         {
             "Maand": ["2026-01", "2026-01", "2026-02"],
             "Tegenpartij": ["A", "A", "B"],
-            "Bedrag": [70.0, 0.0, 50.0],
+            "Bedrag": [7000, 0, 5000],
         },
     )
 
@@ -42,7 +50,7 @@ def raw_transactions():
     return pd.DataFrame(
         {
             "Date": ["20260101", "20260115", "20260201"],
-            "Bedrag": [1234.56, 0.00, 50.00],
+            "Bedrag": [123456, 0, 5000],
             "Naam": ["Desc A", "Desc B", "Desc C"],
             "Tegenpartij": ["CP A", "CP B", "CP C"],
             "Debit/credit": ["Debit", "Credit", "Credit"],
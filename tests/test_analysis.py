@@ -5,6 +5,7 @@ from analysis import (
     aggregate_month_netto,
     aggregate_tegenpartij_label_zakelijk,
     aggregate_tegenpartijen_for_label,
+    signed_totals,
     summarize_by_counterparty_per_month,
     summarize_monthly_totals,
 )
@@ -24,7 +25,7 @@ def test_aggregate_label_and_counterparty_and_month(summary_df):
         label_agg[label_agg[DataFrameColumn.LABEL.value] == "L1"][
             DataFrameColumn.NETTO.value
         ].iloc[0]
-        == 70.0
+        == 7000
     )
 
     tp_agg = aggregate_tegenpartij_label_zakelijk(summary)
@@ -32,7 +33,7 @@ def test_aggregate_label_and_counterparty_and_month(summary_df):
     a_sum = tp_agg[tp_agg[DataFrameColumn.COUNTERPARTY.value] == "A"][
         DataFrameColumn.NETTO.value
     ].sum()
-    assert a_sum == 70.0
+    assert a_sum == 7000
 
     month_view = aggregate_month_netto(summary, include_year_totals=False)
     assert DataFrameColumn.MONTH.value in month_view.columns
@@ -41,7 +42,7 @@ def test_aggregate_label_and_counterparty_and_month(summary_df):
     assert any(month_year[DataFrameColumn.MONTH.value].str.startswith("Totaal"))
 
     tegen_summary, total, count = aggregate_tegenpartijen_for_label(summary, "L1")
-    assert total == 70.0
+    assert total == 7000
     assert count == 1
 
 
@@ -54,6 +55,7 @@ def test_summarize_by_counterparty_and_month_and_monthly_totals(raw_transactions
     ]
     sum_by_cp = summarize_by_counterparty_per_month(df)
     assert DataFrameColumn.NETTO.value in sum_by_cp.columns
+    assert sum_by_cp[DataFrameColumn.NETTO.value].dtype == "int64"
 
     monthly = summarize_monthly_totals(sum_by_cp)
 
@@ -62,3 +64,24 @@ def test_summarize_by_counterparty_and_month_and_monthly_totals(raw_transactions
         and DataFrameColumn.EXPENSE.value in monthly.columns
         and DataFrameColumn.NETTO.value in monthly.columns
     )
+
+
+def test_signed_totals_matches_groupby(summary_df):
+    df = pd.concat(
+        [summary_df, summary_df.assign(Label=None, Netto=99)], ignore_index=True,
+    )
+
+    totals = signed_totals(
+        df, [DataFrameColumn.MONTH.value, DataFrameColumn.LABEL.value],
+    )
+    netto = df.groupby(
+        [DataFrameColumn.MONTH.value, DataFrameColumn.LABEL.value],
+    )[DataFrameColumn.NETTO.value]
+
+    assert totals[DataFrameColumn.LABEL.value].tolist() == ["L1", "", "L2"]
+    assert totals[DataFrameColumn.INCOME.value].tolist() == [10000, 0, 5000]
+    assert totals[DataFrameColumn.EXPENSE.value].tolist() == [-3000, -2000, 0]
+    assert totals[DataFrameColumn.NETTO.value].tolist() == netto.sum().tolist()
+    assert totals[DataFrameColumn.COUNT.value].tolist() == netto.count().tolist()
+    assert totals[DataFrameColumn.POSITIVE_COUNT.value].tolist() == [1, 0, 1]
+    assert totals[DataFrameColumn.NEGATIVE_COUNT.value].tolist() == [1, 1, 0]
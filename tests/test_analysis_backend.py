@@ -0,0 +1,178 @@
+import sqlite3
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from analysis import LabelChange, replace_groups
+from analysis_backend import PandasBackend, SqliteBackend
+from constants import Label, Zakelijkheid
+from data_loader import apply_labels, read_and_clean_file
+from importer import build_summary
+from label_db import init_db
+from label_rules import add_rule, get_rule_set
+from transaction_store import TransactionStore
+
+ING_HEADER = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+
+
+@pytest.fixture
+def backends(tmp_path):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + "20260105,1000,Werkgever,IBAN1,Credit,ACC1\n"
+        + "20260110,12,Jumbo,IBAN2,Debit,ACC1\n"
+        + "20260111,8,Jumbo,IBAN2,Debit,ACC1\n"
+        + "20260115,30,Ziggo,IBAN3,Debit,ACC1\n"
+        + "20260120,5,Onbekend,IBAN4,Credit,ACC1\n"
+        + "20260205,1000,Werkgever,IBAN1,Credit,ACC1\n"
+        + "20260210,20,Jumbo,IBAN2,Debit,ACC1\n"
+        + "20260211,25,Jumbo,IBAN2,Credit,ACC1\n"
+        + "20260215,30,Ziggo,IBAN3,Debit,ACC1\n"
+        + "20251215,40,Onbekend,IBAN4,Debit,ACC1\n",
+    )
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    df = read_and_clean_file(str(p))
+    TransactionStore(db_path).add(df)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO labels (Tegenpartij, Label, Zakelijk) VALUES (?, ?, ?)",
+            [
+                ("Werkgever", "Salaris", True),
+                ("Jumbo", " Boodschappen ", False),
+                ("Ziggo", "", True),
+            ],
+        )
+        labels = pd.read_sql_query("SELECT * FROM labels", conn)
+    # Jumbo has a label of its own, so only Onbekend is labelled by a rule
+    add_rule("bevat", "bekend", "Overig", db_path=db_path)
+    add_rule("regex", "^jum", "Supermarkt", priority=1, db_path=db_path)
+    rules = get_rule_set(db_path)
+    return PandasBackend(build_summary(df, labels, rules)), SqliteBackend(db_path)
+
+
+@pytest.mark.parametrize("month", [None, "2026-01", "2026-03"])
+def test_sql_backend_matches_pandas_per_month(backends, month):
+    pandas_backend, sql_backend = backends
+
+    for name in ("label_netto", "tegenpartij_label_zakelijk", "monthly_totals"):
+        pdt.assert_frame_equal(
+            getattr(sql_backend, name)(month),
+            getattr(pandas_backend, name)(month),
+        )
+    for include_year_totals in (False, True):
+        pdt.assert_frame_equal(
+            sql_backend.month_netto(month, include_year_totals),
+            pandas_backend.month_netto(month, include_year_totals),
+        )
+    sql_summary, sql_total, sql_count = sql_backend.tegenpartijen_for_label(
+        "Boodschappen", month,
+    )
+    summary, total, count = pandas_backend.tegenpartijen_for_label(
+        "Boodschappen", month,
+    )
+    pdt.assert_frame_equal(sql_summary, summary)
+    assert (sql_total, sql_count) == (total, count)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"label": "Geen label"},
+        {"counterparty": "Jumbo"},
+        {"zakelijkheid": Zakelijkheid.BUSINESS.value},
+        {"zakelijkheid": Zakelijkheid.NON_BUSINESS.value},
+    ],
+)
+def test_sql_backend_matches_pandas_monthly_totals_by_label(backends, filters):
+    pandas_backend, sql_backend = backends
+    pdt.assert_frame_equal(
+        sql_backend.monthly_totals_by_label(**filters),
+        pandas_backend.monthly_totals_by_label(**filters),
+    )
+
+
+@pytest.mark.parametrize("month", [None, "2026-02"])
+def test_replaced_groups_match_rebuild_after_label_change(backends, month):
+    # Ziggo moves from "Geen label" to Boodschappen, which Jumbo already has
+    labels = {Label.GEEN.value, "Boodschappen"}
+    for backend in backends:
+        before = backend.label_netto(month)
+        before_monthly = backend.monthly_totals_by_label()
+        if isinstance(backend, PandasBackend):
+            apply_labels(
+                backend.summary_df,
+                pd.DataFrame(
+                    {
+                        "Tegenpartij": ["Ziggo"],
+                        "Label": ["Boodschappen"],
+                        "Zakelijk": [True],
+                    },
+                ),
+            )
+        else:
+            backend.store.save_label("Ziggo", "Boodschappen", True)
+        backend.apply_label_changes(
+            [LabelChange("Ziggo", Label.GEEN.value, "Boodschappen", True, True)],
+        )
+
+        pdt.assert_frame_equal(
+            replace_groups(
+                before,
+                backend.label_netto(month, labels=labels),
+                "Label",
+                labels,
+                sort_by="Netto",
+                ascending=False,
+            ).reset_index(drop=True),
+            backend.label_netto(month).reset_index(drop=True),
+        )
+        pdt.assert_frame_equal(
+            replace_groups(
+                before_monthly,
+                backend.monthly_totals_by_label(labels=labels),
+                "Label",
+                labels,
+                sort_by=["Maand", "Label"],
+            ).reset_index(drop=True),
+            backend.monthly_totals_by_label()
+            .sort_values(["Maand", "Label"])
+            .reset_index(drop=True),
+        )
+
+
+def test_cube_after_label_changes_matches_new_backend(backends):
+    pandas_backend, _ = backends
+    pandas_backend.label_netto()
+    # Onbekend moves to a label the cube has not seen yet
+    changes = pd.DataFrame(
+        {
+            "Tegenpartij": ["Jumbo", "Onbekend"],
+            "Label": ["Vaste lasten", "Nieuw"],
+            "Zakelijk": [True, False],
+        },
+    )
+    apply_labels(pandas_backend.summary_df, changes)
+    pandas_backend.apply_label_changes(
+        [
+            LabelChange(tp, None, label, None, zakelijk)
+            for tp, label, zakelijk in changes.itertuples(index=False)
+        ],
+    )
+    rebuilt = PandasBackend(pandas_backend.summary_df)
+
+    for month in (None, "2026-01"):
+        for name in ("label_netto", "tegenpartij_label_zakelijk", "monthly_totals"):
+            pdt.assert_frame_equal(
+                getattr(pandas_backend, name)(month),
+                getattr(rebuilt, name)(month),
+            )
+    pdt.assert_frame_equal(
+        pandas_backend.monthly_totals_by_label(
+            zakelijkheid=Zakelijkheid.BUSINESS.value,
+        ),
+        rebuilt.monthly_totals_by_label(zakelijkheid=Zakelijkheid.BUSINESS.value),
+    )
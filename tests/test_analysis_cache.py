@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from analysis_backend import CachedBackend, PandasBackend
+from analysis_cache import AnalysisCache
+from data_loader import read_and_clean_file
+from label_db import ImportManifest, get_store, init_db
+from transaction_store import TransactionStore
+
+
+def test_cache_counts_hits_and_evicts_least_recently_used():
+    cache = AnalysisCache(max_entries=2)
+    calls = []
+
+    def lookup(month):
+        return cache.get((1, 0), "f", (month,), lambda: calls.append(month) or month)
+
+    assert [lookup("2026-01"), lookup("2026-02"), lookup("2026-01")] == [
+        "2026-01",
+        "2026-02",
+        "2026-01",
+    ]
+    lookup("2026-03")  # drops 2026-02, used longest ago
+    lookup("2026-01")
+    lookup("2026-02")
+
+    assert calls == ["2026-01", "2026-02", "2026-03", "2026-02"]
+    assert (cache.hits, cache.misses, len(cache)) == (2, 4, 2)
+    assert cache.stats()["hit_rate"] == 2 / 6
+
+
+def test_cache_drops_entries_of_old_versions():
+    cache = AnalysisCache(max_entries=8)
+    cache.get((1, 0), "f", ({"a", "b"},), lambda: 1)
+    assert cache.get((1, 0), "f", ({"b", "a"},), lambda: 2) == 1
+    assert cache.get((1, 1), "f", ({"a", "b"},), lambda: 3) == 3
+    assert len(cache) == 1
+
+
+def _summary():
+    return pd.DataFrame(
+        {
+            "Maand": ["2026-01", "2026-01"],
+            "Tegenpartij": ["Jumbo", "Ziggo"],
+            "Netto": [-500, -3000],
+            "Maand_NL": ["januari 2026", "januari 2026"],
+            "Label": ["Boodschappen", "Geen label"],
+            "Zakelijk": [False, False],
+        },
+    )
+
+
+def test_cached_backend_recomputes_after_label_edit(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    summary = _summary()
+    cache = AnalysisCache(max_entries=8)
+    backend = CachedBackend(PandasBackend(summary), cache, db_path)
+
+    first = backend.label_netto("2026-01")
+    # Changing the returned frame leaves the cached one alone
+    first["Netto"] = 0
+    second = backend.label_netto("2026-01")
+    second.loc[second.index[0], "Netto"] = 0
+    assert backend.label_netto("2026-01")["Netto"].tolist() == [-500, -3000]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    get_store(db_path).save_label("Ziggo", "Internet", False)
+    backend.label_netto("2026-01")
+    assert cache.misses == 2
+
+
+def test_store_writes_from_another_thread_keep_the_cache(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+        "20260101,12,Party A,IBAN1,Debit,ACC1\n",
+    )
+    cleaned = read_and_clean_file(str(p))
+    cache = AnalysisCache(max_entries=8)
+    backend = CachedBackend(PandasBackend(_summary()), cache, db_path)
+    backend.label_netto("2026-01")
+    version = get_store(db_path).current_version()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(TransactionStore(db_path).add, cleaned).result()
+        pool.submit(ImportManifest(db_path).record, "hash", "ing.csv", "ing", 1).result()
+
+    backend.label_netto("2026-01")
+    assert get_store(db_path).current_version() == version
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
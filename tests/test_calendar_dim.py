@@ -0,0 +1,41 @@
+import pandas as pd
+
+from calendar_dim import build_calendar, month_names
+from utils import format_month
+
+
+def test_calendar_covers_month_range_without_gaps():
+    calendar = build_calendar(["2026-02", "2025-11", "2026-02"])
+
+    assert calendar["Maand"].tolist() == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert calendar["Maand_NL"].tolist() == [
+        "november 2025",
+        "december 2025",
+        "januari 2026",
+        "februari 2026",
+    ]
+    assert calendar["Jaar"].tolist() == [2025, 2025, 2026, 2026]
+    assert calendar["Kwartaal"].tolist() == [4, 4, 1, 1]
+    assert calendar["Volgorde"].diff().dropna().eq(1).all()
+
+
+def test_month_names_match_format_month():
+    months = pd.Series(["2026-03", "2024-12", "2026-03"], index=[5, 7, 9], dtype="str")
+
+    names = month_names(months)
+
+    assert names.index.tolist() == [5, 7, 9]
+    assert names.tolist() == [format_month(m) for m in months]
+    assert build_calendar([]).empty
+
+
+def test_missing_and_unknown_months_get_no_name():
+    months = pd.Series(["2026-01", None, "2026-03"], dtype="str")
+
+    names = month_names(months)
+    outside = month_names(months, build_calendar(["2026-01"]))
+
+    assert names[[0, 2]].tolist() == ["januari 2026", "maart 2026"]
+    assert pd.isna(names[1])
+    assert outside[0] == "januari 2026"
+    assert outside[[1, 2]].isna().all()
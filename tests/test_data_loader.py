@@ -1,4 +1,18 @@
-from data_loader import DataFrameColumn, clean_transactions, filter_own_ibans, load_csvs
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from data_loader import (
+    DataFrameColumn,
+    _read_single_file,
+    clean_transactions,
+    filter_own_ibans,
+    load_csvs,
+    parse_amount_cents,
+    read_and_clean_file,
+    sniff_csv,
+    stream_clean_file,
+)
 
 
 def test_load_csvs_concatenates(tmp_path):
@@ -23,10 +37,65 @@ def test_clean_transactions_ing_parses_amounts_and_dates(raw_transactions_ing):
     cleaned = clean_transactions(df)
 
     assert DataFrameColumn.MONTH.value in cleaned.columns
-    assert cleaned[DataFrameColumn.AMOUNT.value].dtype.kind in "fi"
+    assert cleaned[DataFrameColumn.AMOUNT.value].dtype == "int64"
+    assert cleaned[DataFrameColumn.AMOUNT.value].tolist() == [-123456, 0, 5000]
 
 
 def test_filter_own_ibans(own_ibans_df):
     df = own_ibans_df
     res = filter_own_ibans(df)
     assert not any(res["iban tegenpartij"] == "OWN1")
+
+
+def test_stream_clean_file_matches_full_clean(tmp_path):
+    p = tmp_path / "rabo.csv"
+    rows = [
+        "Datum,Bedrag,Naam tegenpartij,Tegenrekening IBAN/BBAN,IBAN/BBAN",
+        '2026-01-15,"-12,50",Shop,IBAN_SHOP,OWN1',
+        "2026-01-16,567,Employer,IBAN_EMP,OWN1",
+        '2026-01-15,"-12,50",Shop,IBAN_SHOP,OWN1',
+        "not a date,1,Broken,IBAN_X,OWN1",
+        "2026-02-01,100,Savings,OWN2,OWN1",
+        "2026-02-02,-100,Checking,OWN1,OWN2",
+        "2026-02-03,42,,IBAN_Y,OWN2",
+    ]
+    p.write_text("\n".join(rows) + "\n")
+
+    expected = clean_transactions(_read_single_file(str(p)))
+    streamed = stream_clean_file(str(p), chunk_rows=2)
+
+    pdt.assert_frame_equal(streamed, expected)
+    assert len(streamed) == 3
+
+
+def test_sniff_csv_detects_encoding_delimiter_and_bank(tmp_path):
+    p = tmp_path / "rabo.csv"
+    p.write_bytes(
+        "IBAN/BBAN;Datum;Bedrag;Tegenrekening IBAN/BBAN;Naam tegenpartij;Omschrijving\n"
+        "OWN1;2026-01-15;-12,50;IBAN_SHOP;Café;x\n".encode("latin1"),
+    )
+
+    fmt = sniff_csv(str(p))
+    assert fmt == ("latin1", ";", "RABO")
+
+    cleaned = read_and_clean_file(str(p))
+    assert cleaned[DataFrameColumn.COUNTERPARTY.value].tolist() == ["Café"]
+    assert "Omschrijving" not in cleaned.columns
+
+
+def test_read_and_clean_file_rejects_unknown_header(tmp_path):
+    p = tmp_path / "other.csv"
+    p.write_text("\ufeffa,b,c\n1,2,3\n", encoding="utf-8")
+
+    assert sniff_csv(str(p)).bank == "UNKNOWN"
+    with pytest.raises(ValueError, match="Unsupported bank format"):
+        read_and_clean_file(str(p))
+
+
+def test_parse_amount_cents():
+    values = pd.Series(["1234,56", "-12.5", "+7", "0,005", ",5", "abc", None])
+
+    cents = parse_amount_cents(values)
+
+    assert cents.tolist()[:5] == [123456, -1250, 700, 1, 50]
+    assert cents.iloc[5:].isna().all()
@@ -1,7 +1,20 @@
 from pathlib import Path
 
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import data_loader
 import settings
-from data_loader import import_and_merge
+from data_loader import (
+    DataFrameColumn,
+    ImportCancelled,
+    ImportOptions,
+    fingerprint_index,
+    import_and_merge,
+)
+from importer import build_summary, update_summary
+from label_db import ImportManifest, init_db
 
 
 def test_import_and_merge_copies_and_dedupes(tmp_path):
@@ -46,3 +59,164 @@ def test_import_and_merge_mixed_formats(tmp_path):
     assert "Bedrag" in df.columns
     assert "Tegenpartij" in df.columns
     assert any("geïmporteerd" in m for m in messages)
+
+
+def test_import_and_merge_parallel_matches_serial(tmp_path, monkeypatch):
+    paths = []
+    for month in range(1, 5):
+        p = tmp_path / f"ing_{month}.csv"
+        p.write_text(
+            "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+            f"2026{month:02d}01,12,Party A,IBAN1,Debit,ACC1\n"
+            f"2026{month:02d}15,34,Party B,IBAN2,Credit,ACC1\n"
+            "20260101,12,Party A,IBAN1,Debit,ACC1\n",
+        )
+        paths.append(str(p))
+    paths.append(str(tmp_path / "missing.csv"))
+
+    monkeypatch.setattr(data_loader, "PARALLEL_MIN_BYTES", 0)
+    serial_df, serial_messages = import_and_merge(
+        None, paths, copy_files=False, options=ImportOptions(workers=1),
+    )
+    parallel_df, parallel_messages = import_and_merge(
+        None, paths, copy_files=False, options=ImportOptions(workers=2),
+    )
+
+    pdt.assert_frame_equal(parallel_df, serial_df)
+    assert parallel_messages == serial_messages
+    assert len(serial_df) == 8
+
+
+def test_import_and_merge_skips_known_fingerprints(tmp_path):
+    header = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+    first = tmp_path / "jan.csv"
+    second = tmp_path / "jan_feb.csv"
+    first.write_text(header + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+    second.write_text(
+        header
+        + "20260101,12,Party A,IBAN1,Debit,ACC1\n"
+        + "20260101,12,Party A,IBAN9,Debit,ACC1\n"
+        + "20260201,34,Party B,IBAN2,Credit,ACC1\n",
+    )
+
+    existing, _ = import_and_merge(None, [str(first)], copy_files=False)
+    index = fingerprint_index(existing)
+    df, messages = import_and_merge(
+        existing, [str(second)], copy_files=False, fingerprints=index,
+    )
+
+    assert len(df) == 3
+    assert len(index) == 3
+    assert messages == ["geïmporteerd jan_feb.csv: 2 nieuwe regels toegevoegd"]
+
+
+def test_import_and_merge_skips_files_in_manifest(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    settings.DATA_DIR = str(tmp_path / "data")
+    content = (
+        "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+        "20260101,12,Party A,IBAN1,Debit,ACC1\n"
+    )
+    first = tmp_path / "jan.csv"
+    again = tmp_path / "jan_again.csv"
+    first.write_text(content)
+    again.write_text(content)
+
+    manifest = ImportManifest(db_path)
+    existing, _ = import_and_merge(
+        None, [str(first)], options=ImportOptions(manifest=manifest),
+    )
+    df, messages = import_and_merge(
+        existing,
+        [str(first), str(again)],
+        options=ImportOptions(manifest=ImportManifest(db_path)),
+    )
+
+    assert df is existing
+    assert messages == [
+        "overgeslagen jan.csv: bestand is al eerder geïmporteerd",
+        "overgeslagen jan_again.csv: bestand is al eerder geïmporteerd",
+    ]
+    assert len(list(Path(settings.DATA_DIR).glob("*.csv"))) == 1
+
+
+def test_import_and_merge_reports_progress(tmp_path):
+    header = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+    jan = tmp_path / "jan.csv"
+    feb = tmp_path / "feb.csv"
+    jan.write_text(header + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+    feb.write_text(
+        header
+        + "20260201,12,Party A,IBAN1,Debit,ACC1\n"
+        + "20260202,34,Party B,IBAN2,Credit,ACC1\n",
+    )
+
+    reported = []
+    import_and_merge(
+        None,
+        [str(jan), str(feb)],
+        copy_files=False,
+        options=ImportOptions(
+            progress=lambda path, rows: reported.append((Path(path).name, rows)),
+        ),
+    )
+
+    assert reported == [("jan.csv", 1), ("feb.csv", 2)]
+
+
+def test_cancelled_import_changes_nothing(tmp_path):
+    header = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+    settings.DATA_DIR = str(tmp_path / "data")
+    first = tmp_path / "jan.csv"
+    first.write_text(header + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+    existing, _ = import_and_merge(None, [str(first)], copy_files=False)
+    index = fingerprint_index(existing)
+
+    second = tmp_path / "feb.csv"
+    second.write_text(header + "20260201,34,Party B,IBAN2,Credit,ACC1\n")
+    with pytest.raises(ImportCancelled):
+        import_and_merge(
+            existing,
+            [str(second)],
+            copy_files=True,
+            fingerprints=index,
+            options=ImportOptions(cancelled=lambda: True),
+        )
+
+    assert len(index) == 1
+    assert list(Path(settings.DATA_DIR).glob("*.csv")) == []
+
+
+def test_update_summary_matches_full_rebuild(tmp_path):
+    header = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+    old = tmp_path / "old.csv"
+    new = tmp_path / "new.csv"
+    old.write_text(
+        header
+        + "20260101,10,Party A,IBAN1,Debit,ACC1\n"
+        + "20260102,20,Party B,IBAN2,Credit,ACC1\n",
+    )
+    new.write_text(
+        header
+        + "20260103,5,Party A,IBAN1,Debit,ACC1\n"
+        + "20260201,7,Party C,IBAN3,Debit,ACC1\n",
+    )
+    labels = pd.DataFrame(
+        {"Tegenpartij": ["Party A"], "Label": ["Winkel"], "Zakelijk": [False]},
+    )
+
+    existing, _ = import_and_merge(None, [str(old)], copy_files=False)
+    combined, _ = import_and_merge(existing, [str(new)], copy_files=False)
+
+    incremental = update_summary(
+        build_summary(existing, labels), combined.iloc[len(existing) :], labels,
+    )
+    rebuilt = build_summary(combined, labels)
+
+    keys = [DataFrameColumn.MONTH.value, DataFrameColumn.COUNTERPARTY.value]
+    pdt.assert_frame_equal(
+        incremental.sort_values(keys).reset_index(drop=True),
+        rebuilt.sort_values(keys).reset_index(drop=True),
+    )
+    assert incremental[DataFrameColumn.NETTO.value].sum() == -200
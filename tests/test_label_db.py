@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import Zakelijkheid
+from data_loader import apply_labels
+from label_db import get_store, init_db
+
+
+def test_label_store_shares_one_wal_connection(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+
+    assert get_store(db_path) is store
+    assert store.execute("PRAGMA journal_mode")[0][0] == "wal"
+
+
+def test_label_store_saves_from_worker_threads(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+
+    def save(i):
+        store.save_label(f"Partij {i % 10}", f"Label {i}", i % 2 == 0)
+        return len(store.get_labels())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(save, range(200)))
+
+    labels = store.get_labels().set_index("Tegenpartij")
+    assert len(labels) == 10
+    # Whichever save came last, the row was written whole
+    for name, row in labels.iterrows():
+        i = int(row["Label"].split()[1])
+        assert name == f"Partij {i % 10}"
+        assert bool(row["Zakelijk"]) == (i % 2 == 0)
+
+
+def test_save_labels_then_apply_to_summary(tmp_path, summary_df):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+    rows = [("A", " Huur ", True), ("C", "", False), ("Z", "Onbekend", True)]
+
+    store.save_labels(rows)
+    apply_labels(summary_df, store.get_labels())
+
+    assert len(store.get_labels()) == 3
+    assert summary_df["Label"].tolist() == ["Huur", "Huur", "L2", "Geen label"]
+    assert summary_df["Zakelijk"].tolist() == [True, True, False, False]
+    assert summary_df["Zakelijk_NL"].tolist() == [
+        Zakelijkheid.BUSINESS.value,
+        Zakelijkheid.BUSINESS.value,
+        Zakelijkheid.NON_BUSINESS.value,
+        Zakelijkheid.NON_BUSINESS.value,
+    ]
+
+
+def test_label_cache_follows_writes_and_other_connections(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+
+    labels = store.get_labels()
+    assert store.get_labels() is labels
+
+    store.save_label("A", "Huur", True)
+    assert store.version == 1
+    assert store.get_label_map() == {"A": ("Huur", 1)}
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE labels SET Label = 'Wonen' WHERE Tegenpartij = 'A'")
+    conn.close()
+    assert store.get_label_map() == {"A": ("Wonen", 1)}
+    assert store.version == 2
+
+
+def test_reads_do_not_wait_for_a_write_on_another_thread(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+    store.save_label("A", "Huur", True)
+    writing = threading.Event()
+    release = threading.Event()
+
+    # Keeps the write transaction open until the main thread has read
+    def rows():
+        yield ("B", "Boodschappen", False)
+        writing.set()
+        release.wait(timeout=10)
+        yield ("C", "Vervoer", False)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        write = pool.submit(store.save_labels, rows())
+        assert writing.wait(timeout=10)
+        version = store.current_version()
+        read = store.read_frame("SELECT Tegenpartij FROM labels")
+        assert not write.done()
+        release.set()
+        write.result()
+
+    assert version == 1
+    assert read["Tegenpartij"].tolist() == ["A"]
+    assert set(store.get_labels()["Tegenpartij"]) == {"A", "B", "C"}
+
+
+def test_transaction_writes_keep_the_cached_labels(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    store = get_store(db_path)
+    store.save_label("A", "Huur", True)
+    labels = store.get_labels()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(
+            store.execute,
+            "INSERT INTO transactions (Fingerprint, Tegenpartij) VALUES (1, 'A')",
+        ).result()
+
+    assert store.get_labels() is labels
+    assert store.version == 1
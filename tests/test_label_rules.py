@@ -0,0 +1,209 @@
+import re
+
+import pandas as pd
+import pytest
+
+import label_db
+from data_loader import read_and_clean_file
+from importer import build_summary, rebuild_summary, summary_after_import
+from label_db import get_store, init_db
+from label_rules import (
+    RuleSet,
+    add_rule,
+    counterparty_profile,
+    delete_rule,
+    get_rule_set,
+    get_rules,
+)
+from transaction_store import TransactionStore
+
+ING_HEADER = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+
+
+def _rules(rows):
+    return RuleSet(
+        pd.DataFrame(
+            [(i, *row) for i, row in enumerate(rows)],
+            columns=[
+                "Id",
+                "Soort",
+                "Patroon",
+                "MinBedrag",
+                "MaxBedrag",
+                "Label",
+                "Zakelijk",
+                "Prioriteit",
+            ],
+        ),
+    )
+
+
+def test_rule_set_picks_highest_priority_match():
+    rules = _rules(
+        [
+            ("begint_met", "albert", None, None, "Boodschappen", False, 0),
+            ("bevat", "HEIJN", None, None, "Supermarkt", False, 0),
+            ("regex", r"^ns\b", None, None, "Reizen", False, 0),
+            ("iban", "nl01 bank 0001", None, None, "Huur", False, 5),
+            ("bedrag", None, -50000, -10000, "Grote uitgave", True, 1),
+            ("bevat", "heijn", None, None, "Te laat", False, 0),
+        ],
+    )
+    profile = pd.DataFrame(
+        {
+            "iban tegenpartij": ["NL99BANK0009", "NL99BANK0008", "NL01BANK0001", None],
+            "Bedrag": [-1250.0, -20000.0, -90000.0, -20000.0],
+        },
+        index=pd.Index(
+            ["Albert Heijn 1234", "NS Groep", "Verhuurder", "Kapper"],
+            name="Tegenpartij",
+        ),
+    )
+
+    result = rules.resolve(profile).set_index("Tegenpartij")
+
+    assert result["Label"].to_dict() == {
+        "Albert Heijn 1234": "Boodschappen",
+        "NS Groep": "Grote uitgave",
+        "Verhuurder": "Huur",
+        "Kapper": "Grote uitgave",
+    }
+    assert result.loc["Kapper", "Zakelijk"]
+
+
+def test_regex_rules_match_like_separate_searches():
+    patterns = [
+        r"^ns\b",
+        r"(?:bol|amazon)\.com",
+        r"heijn (?:\d+)$",
+        r"winkel\s+0*7",
+        r"[a-z]+ bv$",
+        r"(?i:JUMBO) markt",
+    ]
+    rules = _rules(
+        [("regex", p, None, None, p, False, 0) for p in patterns],
+    )
+    names = [
+        "NS Groep",
+        "Bol.com",
+        "amazon.com eu",
+        "Albert Heijn 1234",
+        "heijn 12 x",
+        "Winkel   007",
+        "Kapper BV",
+        "Jumbo markt",
+        "nsx",
+    ]
+    profile = pd.DataFrame(
+        {"iban tegenpartij": None, "Bedrag": 0.0},
+        index=pd.Index(names, name="Tegenpartij"),
+    )
+    expected = {
+        name: next(
+            (p for p in patterns if re.search(p, name, re.IGNORECASE)),
+            None,
+        )
+        for name in names
+    }
+
+    result = rules.resolve(profile).set_index("Tegenpartij")["Label"]
+
+    assert result.to_dict() == {
+        name: label for name, label in expected.items() if label is not None
+    }
+
+
+def test_rules_label_only_unlabelled_counterparties(tmp_path):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + "20260101,12,Jumbo Utrecht,IBAN1,Debit,ACC1\n"
+        + "20260102,8,Jumbo Zeist,IBAN2,Debit,ACC1\n"
+        + "20260103,950,Verhuurder,NL01BANK0001,Debit,ACC1\n",
+    )
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    df = read_and_clean_file(str(p))
+    TransactionStore(db_path).add(df)
+    get_store(db_path).save_label("Jumbo Zeist", "Eigen label", False)
+    add_rule("begint_met", "jumbo", "Boodschappen", db_path=db_path)
+    add_rule("iban", "NL01BANK0001", "Huur", zakelijk=True, db_path=db_path)
+
+    rules = get_rule_set(db_path)
+    assert get_rule_set(db_path) is rules
+    summary = build_summary(df, get_store(db_path).get_labels(), rules)
+
+    assert summary.set_index("Tegenpartij")["Label"].to_dict() == {
+        "Jumbo Utrecht": "Boodschappen",
+        "Jumbo Zeist": "Eigen label",
+        "Verhuurder": "Huur",
+    }
+    pd.testing.assert_frame_equal(
+        TransactionStore(db_path).counterparty_profile().sort_index(),
+        counterparty_profile(df).sort_index(),
+        check_dtype=False,
+    )
+
+
+def test_add_rule_rejects_invalid_rules(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    with pytest.raises(ValueError):
+        add_rule("onbekend", "x", db_path=db_path)
+    with pytest.raises(ValueError):
+        add_rule("bedrag", db_path=db_path)
+    with pytest.raises(ValueError):
+        add_rule("regex", "(", db_path=db_path)
+    assert get_store(db_path).get_rules().empty
+
+
+def test_rebuilt_summary_follows_rule_changes(tmp_path, monkeypatch):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + "20260101,12,Jumbo Utrecht,IBAN1,Debit,ACC1\n"
+        + "20260102,8,Kapper,IBAN2,Debit,ACC1\n",
+    )
+    db_path = str(tmp_path / "labels.db")
+    monkeypatch.setattr(label_db, "LABEL_DB", db_path)
+    init_db()
+    df = read_and_clean_file(str(p))
+
+    def labels():
+        return rebuild_summary(df).set_index("Tegenpartij")["Label"].to_dict()
+
+    assert labels() == {"Jumbo Utrecht": "Geen label", "Kapper": "Geen label"}
+    add_rule("bevat", "jumbo", "Boodschappen")
+    assert labels() == {"Jumbo Utrecht": "Boodschappen", "Kapper": "Geen label"}
+    delete_rule(int(get_rules()["Id"].iloc[0]))
+    assert labels() == {"Jumbo Utrecht": "Geen label", "Kapper": "Geen label"}
+
+
+def test_import_moves_counterparty_out_of_amount_rule(tmp_path, monkeypatch):
+    old = tmp_path / "jan.csv"
+    new = tmp_path / "feb.csv"
+    old.write_text(
+        ING_HEADER
+        + "20260101,12,Kapper,IBAN2,Debit,ACC1\n"
+        + "20260102,40,Jumbo,IBAN1,Debit,ACC1\n",
+    )
+    new.write_text(
+        ING_HEADER
+        + "20260201,60,Kapper,IBAN2,Credit,ACC1\n"
+        + "20260202,20,Jumbo,IBAN1,Debit,ACC1\n",
+    )
+    db_path = str(tmp_path / "labels.db")
+    monkeypatch.setattr(label_db, "LABEL_DB", db_path)
+    init_db()
+    add_rule("bedrag", label="Groot", max_amount=-1000)
+    existing = read_and_clean_file(str(old))
+    df = pd.concat([existing, read_and_clean_file(str(new))], ignore_index=True)
+
+    updated = summary_after_import(existing, rebuild_summary(existing), df)
+
+    def labels(summary):
+        return summary.set_index(["Maand", "Tegenpartij"])["Label"].sort_index()
+
+    pd.testing.assert_series_equal(labels(updated), labels(rebuild_summary(df)))
+    assert set(labels(updated).loc[:, "Kapper"]) == {"Geen label"}
+    assert set(labels(updated).loc[:, "Jumbo"]) == {"Groot"}
@@ -0,0 +1,60 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import settings
+from data_loader import shared_cleaning
+from matcher import MultiPatternMatcher
+
+
+def test_find_all_reports_overlapping_patterns():
+    matcher = MultiPatternMatcher(["he", "she", "his", "hers"])
+
+    assert matcher.find_all("ushers") == {0, 1, 3}
+    assert matcher.find_all("xyz") == set()
+    assert not matcher.search("")
+
+
+def test_matches_agrees_with_regex_contains():
+    names = ["Spaarrekening", "ING Bank", "Oranje spaar", "rek", "NS Reizen"]
+    values = pd.Series(
+        ["Mijn SPAARREKENING", "ing bank nv", "Albert Heijn", None, "NS", "Direkt"]
+        * 3,
+    )
+    expected = values.str.contains(
+        "|".join(map(re.escape, names)), case=False, na=False,
+    ).to_numpy()
+
+    result = MultiPatternMatcher(names).matches(values)
+
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_table_passes_agree_with_find_all():
+    matcher = MultiPatternMatcher(["he", "She", "his", "hers", "é"])
+    values = pd.Series(
+        ["ushers", "", "xyz", "SHE said", "hé", "this is hers"], dtype="str",
+    )
+    found = [matcher.find_all(value) for value in values]
+    ranks = [4, 3, 2, 1, 0]
+
+    rows, ids = matcher.find_pairs(values)
+
+    assert sorted(zip(rows.tolist(), ids.tolist(), strict=True)) == sorted(
+        (row, i) for row, ids in enumerate(found) for i in ids
+    )
+    assert matcher.min_rank(values, ranks, 9).tolist() == [
+        min((ranks[i] for i in ids), default=9) for ids in found
+    ]
+
+
+def test_shared_cleaning_uses_ignored_account_matcher(monkeypatch):
+    monkeypatch.setattr(
+        settings, "IGNORED_ACCOUNT_MATCHER", MultiPatternMatcher(["spaar"]),
+    )
+    df = pd.DataFrame({"Tegenpartij": ["Oranje Spaarrekening", "Jumbo"]})
+
+    cleaned = shared_cleaning(df, "Tegenpartij")
+
+    assert cleaned["Tegenpartij"].tolist() == ["Jumbo"]
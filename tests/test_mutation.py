@@ -82,7 +82,7 @@ def test_summarize_monthly_totals_by_label_no_mutation_and_values(summary_df):
 
     # verify expected value for January
     jan = res[res[DataFrameColumn.MONTH.value] == "2026-01"]
-    assert abs(jan[DataFrameColumn.NETTO.value].sum() - 70.0) < 1e-9
+    assert abs(jan[DataFrameColumn.NETTO.value].sum() - 7000) < 1e-9
 
 
 def test_filter_zakelijkheid_no_mutation(summary_df, transactions_df):
@@ -140,7 +140,7 @@ def test_filter_zakelijkheid_no_mutation(summary_df, transactions_df):
     # summarize_monthly_totals_by_label
     res = assert_no_mutation(summarize_monthly_totals_by_label, df)
     jan = res[res[DataFrameColumn.MONTH.value] == "2026-01"]
-    assert abs(jan[DataFrameColumn.NETTO.value].sum() - 70.0) < 1e-9
+    assert abs(jan[DataFrameColumn.NETTO.value].sum() - 7000) < 1e-9
 
     # filter_zakelijkheid
     assert_no_mutation(filter_zakelijkheid, df, Zakelijkheid.BUSINESS.value)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recurring import detect_recurring, format_for_display
+
+
+def _series(counterparty, start, count, amount, freq="MS"):
+    dates = pd.date_range(start, periods=count, freq=freq)
+    amounts = amount if isinstance(amount, list) else [amount] * count
+    return pd.DataFrame(
+        {"date": dates, "Tegenpartij": counterparty, "Bedrag": amounts},
+    )
+
+
+def _transactions():
+    rng = np.random.default_rng(7)
+    # Monthly, a few days' jitter, price up for the last payment
+    netflix = _series("Netflix", "2025-01-01", 12, [-999] * 11 + [-1199])
+    netflix["date"] += pd.to_timedelta(rng.integers(0, 3, 12), unit="D")
+    frames = [
+        netflix,
+        _series("Verzekeraar", "2023-03-15", 3, -24000, freq="12MS"),
+        # Stopped in the summer
+        _series("Sportschool", "2025-01-05", 6, -3500),
+        # Started two months before the end of the data
+        _series("Spotify", "2025-10-20", 3, -1099),
+        # Regular visits with amounts all over the place
+        _series(
+            "Supermarkt",
+            "2025-01-03",
+            50,
+            list(-rng.integers(500, 15000, 50)),
+            freq="7D",
+        ),
+        # Income is not a subscription
+        _series("Werkgever", "2025-01-25", 12, 300000),
+        _series("Eenmalig", "2025-06-01", 1, -5000),
+    ]
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=1)
+    df["Tegenpartij"] = df["Tegenpartij"].astype("str")
+    return df
+
+
+def test_finds_recurring_debits_with_their_frequency():
+    result = detect_recurring(_transactions(), pd.Timestamp("2025-12-31"))
+    by_name = result.set_index("Tegenpartij")
+
+    assert set(by_name.index) == {"Netflix", "Verzekeraar", "Sportschool", "Spotify"}
+    assert by_name.loc["Netflix", "Frequentie"] == "maandelijks"
+    assert by_name.loc["Verzekeraar", "Frequentie"] == "jaarlijks"
+    assert by_name.loc["Netflix", "Bedrag"] == -1199
+    assert by_name.loc["Netflix", "Vorig bedrag"] == -999
+    assert by_name.loc["Netflix", "Aantal"] == 12
+    # Most expensive per year first
+    assert result["Per jaar"].is_monotonic_increasing
+
+
+def test_flags_new_missed_and_price_changed_series():
+    result = detect_recurring(_transactions(), pd.Timestamp("2025-12-31"))
+    status = dict(zip(result["Tegenpartij"], result["Status"], strict=True))
+
+    assert status["Netflix"] == "prijswijziging"
+    assert status["Sportschool"] == "gemist"
+    assert status["Spotify"] == "nieuw"
+    assert status["Verzekeraar"] == ""
+
+
+@pytest.mark.parametrize(
+    "select",
+    [lambda df: df.iloc[:0], lambda df: df[df["Bedrag"] > 0]],
+    ids=["no transactions", "only credits"],
+)
+def test_no_debits_gives_empty_result_of_same_types(select):
+    transactions = _transactions()
+    found = detect_recurring(transactions, pd.Timestamp("2025-12-31"))
+
+    result = detect_recurring(select(transactions))
+
+    assert result.empty
+    pd.testing.assert_series_equal(result.dtypes, found.dtypes)
+    assert format_for_display(result).empty
@@ -0,0 +1,81 @@
+import os
+
+import pandas.testing as pdt
+
+import settings
+from data_loader import read_and_clean_file
+from matcher import MultiPatternMatcher
+from transaction_cache import TransactionCache
+
+ING_HEADER = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+
+
+def test_cache_roundtrip_matches_fresh_parse(tmp_path):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + '20260101,"12,50",Party A,IBAN1,Debit,ACC1\n'
+        + "20260201,567,Party B,IBAN2,Credit,ACC1\n",
+    )
+
+    cache = TransactionCache(tmp_path / "cache")
+    (first,) = cache.load([str(p)])
+
+    reopened = TransactionCache(tmp_path / "cache")
+    cached = reopened.lookup(str(p))
+
+    assert cached is not None
+    pdt.assert_frame_equal(cached, read_and_clean_file(str(p)))
+    pdt.assert_frame_equal(cached, first)
+
+
+def test_cache_reparses_changed_files_and_survives_touch(tmp_path):
+    p = tmp_path / "ing.csv"
+    p.write_text(ING_HEADER + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+
+    cache = TransactionCache(tmp_path / "cache")
+    cache.load([str(p)])
+
+    stat = os.stat(p)
+    os.utime(p, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.lookup(str(p)) is not None
+
+    p.write_text(ING_HEADER + "20260101,99,Party A,IBAN1,Debit,ACC1\n")
+    assert cache.lookup(str(p)) is None
+
+    (df,) = cache.load([str(p)])
+    assert len(df) == 1
+    assert cache.lookup(str(p)) is not None
+
+
+def test_cache_prune_drops_missing_files(tmp_path):
+    p1 = tmp_path / "a.csv"
+    p2 = tmp_path / "b.csv"
+    p1.write_text(ING_HEADER + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+    p2.write_text(ING_HEADER + "20260201,34,Party B,IBAN2,Debit,ACC1\n")
+
+    cache = TransactionCache(tmp_path / "cache")
+    cache.load([str(p1), str(p2)])
+    cache.prune([str(p1)])
+
+    assert len(list((tmp_path / "cache").glob("*.parquet"))) == 1
+    assert TransactionCache(tmp_path / "cache").lookup(str(p2)) is None
+
+
+def test_cache_reparses_after_ignored_accounts_change(tmp_path, monkeypatch):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + "20260101,12,Party A,IBAN1,Debit,ACC1\n"
+        + "20260201,567,Party B,IBAN2,Credit,ACC1\n",
+    )
+    TransactionCache(tmp_path / "cache").load([str(p)])
+
+    monkeypatch.setattr(settings, "IGNORED_ACCOUNT_NAMES", ["Party B"])
+    monkeypatch.setattr(
+        settings, "IGNORED_ACCOUNT_MATCHER", MultiPatternMatcher(["Party B"]),
+    )
+    cache = TransactionCache(tmp_path / "cache")
+    assert cache.lookup(str(p)) is None
+    (cleaned,) = cache.load([str(p)])
+    assert cleaned["Tegenpartij"].tolist() == ["Party A"]
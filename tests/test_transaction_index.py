@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from transaction_index import TransactionIndex
+
+
+def _transactions(rows=500, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-10-01") + pd.to_timedelta(
+        rng.integers(0, 150, rows), unit="D",
+    )
+    counterparties = pd.Series(
+        rng.choice(["Jumbo", "Ziggo", "Werkgever", "Albert Heijn"], rows),
+        dtype="str",
+    )
+    counterparties[::50] = np.nan
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "Tegenpartij": counterparties,
+            "Bedrag": rng.integers(-5000, 5000, rows),
+            "Maand": dates.to_period("M"),
+        },
+    )
+
+
+def test_lookup_matches_boolean_mask():
+    df = _transactions()
+    index = TransactionIndex(df)
+
+    for counterparty in ("Jumbo", "Werkgever"):
+        for month in (None, "2025-12", "2026-02"):
+            mask = df["Tegenpartij"] == counterparty
+            if month is not None:
+                mask &= df["Maand"].astype(str) == month
+            expected = df[mask].sort_values("date", kind="stable")
+            pd.testing.assert_frame_equal(
+                index.rows([counterparty], month),
+                expected,
+            )
+    assert len(index) == df["Tegenpartij"].notna().sum()
+
+
+def test_unknown_keys_give_no_rows():
+    index = TransactionIndex(_transactions())
+
+    assert index.rows(["Onbekend"]).empty
+    assert index.rows(["Jumbo"], "2030-01").empty
+    assert len(index.rows(["Jumbo", "Ziggo"], "2025-11")) == len(
+        index.lookup("Jumbo", "2025-11"),
+    ) + len(index.lookup("Ziggo", "2025-11"))
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pandas.testing as pdt
+
+import settings
+from data_loader import read_and_clean_file
+from importer import _sync_store
+from label_db import ImportManifest, init_db
+from matcher import MultiPatternMatcher
+from transaction_cache import TransactionCache
+from transaction_store import TransactionStore
+
+ING_HEADER = "Date,Amount (EUR),Name / Description,Counterparty,Debit/credit,Account\n"
+
+
+def _store(tmp_path):
+    db_path = str(tmp_path / "labels.db")
+    init_db(db_path)
+    return TransactionStore(db_path)
+
+
+def test_store_roundtrip_matches_cleaned_frame(tmp_path):
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + '20260101,"12,50",Party A,IBAN1,Debit,ACC1\n'
+        + "20260201,567,Party B,,Credit,ACC1\n",
+    )
+    cleaned = read_and_clean_file(str(p))
+
+    store = _store(tmp_path)
+    store.add(cleaned)
+    store.add(cleaned)
+
+    assert len(store) == 2
+    pdt.assert_frame_equal(
+        store.load().sort_values("date", ignore_index=True),
+        cleaned.sort_values("date", ignore_index=True),
+        check_like=True,
+    )
+    assert store.month("2026-02")["Tegenpartij"].tolist() == ["Party B"]
+    assert store.month("2026-02")["iban tegenpartij"].isna().all()
+    assert store.counterparty("Party A", "2026-01")["Bedrag"].tolist() == [-1250]
+    assert store.counterparty("Party A", "2026-02").empty
+
+
+def test_store_queries_use_indexes(tmp_path):
+    store = _store(tmp_path)
+    with sqlite3.connect(store.db_path) as conn:
+        for where in ("Maand = ?", "Tegenpartij = ? AND Maand = ?", "Iban = ?"):
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE {where}",
+                ("x",) * where.count("?"),
+            ).fetchall()
+            assert "USING INDEX" in plan[0][-1]
+
+
+def test_sync_store_follows_data_dir(tmp_path):
+    store = _store(tmp_path)
+    manifest = ImportManifest(store.db_path)
+    cache = TransactionCache(tmp_path / "cache")
+    jan = tmp_path / "jan.csv"
+    feb = tmp_path / "feb.csv"
+    jan.write_text(ING_HEADER + "20260101,12,Party A,IBAN1,Debit,ACC1\n")
+    feb.write_text(ING_HEADER + "20260201,34,Party B,IBAN2,Credit,ACC1\n")
+
+    _sync_store([str(jan)], cache, manifest, store)
+    assert len(store) == 1
+
+    _sync_store([str(jan), str(feb)], cache, manifest, store)
+    assert len(store) == 2
+    assert len(list(manifest)) == 2
+
+    # A removed statement takes its transactions with it
+    _sync_store([str(feb)], cache, manifest, store)
+    assert store.load()["Tegenpartij"].tolist() == ["Party B"]
+    assert len(list(manifest)) == 1
+
+
+def test_sync_store_rebuilds_after_ignored_accounts_change(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    manifest = ImportManifest(store.db_path)
+    p = tmp_path / "ing.csv"
+    p.write_text(
+        ING_HEADER
+        + "20260101,12,Party A,IBAN1,Debit,ACC1\n"
+        + "20260201,34,Party B,IBAN2,Credit,ACC1\n",
+    )
+    _sync_store([str(p)], TransactionCache(tmp_path / "cache"), manifest, store)
+    assert len(store) == 2
+
+    monkeypatch.setattr(settings, "IGNORED_ACCOUNT_NAMES", ["Party B"])
+    monkeypatch.setattr(
+        settings, "IGNORED_ACCOUNT_MATCHER", MultiPatternMatcher(["Party B"]),
+    )
+    _sync_store([str(p)], TransactionCache(tmp_path / "cache"), manifest, store)
+    assert store.load()["Tegenpartij"].tolist() == ["Party A"]